@@ -1,13 +1,15 @@
 import typer
 import sys
 import os
+from typing import List, Optional
+from typer.core import TyperCommand
 
 # Add the project path to sys.path to allow module imports
 sys.path.append(os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
 from src.porcelain.init import init as init_func
 from src.plumbing.hash_object import hash_object as hash_object_func
-from src.plumbing.cat_file import cat_file as cat_file_func
+from src.plumbing.cat_file import cat_file as cat_file_func, cat_file_batch as cat_file_batch_func
 from src.porcelain.add import add as add_func
 from src.plumbing.commit_tree import commit_tree as commit_tree_func
 from src.porcelain.commit import commit as commit_func
@@ -22,11 +24,30 @@ from src.porcelain.reset import reset as reset_func
 from src.porcelain.checkout import checkout as checkout_func
 from src.porcelain.merge import merge as merge_func
 from src.porcelain.status import status as status_func
+from src.porcelain.repack import repack as repack_func
+from src.plumbing.commit_graph import commit_graph as commit_graph_func
+from src.plumbing.merge_base import merge_base as merge_base_func
+from src.plumbing.diff_tree import diff_tree as diff_tree_func
+from src.plumbing.merge_tree import merge_tree as merge_tree_func
+from src.plumbing.pack_refs import pack_refs as pack_refs_func
+from src.plumbing.update_ref import update_ref as update_ref_func, update_ref_stdin as update_ref_stdin_func
+from src.core.index import IndexLockedError
 app = typer.Typer(name="mygit", help="A Python implementation of Git")
 
 plumbing_app = typer.Typer(help="Plumbing (low-level) commands")
 app.add_typer(plumbing_app, name="plumbing")
 
+class PathsCommand(TyperCommand):
+    """
+    Command taking paths after '--': they are set aside in ctx.meta["paths"]
+    before click parses the rest, which would pass them along with the revisions.
+    """
+    def parse_args(self, ctx, args):
+        if "--" in args:
+            split = args.index("--")
+            args, ctx.meta["paths"] = args[:split], args[split + 1:]
+        return super().parse_args(ctx, args)
+
 @app.command()
 def init(
     path: str = typer.Argument(".", help="Path where to initialize the repository")
@@ -55,29 +76,53 @@ def hash_object(
 @app.command("add")
 @plumbing_app.command("add")
 def add(
-    file: str = typer.Argument(..., help="File to add to the index")
+    paths: List[str] = typer.Argument(None, help="Files or directories to add to the index"),
+    stdin: bool = typer.Option(False, "--stdin", help="Also read paths from standard input, one per line"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Number of processes used to hash files (default: CPU count)")
 ):
     """
-    Add a file to the index (staging area).
-    """
-    add_func(file)
-    typer.echo(f"File {file} added to the index")
+    Add files and directories to the index (staging area).
+    """
+    paths = list(paths or [])
+    if stdin:
+        paths.extend(line.rstrip("\n") for line in sys.stdin if line.strip())
+    if not paths:
+        typer.echo("Error: nothing specified, nothing added.", err=True)
+        raise typer.Exit(code=1)
+    staged = add_func(paths, jobs=jobs)
+    if len(paths) == 1 and os.path.isfile(paths[0]):
+        typer.echo(f"File {paths[0]} added to the index")
+    else:
+        typer.echo(f"{len(staged)} file(s) added to the index")
 
 @app.command("cat-file")
 @plumbing_app.command("cat-file")
 def cat_file(
-    oid: str = typer.Argument(..., help="OID of the object to read"),
+    oid: str = typer.Argument(None, help="OID of the object to read"),
     type_: bool = typer.Option(False, "--type", "-t", help="Show the type of the object"),
+    size: bool = typer.Option(False, "--size", "-s", help="Show the size of the object"),
     pretty: bool = typer.Option(False, "--pretty", "-p", help="Show the formatted content of the object"),
+    batch: bool = typer.Option(False, "--batch", help="Read OIDs from stdin and print header and content of each object"),
+    batch_check: bool = typer.Option(False, "--batch-check", help="Read OIDs from stdin and print the header of each object"),
+    buffer: bool = typer.Option(False, "--buffer", help="In batch mode, do not flush after every object"),
     git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
 ):
     """
-    Show the type or content of a Git object (blob/tree/commit).
+    Show the type, size or content of a Git object (blob/tree/commit).
     """
-    if type_ == pretty:
-        typer.echo("You must specify either --type/-t or --pretty/-p, but not both.", err=True)
+    if batch or batch_check:
+        if batch and batch_check:
+            typer.echo("--batch and --batch-check are mutually exclusive.", err=True)
+            raise typer.Exit(1)
+        cat_file_batch_func(git_dir, check_only=batch_check, buffered=buffer)
+        return
+    if oid is None:
+        typer.echo("Error: Missing argument 'OID'.", err=True)
+        raise typer.Exit(1)
+    if [type_, size, pretty].count(True) != 1:
+        typer.echo("You must specify exactly one of --type/-t, --size/-s or --pretty/-p.", err=True)
         raise typer.Exit(1)
-    opt = "-t" if type_ else "-p"
+    opt = "-t" if type_ else "-s" if size else "-p"
     cat_file_func(oid, opt, git_dir)
 
 @app.command("write-tree")
@@ -85,8 +130,7 @@ def write_tree():
     """
     Write the current index as a tree object and print its SHA-1.
     """
-    write_tree_func()
-    typer.echo("Tree written")
+    typer.echo(write_tree_func())
 
 @app.command("commit-tree")
 @plumbing_app.command("commit-tree")
@@ -112,11 +156,15 @@ def commit_cmd(
     typer.echo("Commit created")
     
 @app.command("ls-tree")
-def ls_tree_cmd(tree_sha: str, git_dir: str = ".mygit"):
+def ls_tree_cmd(
+    tree_sha: str,
+    recursive: bool = typer.Option(False, "-r", help="Recurse into subtrees"),
+    git_dir: str = ".mygit"
+):
     """
     List the contents of a tree object (like git ls-tree).
     """
-    ls_tree_func(tree_sha, git_dir)
+    ls_tree_func(tree_sha, git_dir, recursive=recursive)
     
 @app.command("ls-files")
 def ls_files_cmd():
@@ -129,10 +177,45 @@ def ls_files_cmd():
 @plumbing_app.command("show-ref")
 def show_ref_cmd(git_dir: str = ".mygit"):
     """
-    List all refs and their hashes (branches and tags).
+    List all refs and their hashes (branches and tags, loose or packed).
     """
     show_ref_func(git_dir)
 
+@app.command("pack-refs")
+@plumbing_app.command("pack-refs")
+def pack_refs_cmd(
+    all_refs: bool = typer.Option(False, "--all", help="Pack branches too, not only tags"),
+    prune: bool = typer.Option(True, "--prune/--no-prune", help="Delete the loose files of the packed refs"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Pack refs into a sorted packed-refs file for fast lookups.
+    """
+    pack_refs_func(git_dir, all_refs=all_refs, prune=prune)
+
+@app.command("update-ref")
+@plumbing_app.command("update-ref")
+def update_ref_cmd(
+    ref: Optional[str] = typer.Argument(None, help="Ref to update (HEAD updates the branch it points to)"),
+    values: List[str] = typer.Argument(None, help="<new> [<old>], or [<old>] with -d"),
+    delete: bool = typer.Option(False, "-d", help="Delete the ref"),
+    stdin: bool = typer.Option(False, "--stdin", help="Apply update/create/delete/verify lines from standard input in one transaction"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Update refs under a lock, checking their old value when given.
+    """
+    values = values or []
+    if stdin:
+        update_ref_stdin_func(git_dir)
+    elif ref and delete and len(values) <= 1:
+        update_ref_func(ref, old_value=values[0] if values else None, delete=True, git_dir=git_dir)
+    elif ref and 1 <= len(values) <= 2:
+        update_ref_func(ref, values[0], values[1] if len(values) > 1 else None, git_dir=git_dir)
+    else:
+        typer.echo("Error: usage: update-ref [-d] <ref> [<new>] [<old>] | update-ref --stdin", err=True)
+        raise typer.Exit(1)
+
 @app.command("rev-parse")
 @plumbing_app.command("rev-parse")
 def rev_parse_cmd(
@@ -144,12 +227,22 @@ def rev_parse_cmd(
     """
     rev_parse_func(ref, git_dir)
 
-@app.command("log")
-def log_cmd():
+@app.command("log", cls=PathsCommand)
+def log_cmd(
+    ctx: typer.Context,
+    revisions: List[str] = typer.Argument(None, help="Revisions to start from (default: HEAD), then '--' and paths to limit the history to"),
+    max_count: Optional[int] = typer.Option(None, "-n", "--max-count", help="Limit the number of commits shown"),
+    since: Optional[str] = typer.Option(None, "--since", help="Show commits more recent than a date (e.g. 2024-01-31, '2 weeks ago')"),
+    until: Optional[str] = typer.Option(None, "--until", help="Show commits older than a date"),
+    author: Optional[str] = typer.Option(None, "--author", help="Show commits whose author matches a regular expression"),
+    oneline: bool = typer.Option(False, "--oneline", help="Show each commit on one line"),
+    first_parent: bool = typer.Option(False, "--first-parent", help="Only follow the first parent of merge commits")
+):
     """
     Show the commit history from HEAD (like git log).
     """
-    log_func()
+    log_func(revisions=revisions or None, paths=ctx.meta.get("paths", []), max_count=max_count, since=since, until=until,
+             author=author, oneline=oneline, first_parent=first_parent)
 
 @app.command("rm")
 def rm_cmd(
@@ -174,7 +267,8 @@ def reset_cmd(
     commit_ref: str = typer.Argument(..., help="Commit reference (SHA, HEAD, branch, etc.)"),
     soft: bool = typer.Option(False, "--soft", help="Move HEAD only"),
     mixed: bool = typer.Option(False, "--mixed", help="Move HEAD and reset the index (default)"),
-    hard: bool = typer.Option(False, "--hard", help="Move HEAD, reset the index and the working directory")
+    hard: bool = typer.Option(False, "--hard", help="Move HEAD, reset the index and the working directory"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Number of processes writing files with --hard (default: checkout.workers config, else CPU count)")
 ):
     """
     Reset HEAD, index, and working directory to a given commit.
@@ -185,13 +279,14 @@ def reset_cmd(
         mode = "hard"
     else:
         mode = "mixed"
-    reset_func(commit_ref, mode=mode)
+    reset_func(commit_ref, mode=mode, jobs=jobs)
     typer.echo(f"reset --{mode} performed on {commit_ref}")
 
 @app.command("checkout")
 def checkout_cmd(
     target: str = typer.Argument(None, help="Branch name or SHA to checkout"),
     b: str = typer.Option(None, "-b", help="Create a new branch and check it out"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Number of processes writing files (default: checkout.workers config, else CPU count)"),
     ctx: typer.Context = typer.Option(None, hidden=True)
 ):
     """
@@ -204,7 +299,7 @@ def checkout_cmd(
     actual_target = b if b else target
     
     git_dir = ctx.obj.git_dir if ctx and hasattr(ctx.obj, 'git_dir') else ".mygit"
-    checkout_func(actual_target, create_branch=b, git_dir=git_dir)
+    checkout_func(actual_target, create_branch=b, git_dir=git_dir, jobs=jobs)
     typer.echo(f"Checkout performed on {b if b else target}")
 
 @app.command("status")
@@ -222,8 +317,81 @@ def merge_cmd(
     if success:
         typer.echo(f"Merge of {target} completed successfully.")
 
+@app.command("repack")
+def repack_cmd(
+    window: int = typer.Option(10, "--window", help="Number of objects tried as delta bases"),
+    depth: int = typer.Option(50, "--depth", help="Maximum delta chain depth"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Pack all loose objects and existing packs into a single delta-compressed packfile.
+    """
+    repack_func(git_dir, window=window, depth=depth)
+
+@app.command("merge-base")
+@plumbing_app.command("merge-base")
+def merge_base_cmd(
+    commits: List[str] = typer.Argument(..., help="Commits; the first one is compared to the others"),
+    all_bases: bool = typer.Option(False, "--all", "-a", help="Print all merge bases instead of one"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Find the best common ancestor(s) of commits.
+    """
+    merge_base_func(commits, show_all=all_bases, git_dir=git_dir)
+
+@app.command("diff-tree")
+@plumbing_app.command("diff-tree")
+def diff_tree_cmd(
+    revisions: List[str] = typer.Argument(..., help="One commit (compared to its first parent), or two trees or commits"),
+    recursive: bool = typer.Option(False, "-r", help="Recurse into subtrees"),
+    name_only: bool = typer.Option(False, "--name-only", help="Only show the paths"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Compare the content of two trees (like git diff-tree).
+    """
+    diff_tree_func(revisions, git_dir=git_dir, recursive=recursive, name_only=name_only)
+
+@app.command("merge-tree")
+@plumbing_app.command("merge-tree")
+def merge_tree_cmd(
+    branch1: str = typer.Argument(..., help="Current side"),
+    branch2: str = typer.Argument(..., help="Side merged in"),
+    name_only: bool = typer.Option(False, "--name-only", help="Only list the conflicted paths"),
+    merge_base: Optional[str] = typer.Option(None, "--merge-base", help="Merge base to use instead of computing it"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Merge two commits without touching the index or the working tree, and print the merged tree.
+    Exits with status 1 if there are conflicts.
+    """
+    result = merge_tree_func(branch1, branch2, git_dir=git_dir, name_only=name_only, merge_base=merge_base)
+    if result.conflicts:
+        raise typer.Exit(1)
+
+@app.command("commit-graph")
+@plumbing_app.command("commit-graph")
+def commit_graph_cmd(
+    action: str = typer.Argument(..., help="'write' to write the graph, 'verify' to check it"),
+    git_dir: str = typer.Option(".mygit", help="Path to the .mygit directory")
+):
+    """
+    Write or check the commit-graph file used to speed up history walks.
+    """
+    commit_graph_func(action, git_dir)
+
 def main():
-    app()
+    try:
+        app()
+    except IndexLockedError as e:
+        typer.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    finally:
+        if os.environ.get("MYGIT_OBJECT_CACHE_STATS"):
+            from src.core.object_cache import object_cache
+            stats = object_cache.stats()
+            typer.echo(" ".join(f"{k}={v}" for k, v in stats.items()), err=True)
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
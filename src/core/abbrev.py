@@ -0,0 +1,96 @@
+import os
+import re
+from bisect import bisect_left
+from src.core.pack import get_packs
+
+# Shortest prefix accepted for an object ID
+MIN_ABBREV = 4
+HEX_PREFIX_RE = re.compile(r"[0-9a-fA-F]{%d,40}" % MIN_ABBREV)
+
+
+class AmbiguousObjectError(ValueError):
+    """
+    Raised when an abbreviated object ID matches several objects.
+    Attributes:
+        candidates (list): The matching object IDs, sorted.
+    """
+
+    def __init__(self, prefix, candidates):
+        super().__init__(f"short object ID {prefix} is ambiguous")
+        self.candidates = candidates
+
+
+# {(git_dir, fan-out directory name): (directory mtime_ns, sorted OIDs)}
+_loose_oids = {}
+
+
+def loose_oids(fan, git_dir=".mygit"):
+    """
+    Return the loose objects of one fan-out directory ('objects/<fan>') as a
+    sorted list of hex OIDs. The list is built once per process and kept as
+    long as the directory does not change.
+    Args:
+        fan (str): First two hex characters of the OIDs.
+        git_dir (str): Path to the .mygit directory.
+    """
+    directory = os.path.join(git_dir, "objects", fan)
+    key = (git_dir, fan)
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        _loose_oids.pop(key, None)
+        return []
+    cached = _loose_oids.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    # Temporary files and anything else that is not an object are skipped
+    oids = sorted(fan + name for name in os.listdir(directory)
+                  if len(name) == 38 and all(c in "0123456789abcdef" for c in name))
+    _loose_oids[key] = (mtime, oids)
+    return oids
+
+
+def find_by_prefix(prefix, git_dir=".mygit"):
+    """
+    List the objects whose ID starts with a prefix, loose or packed.
+    Loose objects are looked up in the sorted list of their fan-out
+    directory and packed ones in the sorted OID table of each pack index,
+    both by binary search.
+    Args:
+        prefix (str): Hex prefix of at least MIN_ABBREV characters.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: Matching OIDs, sorted and without duplicates.
+    Raises:
+        ValueError: If the prefix is too short or not hexadecimal.
+    """
+    if not HEX_PREFIX_RE.fullmatch(prefix):
+        raise ValueError(f"'{prefix}' is not an object ID prefix of {MIN_ABBREV} to 40 hex characters")
+    prefix = prefix.lower()
+    oids = loose_oids(prefix[:2], git_dir)
+    matches = set()
+    i = bisect_left(oids, prefix)
+    while i < len(oids) and oids[i].startswith(prefix):
+        matches.add(oids[i])
+        i += 1
+    for pack in get_packs(git_dir):
+        matches.update(pack.index.prefix_matches(prefix))
+    return sorted(matches)
+
+
+def resolve_abbrev(prefix, git_dir=".mygit"):
+    """
+    Expand an abbreviated object ID to the only object it matches.
+    Args:
+        prefix (str): Hex prefix of at least MIN_ABBREV characters.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str or None: The full OID, or None if no object matches.
+    Raises:
+        AmbiguousObjectError: If several objects match.
+        ValueError: If the prefix is too short or not hexadecimal.
+    """
+    matches = find_by_prefix(prefix, git_dir)
+    if len(matches) > 1:
+        raise AmbiguousObjectError(prefix, matches)
+    return matches[0] if matches else None
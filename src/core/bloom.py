@@ -0,0 +1,136 @@
+import struct
+from src.core.tree_diff import diff_trees
+
+# Settings of the changed-path filters (the same as Git's defaults)
+BLOOM_HASH_VERSION = 1
+BLOOM_NUM_HASHES = 7
+BLOOM_BITS_PER_ENTRY = 10
+# Commits changing more paths get a filter that matches every path
+BLOOM_MAX_CHANGED_PATHS = 512
+BLOOM_SEED_0 = 0x293AE76F
+BLOOM_SEED_1 = 0x7E646E2C
+
+# Filter of a commit that changes nothing, and of a commit that changes too much
+EMPTY_FILTER = b"\x00"
+LARGE_FILTER = b"\xff"
+
+
+def murmur3_32(data, seed):
+    """
+    Compute the 32-bit MurmurHash3 of some bytes.
+    Args:
+        data (bytes): Data to hash.
+        seed (int): 32-bit seed.
+    Returns:
+        int: Unsigned 32-bit hash.
+    """
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    h = seed & 0xFFFFFFFF
+    full = len(data) & ~3
+    for (k,) in struct.iter_unpack("<I", data[:full]):
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xE6546B64) & 0xFFFFFFFF
+    tail = data[full:]
+    if tail:
+        k = int.from_bytes(tail, "little")
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+    h ^= len(data)
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h
+
+
+def bloom_key(path):
+    """
+    Return the bit hashes of a path: BLOOM_NUM_HASHES values derived from
+    two seeded MurmurHash3 hashes (double hashing).
+    """
+    data = path.encode()
+    h0 = murmur3_32(data, BLOOM_SEED_0)
+    h1 = murmur3_32(data, BLOOM_SEED_1)
+    return [(h0 + i * h1) & 0xFFFFFFFF for i in range(BLOOM_NUM_HASHES)]
+
+
+def path_and_parents(path):
+    """
+    Return a path and all its leading directories ('a/b/c' gives 'a/b/c', 'a/b', 'a').
+    """
+    keys = [path]
+    while "/" in path:
+        path = path.rsplit("/", 1)[0]
+        keys.append(path)
+    return keys
+
+
+def build_filter(paths):
+    """
+    Build the Bloom filter of a set of changed paths.
+    Args:
+        paths (set or None): Changed paths, including their leading
+            directories. None means too many paths changed.
+    Returns:
+        bytes: The filter, BLOOM_BITS_PER_ENTRY bits per path (at least one byte).
+    """
+    if paths is None:
+        return LARGE_FILTER
+    if not paths:
+        return EMPTY_FILTER
+    size = (len(paths) * BLOOM_BITS_PER_ENTRY + 7) // 8
+    bits = bytearray(size)
+    for path in paths:
+        for h in bloom_key(path):
+            position = h % (size * 8)
+            bits[position // 8] |= 1 << (position % 8)
+    return bytes(bits)
+
+
+def filter_contains(bloom, path):
+    """
+    Check whether a path may be in a filter.
+    Directories are checked along with the path: a changed file always has
+    its leading directories in the filter too.
+    Args:
+        bloom (bytes): Filter built by build_filter.
+        path (str): Path relative to the repository root.
+    Returns:
+        bool: False if the path is certainly not in the filter.
+    """
+    total = len(bloom) * 8
+    for key in path_and_parents(path):
+        for h in bloom_key(key):
+            position = h % total
+            if not bloom[position // 8] & (1 << (position % 8)):
+                return False
+    return True
+
+
+def changed_paths(old_tree, new_tree, git_dir=".mygit", limit=BLOOM_MAX_CHANGED_PATHS):
+    """
+    List the paths that differ between two trees, with their leading
+    directories. Subtrees with the same SHA-1 are skipped without being read.
+    Args:
+        old_tree (str or None): Tree SHA-1 (None for an empty tree).
+        new_tree (str or None): Tree SHA-1.
+        git_dir (str): Path to the .mygit directory.
+        limit (int): Stop once more paths than this have changed.
+    Returns:
+        set or None: The changed paths, None if there are more than `limit`.
+    Raises:
+        ValueError: If a tree object cannot be read.
+    """
+    changed = set()
+    for entry in diff_trees(old_tree, new_tree, git_dir):
+        changed.update(path_and_parents(entry.path))
+        if len(changed) > limit:
+            return None
+    return changed
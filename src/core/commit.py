@@ -0,0 +1,70 @@
+# Identity used when neither the environment nor the config provides one
+DEFAULT_NAME = "Author"
+DEFAULT_EMAIL = "author@example.com"
+
+
+def parse_commit(content):
+    """
+    Parse the content of a commit object.
+
+    Commits use Git's format: 'tree', 'parent', 'author' and 'committer'
+    headers, a blank line, then the message. Commits written by earlier
+    versions instead carry 'message:' and 'timestamp:' lines followed by the
+    list of indexed files; they are read too, the file list being ignored.
+    Args:
+        content (bytes): The raw content of the commit object.
+    Returns:
+        dict: tree, parents (list), parent (first parent, if any), author,
+        committer, timestamp (int, committer time) and message.
+    """
+    lines = content.decode(errors="replace").split("\n")
+    info = {"parents": [], "message": ""}
+    for i, line in enumerate(lines):
+        if line.startswith("tree "):
+            info["tree"] = line[5:].strip()
+        elif line.startswith("parent "):
+            info["parents"].append(line[7:].strip())
+        elif line.startswith("author "):
+            info["author"] = line[7:].strip()
+        elif line.startswith("committer "):
+            info["committer"] = line[10:].strip()
+        elif line.startswith("message: "):
+            info["message"] = line[9:].strip()
+        elif line.startswith("timestamp: "):
+            info["timestamp"] = int(line[11:].strip())
+        elif line.strip() == "":
+            # The rest is the commit message
+            if not info["message"]:
+                info["message"] = "\n".join(lines[i + 1:]).strip()
+            break
+    if info["parents"]:
+        info["parent"] = info["parents"][0]
+    if "timestamp" not in info and "committer" in info:
+        info["timestamp"] = parse_identity(info["committer"])[2]
+    return info
+
+
+def parse_identity(identity):
+    """
+    Split an author or committer header value.
+    Args:
+        identity (str): 'Name <email> timestamp timezone'.
+    Returns:
+        tuple: (name, email, timestamp, timezone), with timestamp an int
+        (0 if missing) and timezone a '+hhmm' string.
+    """
+    name, _, rest = identity.partition("<")
+    email, _, when = rest.partition(">")
+    parts = when.split()
+    timestamp = int(parts[0]) if parts and parts[0].lstrip("-").isdigit() else 0
+    timezone = parts[1] if len(parts) > 1 else "+0000"
+    return name.strip(), email.strip(), timestamp, timezone
+
+
+def format_timezone(offset_seconds):
+    """
+    Format a UTC offset in seconds as Git's '+hhmm'.
+    """
+    sign = "-" if offset_seconds < 0 else "+"
+    minutes = abs(offset_seconds) // 60
+    return f"{sign}{minutes // 60:02d}{minutes % 60:02d}"
@@ -0,0 +1,644 @@
+import os
+import mmap
+import struct
+import hashlib
+import tempfile
+from collections import namedtuple
+from src.core.refs import read_ref, list_refs
+from src.core.bloom import (changed_paths, build_filter, BLOOM_HASH_VERSION,
+                            BLOOM_NUM_HASHES, BLOOM_BITS_PER_ENTRY)
+
+GRAPH_SIGNATURE = b"CGPH"
+GRAPH_VERSION = 1
+HASH_VERSION = 1  # SHA-1
+
+CHUNK_OID_FANOUT = b"OIDF"
+CHUNK_OID_LOOKUP = b"OIDL"
+CHUNK_COMMIT_DATA = b"CDAT"
+CHUNK_EXTRA_EDGES = b"EDGE"
+CHUNK_BLOOM_INDEXES = b"BIDX"
+CHUNK_BLOOM_DATA = b"BDAT"
+
+HEADER_SIZE = 8
+CHUNK_ENTRY_SIZE = 12
+# Root tree, first and second parent positions, generation + high time bits, low time bits
+COMMIT_DATA_FORMAT = ">20sIIII"
+COMMIT_DATA_SIZE = struct.calcsize(COMMIT_DATA_FORMAT)
+# Hash version, number of hashes and bits per entry of the changed-path filters
+BLOOM_HEADER_FORMAT = ">III"
+BLOOM_HEADER_SIZE = struct.calcsize(BLOOM_HEADER_FORMAT)
+
+# Parent position meaning "no parent"
+PARENT_NONE = 0x70000000
+# Set on the second parent position when it indexes the extra edges list
+PARENT_EXTRA_EDGES = 0x80000000
+# Set on the last parent of a commit in the extra edges list
+LAST_EDGE = 0x80000000
+GENERATION_MAX = 0x3FFFFFFF
+NULL_OID = "0" * 40
+# Incremental layers go on top of the commit-graph file, listed in a chain file
+GRAPH_LAYERS_DIR = "commit-graphs"
+GRAPH_CHAIN_FILE = "commit-graph-chain"
+# A layer is merged into the one below it while that one is less than this
+# many times bigger, so a commit rewrites O(log n) commits on average
+SPLIT_SIZE_MULTIPLE = 2
+
+CommitInfo = namedtuple("CommitInfo", ["tree", "parents", "timestamp", "generation"])
+
+
+def get_graph_path(git_dir):
+    """
+    Return the path of the commit-graph file of a repository.
+    """
+    return os.path.join(git_dir, "objects", "info", "commit-graph")
+
+
+def get_layers_dir(git_dir):
+    """
+    Return the directory holding the incremental layers of the commit-graph.
+    """
+    return os.path.join(git_dir, "objects", "info", GRAPH_LAYERS_DIR)
+
+
+class CommitGraph:
+    """
+    Read-only, memory-mapped view of a commit-graph file.
+
+    The file holds every commit reachable from the refs when it was written,
+    sorted by OID: a fanout table and the OID list locate a commit by binary
+    search, and a fixed-width record gives its root tree, the positions of
+    its parents, its commit time and its generation number (one more than
+    the largest generation of its parents, 1 for a root commit). Commits
+    with more than two parents list the extra ones in the EDGE chunk.
+
+    The optional BIDX and BDAT chunks hold, for each commit, a Bloom filter
+    of the paths it changes relative to its first parent: BIDX gives the
+    cumulative end offset of each filter in BDAT, after the BDAT header.
+    An empty filter means none was computed for the commit.
+
+    A graph can sit on top of a base graph (an incremental layer, see
+    update_commit_graph): positions then count the commits of the layers
+    below first, so parent positions may point into them, and lookups fall
+    through to the base for commits the layer does not hold.
+    """
+
+    def __init__(self, path, base=None):
+        self.path = path
+        self.base = base
+        # Number of commits in the layers below
+        self.offset = len(base) if base is not None else 0
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        signature, version, hash_version, num_chunks, _ = struct.unpack(">4sBBBB", self._map[:HEADER_SIZE])
+        if signature != GRAPH_SIGNATURE or version != GRAPH_VERSION or hash_version != HASH_VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {GRAPH_VERSION} commit-graph")
+        self.chunks = {}
+        table = [
+            struct.unpack(">4sQ", self._map[pos:pos + CHUNK_ENTRY_SIZE])
+            for pos in range(HEADER_SIZE, HEADER_SIZE + CHUNK_ENTRY_SIZE * (num_chunks + 1), CHUNK_ENTRY_SIZE)
+        ]
+        for (chunk_id, start), (_, end) in zip(table, table[1:]):
+            self.chunks[chunk_id] = (start, end)
+        for required in (CHUNK_OID_FANOUT, CHUNK_OID_LOOKUP, CHUNK_COMMIT_DATA):
+            if required not in self.chunks:
+                self._map.close()
+                raise ValueError(f"{path} has no {required.decode()} chunk")
+        fanout_start = self.chunks[CHUNK_OID_FANOUT][0]
+        self.fanout = struct.unpack(">256I", self._map[fanout_start:fanout_start + 256 * 4])
+        self.count = self.fanout[255]
+        self._oid_start = self.chunks[CHUNK_OID_LOOKUP][0]
+        self._data_start = self.chunks[CHUNK_COMMIT_DATA][0]
+        self._edges_start = self.chunks.get(CHUNK_EXTRA_EDGES, (0, 0))[0]
+        self._bloom_index_start = None
+        if CHUNK_BLOOM_INDEXES in self.chunks and CHUNK_BLOOM_DATA in self.chunks:
+            bloom_start = self.chunks[CHUNK_BLOOM_DATA][0]
+            settings = struct.unpack_from(BLOOM_HEADER_FORMAT, self._map, bloom_start)
+            # Filters built with other settings cannot be queried: ignore them
+            if settings == (BLOOM_HASH_VERSION, BLOOM_NUM_HASHES, BLOOM_BITS_PER_ENTRY):
+                self._bloom_index_start = self.chunks[CHUNK_BLOOM_INDEXES][0]
+                self._bloom_data_start = bloom_start + BLOOM_HEADER_SIZE
+        # Trailing SHA-1 of the file, naming it in the layer chain
+        self.checksum = self._map[-20:].hex()
+
+    def _locate(self, position):
+        # (layer holding a position, position in that layer)
+        graph = self
+        while position < graph.offset:
+            graph = graph.base
+        return graph, position - graph.offset
+
+    def layers(self):
+        """
+        Return the graph files of the chain, the base file first.
+        """
+        graph, layers = self, []
+        while graph is not None:
+            layers.append(graph)
+            graph = graph.base
+        return layers[::-1]
+
+    def chunk(self, chunk_id):
+        """
+        Return the raw content of a chunk, or None if the file has no such chunk.
+        """
+        if chunk_id not in self.chunks:
+            return None
+        start, end = self.chunks[chunk_id]
+        return self._map[start:end]
+
+    def oid_at(self, position):
+        """
+        Return the raw 20-byte OID of the commit at a position.
+        """
+        graph, position = self._locate(position)
+        start = graph._oid_start + 20 * position
+        return graph._map[start:start + 20]
+
+    def _find_local(self, oid):
+        first = oid[0]
+        lo = self.fanout[first - 1] if first else 0
+        hi = self.fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._oid_start + 20 * mid
+            current = self._map[start:start + 20]
+            if current < oid:
+                lo = mid + 1
+            elif current > oid:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def find(self, oid):
+        """
+        Binary-search the graph for a commit.
+        Args:
+            oid (bytes): Raw 20-byte object ID.
+        Returns:
+            int or None: Position of the commit, or None if absent.
+        """
+        graph = self
+        while graph is not None:
+            position = graph._find_local(oid)
+            if position is not None:
+                return graph.offset + position
+            graph = graph.base
+        return None
+
+    def parent_positions(self, position):
+        """
+        Return the positions of the parents of the commit at a position.
+        """
+        graph, position = self._locate(position)
+        start = graph._data_start + COMMIT_DATA_SIZE * position
+        _, first, second, _, _ = struct.unpack_from(COMMIT_DATA_FORMAT, graph._map, start)
+        if first == PARENT_NONE:
+            return []
+        if second == PARENT_NONE:
+            return [first]
+        if not second & PARENT_EXTRA_EDGES:
+            return [first, second]
+        parents = [first]
+        edge = graph._edges_start + 4 * (second & ~PARENT_EXTRA_EDGES)
+        while True:
+            value, = struct.unpack_from(">I", graph._map, edge)
+            parents.append(value & ~LAST_EDGE)
+            if value & LAST_EDGE:
+                return parents
+            edge += 4
+
+    def generation_at(self, position):
+        """
+        Return the generation number of the commit at a position.
+        """
+        graph, position = self._locate(position)
+        start = graph._data_start + COMMIT_DATA_SIZE * position + 28
+        value, = struct.unpack_from(">I", graph._map, start)
+        return value >> 2
+
+    def info_at(self, position):
+        """
+        Return the CommitInfo of the commit at a position.
+        """
+        graph, local = self._locate(position)
+        start = graph._data_start + COMMIT_DATA_SIZE * local
+        tree, _, _, generation_time, time_low = struct.unpack_from(COMMIT_DATA_FORMAT, graph._map, start)
+        parents = [self.oid_at(p).hex() for p in self.parent_positions(position)]
+        timestamp = ((generation_time & 0x3) << 32) | time_low
+        return CommitInfo(tree.hex(), parents, timestamp, generation_time >> 2)
+
+    def bloom_filter_at(self, position):
+        """
+        Return the changed-path filter of the commit at a position, or None
+        if the graph has no filter for it.
+        """
+        graph, position = self._locate(position)
+        if graph._bloom_index_start is None:
+            return None
+        end, = struct.unpack_from(">I", graph._map, graph._bloom_index_start + 4 * position)
+        start = 0
+        if position:
+            start, = struct.unpack_from(">I", graph._map, graph._bloom_index_start + 4 * (position - 1))
+        if start == end:
+            return None
+        return graph._map[graph._bloom_data_start + start:graph._bloom_data_start + end]
+
+    def bloom_filter(self, oid):
+        """
+        Return the changed-path filter of a commit, or None if it is not in
+        the graph or has no filter.
+        Args:
+            oid (str): Commit SHA-1.
+        """
+        position = self.find(bytes.fromhex(oid))
+        return None if position is None else self.bloom_filter_at(position)
+
+    def lookup(self, oid):
+        """
+        Return the CommitInfo of a commit, or None if it is not in the graph.
+        Args:
+            oid (str): Commit SHA-1.
+        """
+        position = self.find(bytes.fromhex(oid))
+        return None if position is None else self.info_at(position)
+
+    def __contains__(self, oid):
+        return self.find(bytes.fromhex(oid)) is not None
+
+    def __len__(self):
+        return self.offset + self.count
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.oid_at(i).hex()
+
+    def close(self):
+        for graph in self.layers():
+            graph._map.close()
+
+
+# Open graphs, per repository, with the (mtime, size, inode) of the
+# commit-graph file and of the layer chain they were opened at
+_graph_registry = {}
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read_chain(git_dir):
+    """
+    Return the checksums listed in the layer chain file: the base
+    commit-graph first, then each layer from the bottom up ([] if none).
+    """
+    try:
+        with open(os.path.join(get_layers_dir(git_dir), GRAPH_CHAIN_FILE)) as f:
+            return f.read().split()
+    except FileNotFoundError:
+        return []
+
+
+def _layer_path(git_dir, checksum):
+    return os.path.join(get_layers_dir(git_dir), f"graph-{checksum}.graph")
+
+
+def get_commit_graph(git_dir):
+    """
+    Return the commit-graph of a repository, reopened when the file or its
+    layer chain is replaced. Layers are only used on top of the base file
+    they were written for.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        CommitGraph or None: The top layer (or the base file if there are no
+        layers); None if the repository has no (valid) commit-graph.
+    """
+    path = os.path.abspath(get_graph_path(git_dir))
+    key = (_stat_key(path), _stat_key(os.path.join(get_layers_dir(git_dir), GRAPH_CHAIN_FILE)))
+    if key[0] is None:
+        _graph_registry.pop(path, None)
+        return None
+    cached = _graph_registry.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    try:
+        graph = CommitGraph(path)
+    except (OSError, ValueError, struct.error):
+        graph = None
+    chain = _read_chain(git_dir)
+    if graph is not None and chain[:1] == [graph.checksum]:
+        for checksum in chain[1:]:
+            try:
+                layer = CommitGraph(_layer_path(git_dir, checksum), graph)
+            except (OSError, ValueError, struct.error):
+                break
+            if layer.checksum != checksum:
+                layer.close()
+                break
+            graph = layer
+    _graph_registry[path] = (key, graph)
+    return graph
+
+
+def lookup_commit(oid, git_dir=".mygit"):
+    """
+    Return the tree, parents, time and generation of a commit, from the
+    commit-graph when it has the commit, otherwise by parsing the object.
+    Args:
+        oid (str): Commit SHA-1.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        CommitInfo or None: None if the object is not a commit. The generation
+        is None for commits missing from the graph.
+    """
+    graph = get_commit_graph(git_dir)
+    if graph is not None:
+        info = graph.lookup(oid)
+        if info is not None:
+            return info
+    # Imported here: src.core.model reads objects through src.plumbing
+    from src.core.model import get_object, Commit
+    commit = get_object(oid, git_dir)
+    if not isinstance(commit, Commit):
+        return None
+    return CommitInfo(commit.tree, commit.parents, commit.timestamp, None)
+
+
+def list_ref_tips(git_dir=".mygit"):
+    """
+    Return the commits pointed to by HEAD and every ref under refs/.
+    """
+    tips = [sha for _, sha in list_refs(git_dir)]
+    head = read_ref("HEAD", git_dir)
+    if head is not None:
+        tips.append(head)
+    return tips
+
+
+def _collect_commits(git_dir, tips, known, graph=None):
+    """
+    Add to `known` ({oid: (tree, parents, timestamp)}) every commit reachable
+    from the tips, parsing only the commits it does not already hold. The
+    walk also stops at commits in `graph`.
+    """
+    from src.core.model import get_object, Commit
+
+    def is_known(oid):
+        return oid in known or (graph is not None and oid in graph)
+
+    stack = [tip for tip in tips if not is_known(tip)]
+    while stack:
+        oid = stack.pop()
+        if is_known(oid):
+            continue
+        commit = get_object(oid, git_dir)
+        if not isinstance(commit, Commit):
+            if commit is None:
+                raise ValueError(f"missing commit {oid}")
+            continue
+        known[oid] = (commit.tree, commit.parents, commit.timestamp)
+        stack.extend(parent for parent in commit.parents if not is_known(parent))
+
+
+def _compute_generations(commits, base=None):
+    # Generations of the parents in the layers below come from the base graph
+    generations = {}
+    for start in commits:
+        if start in generations:
+            continue
+        stack = [start]
+        while stack:
+            oid = stack[-1]
+            pending = []
+            for parent in commits[oid][1]:
+                if parent in generations:
+                    continue
+                if parent in commits:
+                    pending.append(parent)
+                else:
+                    generations[parent] = base.generation_at(base.find(bytes.fromhex(parent)))
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if oid not in generations:
+                parents = commits[oid][1]
+                generation = 1 + max((generations[p] for p in parents), default=0)
+                generations[oid] = min(generation, GENERATION_MAX)
+    return generations
+
+
+def _compute_filter(tree, parent_tree, git_dir):
+    """
+    Return the changed-path filter of a commit (relative to its first
+    parent), or b'' if a tree cannot be read.
+    """
+    try:
+        return build_filter(changed_paths(parent_tree, tree, git_dir))
+    except ValueError:
+        return b""
+
+
+def _carry_over(graph, start, commits, filters):
+    """
+    Copy the commits of a graph from a position on, with their filters,
+    into `commits` and `filters`, without reading any object.
+    """
+    for position in range(start, len(graph)):
+        info = graph.info_at(position)
+        oid = graph.oid_at(position).hex()
+        commits[oid] = (info.tree, info.parents, info.timestamp)
+        bloom = graph.bloom_filter_at(position)
+        if bloom is not None:
+            filters[oid] = bloom
+
+
+def _serialize_graph(commits, filters, git_dir, base=None):
+    """
+    Build a commit-graph file holding `commits`; parents missing from them
+    must be in `base`, the layer below. Missing changed-path filters are
+    computed.
+    """
+    oids = sorted(commits)
+    offset = len(base) if base is not None else 0
+    positions = {oid: offset + i for i, oid in enumerate(oids)}
+
+    def position_of(oid):
+        position = positions.get(oid)
+        return position if position is not None else base.find(bytes.fromhex(oid))
+
+    def tree_of(oid):
+        if oid in commits:
+            return commits[oid][0]
+        return base.info_at(base.find(bytes.fromhex(oid))).tree
+
+    generations = _compute_generations(commits, base)
+
+    fanout = [0] * 256
+    for oid in oids:
+        fanout[int(oid[:2], 16)] += 1
+    total = 0
+    for i in range(256):
+        total += fanout[i]
+        fanout[i] = total
+
+    commit_data = bytearray()
+    edges = []
+    bloom_indexes = []
+    bloom_data = bytearray(struct.pack(BLOOM_HEADER_FORMAT, BLOOM_HASH_VERSION,
+                                       BLOOM_NUM_HASHES, BLOOM_BITS_PER_ENTRY))
+    for oid in oids:
+        tree, parents, timestamp = commits[oid]
+        bloom = filters.get(oid)
+        if bloom is None:
+            bloom = _compute_filter(tree, tree_of(parents[0]) if parents else None, git_dir)
+        bloom_data += bloom
+        bloom_indexes.append(len(bloom_data) - BLOOM_HEADER_SIZE)
+        parent_positions = [position_of(p) for p in parents]
+        first = parent_positions[0] if parent_positions else PARENT_NONE
+        if len(parent_positions) <= 1:
+            second = PARENT_NONE
+        elif len(parent_positions) == 2:
+            second = parent_positions[1]
+        else:
+            second = PARENT_EXTRA_EDGES | len(edges)
+            edges.extend(parent_positions[1:])
+            edges[-1] |= LAST_EDGE
+        timestamp = max(timestamp, 0)
+        commit_data += struct.pack(
+            COMMIT_DATA_FORMAT, bytes.fromhex(tree or NULL_OID), first, second,
+            (generations[oid] << 2) | ((timestamp >> 32) & 0x3), timestamp & 0xFFFFFFFF,
+        )
+
+    chunks = [
+        (CHUNK_OID_FANOUT, struct.pack(">256I", *fanout)),
+        (CHUNK_OID_LOOKUP, b"".join(bytes.fromhex(oid) for oid in oids)),
+        (CHUNK_COMMIT_DATA, bytes(commit_data)),
+    ]
+    if edges:
+        chunks.append((CHUNK_EXTRA_EDGES, struct.pack(f">{len(edges)}I", *edges)))
+    chunks.append((CHUNK_BLOOM_INDEXES, struct.pack(f">{len(bloom_indexes)}I", *bloom_indexes)))
+    chunks.append((CHUNK_BLOOM_DATA, bytes(bloom_data)))
+    data = bytearray(struct.pack(">4sBBBB", GRAPH_SIGNATURE, GRAPH_VERSION, HASH_VERSION, len(chunks), 0))
+    offset = HEADER_SIZE + CHUNK_ENTRY_SIZE * (len(chunks) + 1)
+    for chunk_id, content in chunks:
+        data += struct.pack(">4sQ", chunk_id, offset)
+        offset += len(content)
+    data += struct.pack(">4sQ", b"\0\0\0\0", offset)
+    for _, content in chunks:
+        data += content
+    data += hashlib.sha1(data).digest()
+    return bytes(data)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="tmp_graph_", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _remove_layers(git_dir, keep=()):
+    # Layer files no longer in the chain (readers keep their mapping)
+    layers_dir = get_layers_dir(git_dir)
+    if not os.path.isdir(layers_dir):
+        return
+    for name in os.listdir(layers_dir):
+        if name.endswith(".graph") and name[len("graph-"):-len(".graph")] not in keep:
+            os.remove(os.path.join(layers_dir, name))
+
+
+def write_commit_graph(git_dir=".mygit", tips=None):
+    """
+    Write the commit-graph of a repository as a single file, merging any
+    incremental layers into it.
+
+    Commits already in the current graph are carried over without reading
+    their objects, along with their changed-path filters; only commits
+    reachable from the tips and missing from the graph are parsed, and their
+    trees diffed against their first parent. The file is written atomically.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        tips (iterable, optional): Commits to include with their history
+            (default: HEAD and every ref).
+    Returns:
+        int: Number of commits in the new graph.
+    Raises:
+        ValueError: If a reachable commit is missing from the database.
+    """
+    commits = {}
+    filters = {}
+    graph = get_commit_graph(git_dir)
+    if graph is not None:
+        _carry_over(graph, 0, commits, filters)
+    _collect_commits(git_dir, list_ref_tips(git_dir) if tips is None else tips, commits)
+    # The chain no longer matches the new file once it is replaced
+    _write_atomic(get_graph_path(git_dir), _serialize_graph(commits, filters, git_dir))
+    chain_path = os.path.join(get_layers_dir(git_dir), GRAPH_CHAIN_FILE)
+    if os.path.exists(chain_path):
+        os.remove(chain_path)
+    _remove_layers(git_dir)
+    return len(commits)
+
+
+def update_commit_graph(git_dir, tips):
+    """
+    Add new commits to the commit-graph incrementally, if the repository
+    has one. Repositories without a graph are left alone: it is created on
+    demand by 'commit-graph write'.
+
+    The new commits go to a small layer file on top of the graph (see
+    CommitGraph), listed in objects/info/commit-graphs/commit-graph-chain.
+    The layers below it are merged into it while they are less than
+    SPLIT_SIZE_MULTIPLE times bigger than what is written, so layer sizes
+    grow geometrically: a commit rewrites O(log n) commits on average, and
+    the base file is only rewritten once the layers hold half as many
+    commits as it does.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        tips (iterable): New commits.
+    Returns:
+        bool: True if the graph was updated.
+    """
+    graph = get_commit_graph(git_dir)
+    if graph is None:
+        return False
+    commits = {}
+    _collect_commits(git_dir, tips, commits, graph)
+    if not commits:
+        return True
+    layers = graph.layers()
+    # Merge the layers that are not big enough compared to what is written
+    keep = len(layers)
+    written = len(commits)
+    while keep and layers[keep - 1].count < SPLIT_SIZE_MULTIPLE * written:
+        keep -= 1
+        written += layers[keep].count
+    if not keep:
+        # Even the base file is small enough: rewrite it whole
+        write_commit_graph(git_dir, tips)
+        return True
+    base = layers[keep - 1]
+    filters = {}
+    _carry_over(graph, len(base), commits, filters)
+    data = _serialize_graph(commits, filters, git_dir, base)
+    checksum = data[-20:].hex()
+    _write_atomic(_layer_path(git_dir, checksum), data)
+    chain = [layer.checksum for layer in layers[:keep]] + [checksum]
+    _write_atomic(os.path.join(get_layers_dir(git_dir), GRAPH_CHAIN_FILE),
+                  "".join(line + "\n" for line in chain).encode())
+    _remove_layers(git_dir, keep=chain)
+    return True
@@ -0,0 +1,31 @@
+import os
+
+
+def read_config(git_dir=".mygit"):
+    """
+    Read the repository config file.
+    The file uses Git's format: '[section]' headers followed by 'key = value'
+    lines; '#' and ';' start comments.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        dict: {'section.key': value}, keys lowercased. Empty if there is no config.
+    """
+    config = {}
+    section = ""
+    try:
+        with open(os.path.join(git_dir, "config")) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return config
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1].strip().lower()
+            continue
+        key, sep, value = line.partition("=")
+        if sep:
+            config[f"{section}.{key.strip().lower()}"] = value.strip()
+    return config
@@ -0,0 +1,199 @@
+import sys
+
+# Length of the base blocks indexed when looking for copy candidates
+BLOCK = 16
+# Largest size a single copy instruction can carry
+MAX_COPY = 0x10000
+# Largest literal run a single insert instruction can carry
+MAX_INSERT = 0x7F
+
+
+def encode_varint(value):
+    """
+    Encode a size as a little-endian base-128 varint (delta header format).
+    """
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(buf, pos):
+    """
+    Decode a little-endian base-128 varint.
+    Returns:
+        tuple: (value, position after the varint)
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def delta_sizes(delta):
+    """
+    Read the source and target sizes at the start of a delta.
+    Returns:
+        tuple: (source size, target size, offset of the first instruction)
+    """
+    source_size, pos = decode_varint(delta, 0)
+    target_size, pos = decode_varint(delta, pos)
+    return source_size, target_size, pos
+
+
+def _flush_insert(out, insert):
+    for i in range(0, len(insert), MAX_INSERT):
+        chunk = insert[i:i + MAX_INSERT]
+        out.append(len(chunk))
+        out += chunk
+    insert.clear()
+
+
+def _emit_copy(out, offset, size):
+    while size:
+        length = min(size, MAX_COPY)
+        op = 0x80
+        args = bytearray()
+        for i in range(4):
+            byte = (offset >> (8 * i)) & 0xFF
+            if byte:
+                op |= 1 << i
+                args.append(byte)
+        # A size of 0x10000 is encoded as no size bytes at all
+        if length != MAX_COPY:
+            for i in range(3):
+                byte = (length >> (8 * i)) & 0xFF
+                if byte:
+                    op |= 0x10 << i
+                    args.append(byte)
+        out.append(op)
+        out += args
+        offset += length
+        size -= length
+
+
+def _match_length(base, base_pos, target, target_pos, limit):
+    """
+    Length of the common run starting at base_pos / target_pos, at most limit.
+    Compares whole slices first so long matches do not loop byte by byte.
+    """
+    length = 0
+    step = 1024
+    while length < limit:
+        n = min(step, limit - length)
+        if base[base_pos + length:base_pos + length + n] == target[target_pos + length:target_pos + length + n]:
+            length += n
+            continue
+        while length < limit and base[base_pos + length] == target[target_pos + length]:
+            length += 1
+        break
+    return length
+
+
+def create_delta(base, target, max_size=None):
+    """
+    Encode target as a sequence of copy/insert instructions against base.
+    Args:
+        base (bytes): Base object content.
+        target (bytes): Object content to encode.
+        max_size (int, optional): Give up once the delta grows past this size.
+    Returns:
+        bytes or None: The delta, or None if it would exceed max_size.
+    """
+    index = {}
+    for i in range(0, len(base) - BLOCK + 1, BLOCK):
+        index.setdefault(base[i:i + BLOCK], i)
+
+    out = bytearray(encode_varint(len(base)) + encode_varint(len(target)))
+    insert = bytearray()
+    n = len(target)
+    i = 0
+    while i < n:
+        offset = index.get(target[i:i + BLOCK]) if i + BLOCK <= n else None
+        if offset is None:
+            insert.append(target[i])
+            i += 1
+            if len(insert) >= MAX_INSERT:
+                _flush_insert(out, insert)
+            if max_size is not None and len(out) + len(insert) > max_size:
+                return None
+            continue
+        length = _match_length(base, offset, target, i, min(len(base) - offset, n - i))
+        # Reclaim the tail of the pending literals when the match extends backwards
+        while insert and offset > 0 and base[offset - 1] == insert[-1]:
+            insert.pop()
+            offset -= 1
+            i -= 1
+            length += 1
+        _flush_insert(out, insert)
+        _emit_copy(out, offset, length)
+        i += length
+        if max_size is not None and len(out) > max_size:
+            return None
+    _flush_insert(out, insert)
+    if max_size is not None and len(out) > max_size:
+        return None
+    return bytes(out)
+
+
+def apply_delta(base, delta):
+    """
+    Rebuild an object from its base and a delta.
+    Args:
+        base (bytes): Base object content.
+        delta (bytes): Delta produced by create_delta.
+    Returns:
+        bytes: The target content.
+    """
+    source_size, target_size, pos = delta_sizes(delta)
+    if source_size != len(base):
+        raise ValueError("delta base size mismatch")
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = 0
+            size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            if size == 0:
+                size = MAX_COPY
+            out += base[offset:offset + size]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("invalid delta opcode 0")
+    if len(out) != target_size:
+        raise ValueError("delta target size mismatch")
+    return bytes(out)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python delta.py <base_file> <target_file>", file=sys.stderr)
+        sys.exit(1)
+    with open(sys.argv[1], "rb") as f:
+        base = f.read()
+    with open(sys.argv[2], "rb") as f:
+        target = f.read()
+    delta = create_delta(base, target)
+    print(f"{len(target)} bytes -> {len(delta)} bytes delta")
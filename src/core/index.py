@@ -0,0 +1,547 @@
+import os
+import stat
+import struct
+import hashlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from contextlib import contextmanager
+
+INDEX_SIGNATURE = b"DIRC"
+INDEX_VERSION = 2
+
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, sha1, flags
+ENTRY_FORMAT = ">10I20sH"
+ENTRY_HEADER_SIZE = struct.calcsize(ENTRY_FORMAT)
+STAT_FIELDS = 10
+NAME_MASK = 0x0FFF
+STAGE_SHIFT = 12
+
+# Cache-tree extension: the tree OID of each directory whose entries did not
+# change since it was last written
+TREE_EXTENSION = b"TREE"
+
+# Placeholder object ID for entries without a blob (e.g. a side of a conflict)
+NULL_SHA1 = "0" * 40
+
+IndexEntry = namedtuple("IndexEntry", [
+    "path", "mode", "sha1", "stage",
+    "ctime_s", "ctime_ns", "mtime_s", "mtime_ns",
+    "dev", "ino", "uid", "gid", "size",
+])
+
+
+def _u32(value):
+    return value & 0xFFFFFFFF
+
+
+def stat_fields(st):
+    """
+    Reduce a stat result to the fields stored in an index entry, truncated
+    to 32 bits like on disk so values read back compare equal.
+    Returns:
+        tuple: (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, uid, gid, size)
+    """
+    return (
+        _u32(st.st_ctime_ns // 1_000_000_000), st.st_ctime_ns % 1_000_000_000,
+        _u32(st.st_mtime_ns // 1_000_000_000), st.st_mtime_ns % 1_000_000_000,
+        _u32(st.st_dev), _u32(st.st_ino), _u32(st.st_uid), _u32(st.st_gid), _u32(st.st_size),
+    )
+
+
+def mode_from_stat(st):
+    """
+    Return the Git file mode matching a stat result.
+    """
+    return "100755" if st.st_mode & stat.S_IXUSR else "100644"
+
+
+def make_entry(path, mode, sha1, st=None, stage=0):
+    """
+    Build an index entry, with stat data when the working file was stat'ed.
+    Args:
+        path (str): Path relative to the working tree.
+        mode (str): Git file mode (e.g. '100644').
+        sha1 (str): Blob SHA-1.
+        st (os.stat_result, optional): Stat data of the working file.
+        stage (int): 0 for a merged entry, 1-3 for base/ours/theirs of a conflict.
+    Returns:
+        IndexEntry: The entry.
+    """
+    fields = stat_fields(st) if st is not None else (0,) * 9
+    return IndexEntry(path, mode, sha1, stage, *fields)
+
+
+def entry_matches_stat(entry, st):
+    """
+    Check whether the stat data recorded in an entry still describes the file.
+    A match means the file can be assumed unchanged without hashing it,
+    unless the entry is racy (see is_racy).
+    """
+    ctime_s, ctime_ns, mtime_s, mtime_ns, _, ino, _, _, size = stat_fields(st)
+    return (
+        (entry.ctime_s, entry.ctime_ns, entry.mtime_s, entry.mtime_ns) == (ctime_s, ctime_ns, mtime_s, mtime_ns)
+        and entry.ino == ino
+        and entry.size == size
+        and entry.mode == mode_from_stat(st)
+    )
+
+
+def is_racy(entry, index_mtime):
+    """
+    An entry is racy when its file was modified no earlier than the index was
+    written: the file may have changed again within the same timestamp tick,
+    so its stat data cannot prove it is unchanged.
+    Args:
+        entry (IndexEntry): Index entry.
+        index_mtime (tuple): (seconds, nanoseconds) mtime of the index file.
+    """
+    return (entry.mtime_s, entry.mtime_ns) >= index_mtime
+
+
+def index_mtime(index_path):
+    """
+    Return the (seconds, nanoseconds) mtime of the index file, or None if missing.
+    """
+    try:
+        st = os.stat(index_path)
+    except FileNotFoundError:
+        return None
+    return _u32(st.st_mtime_ns // 1_000_000_000), st.st_mtime_ns % 1_000_000_000
+
+
+def _parse_text_index(data):
+    """
+    Parse the legacy text index ('mode path sha1' lines). Entries have no stat
+    data, so they are rehashed once and upgraded on the next write.
+    """
+    entries = []
+    for line in data.decode().splitlines():
+        parts = line.strip().split()
+        if len(parts) != 3:
+            continue
+        mode, path, sha1 = parts
+        if sha1 == "CONFLICT":
+            entries.append(make_entry(path, mode, NULL_SHA1, stage=2))
+        else:
+            entries.append(make_entry(path, mode, sha1))
+    return entries
+
+
+def _smudge_racy(stats, written):
+    """
+    Zero the size of every entry modified no earlier than `written`, the
+    (seconds, nanoseconds) mtime of the new index. Returns True if any was.
+    """
+    smudged = False
+    for base in range(0, len(stats), STAT_FIELDS):
+        if stats[base + 9] and (stats[base + 2], stats[base + 3]) >= written:
+            stats[base + 9] = 0
+            smudged = True
+    return smudged
+
+
+class IndexLockedError(OSError):
+    """
+    Raised when the index lock file already exists.
+    """
+
+
+class Index:
+    """
+    The staging area, held in memory.
+
+    Entries are kept sorted by (path, stage) in parallel compact arrays (paths,
+    stages, raw SHA-1s and the on-disk stat words), so a path appears at most
+    once per stage and lookups, upserts and removals are binary searches.
+
+    The index also carries a cache-tree: for each directory, the number of
+    entries under it and the OID of the tree last written for them. Changing
+    an entry invalidates its directory and all of its parents, so writing a
+    tree only rebuilds the directories that changed.
+
+    Changes are saved atomically: the new index is written to `index.lock`,
+    created exclusively so two processes cannot update the index at the same
+    time, then renamed over the index. Use Index.locked() for a
+    read-modify-write that holds the lock from the read to the save.
+    """
+
+    def __init__(self, path=".mygit/index", entries=()):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.changed = False
+        self._lock_fd = None
+        self._paths = []
+        self._stages = bytearray()
+        self._sha1s = bytearray()
+        # ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size per entry
+        self._stats = array("L")
+        # {directory path ('' for the root): (entry count, tree SHA-1)}
+        self._cache_tree = {}
+        for entry in entries:
+            self.add(entry)
+        self.changed = False
+
+    @classmethod
+    def read(cls, index_path=".mygit/index"):
+        """
+        Read the index, in the binary format or the legacy text format.
+        Args:
+            index_path (str): Path to the index file.
+        Returns:
+            Index: The index. Empty if there is no index file.
+        Raises:
+            ValueError: If a binary index is corrupted.
+        """
+        index = cls(index_path)
+        index._load()
+        return index
+
+    @classmethod
+    @contextmanager
+    def locked(cls, index_path=".mygit/index", optional=False):
+        """
+        Lock the index, read it and save it on exit if it was changed.
+        The lock is released without saving if the block raises.
+        Args:
+            index_path (str): Path to the index file.
+            optional (bool): If the index is already locked, yield an index
+                read without the lock whose changes are discarded, instead of
+                raising. For opportunistic updates such as refreshing stat data.
+        Raises:
+            IndexLockedError: If another process holds the lock.
+        """
+        index = cls(index_path)
+        try:
+            index._acquire()
+        except IndexLockedError:
+            if not optional:
+                raise
+        if index._lock_fd is None:
+            index._load()
+            yield index
+            return
+        try:
+            index._load()
+            yield index
+            if index.changed:
+                index._commit()
+        finally:
+            index._release()
+
+    def _acquire(self):
+        directory = os.path.dirname(self.lock_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        try:
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            raise IndexLockedError(
+                f"Unable to create '{self.lock_path}': another mygit process seems to be running. "
+                "If it crashed, remove the file manually."
+            ) from None
+
+    def _release(self):
+        if self._lock_fd is None:
+            return
+        os.close(self._lock_fd)
+        self._lock_fd = None
+        if os.path.exists(self.lock_path):
+            os.remove(self.lock_path)
+
+    def _commit(self):
+        """
+        Write the index into the held lock file and rename it over the index.
+        """
+        with os.fdopen(self._lock_fd, "wb", closefd=False) as f:
+            f.seek(0)
+            f.truncate()
+            f.write(self._serialize())
+            f.flush()
+            st = os.fstat(f.fileno())
+            written = (_u32(st.st_mtime_ns // 1_000_000_000), st.st_mtime_ns % 1_000_000_000)
+            # Entries modified in the same tick as this write are racy: smudge
+            # them so the next status rehashes them instead of trusting stat
+            if _smudge_racy(self._stats, written):
+                f.seek(0)
+                f.truncate()
+                f.write(self._serialize())
+        os.close(self._lock_fd)
+        self._lock_fd = None
+        os.replace(self.lock_path, self.path)
+        self.changed = False
+
+    def save(self):
+        """
+        Write the index atomically, taking the lock if it is not already held.
+        Raises:
+            IndexLockedError: If another process holds the lock.
+        """
+        if self._lock_fd is not None:
+            self._commit()
+            return
+        self._acquire()
+        try:
+            self._commit()
+        finally:
+            self._release()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        if data[:4] == INDEX_SIGNATURE:
+            self._load_binary(data)
+        else:
+            # Legacy indexes may be unsorted and hold duplicates: the last
+            # line for a path wins, as it was the most recently added
+            for entry in _parse_text_index(data):
+                self.add(entry)
+            self.changed = False
+
+    def _load_binary(self, data):
+        if len(data) < 32 or hashlib.sha1(data[:-20]).digest() != data[-20:]:
+            raise ValueError("index checksum mismatch")
+        version, count = struct.unpack(">II", data[4:12])
+        if version != INDEX_VERSION:
+            raise ValueError(f"unsupported index version {version}")
+        pos = 12
+        for _ in range(count):
+            fields = struct.unpack_from(ENTRY_FORMAT, data, pos)
+            flags = fields[11]
+            name_len = flags & NAME_MASK
+            name_start = pos + ENTRY_HEADER_SIZE
+            if name_len == NAME_MASK:
+                name_len = data.index(b"\0", name_start) - name_start
+            self._paths.append(data[name_start:name_start + name_len].decode())
+            self._stages.append((flags >> STAGE_SHIFT) & 0x3)
+            self._sha1s += fields[10]
+            self._stats.extend(fields[:STAT_FIELDS])
+            # Entries are NUL-padded to a multiple of 8 bytes
+            entry_len = ENTRY_HEADER_SIZE + name_len
+            pos += (entry_len + 8) & ~7
+        self._load_extensions(data, pos, len(data) - 20)
+        if any(self._key(i) >= self._key(i + 1) for i in range(len(self._paths) - 1)):
+            entries = list(self)
+            self.clear()
+            for entry in entries:
+                self.add(entry)
+            self.changed = False
+
+    def _load_extensions(self, data, pos, end):
+        while pos + 8 <= end:
+            signature = data[pos:pos + 4]
+            size, = struct.unpack(">I", data[pos + 4:pos + 8])
+            payload = data[pos + 8:pos + 8 + size]
+            pos += 8 + size
+            if signature == TREE_EXTENSION:
+                self._load_cache_tree(payload)
+            elif not b"A" <= signature[:1] <= b"Z":
+                # Like Git, extensions starting with an uppercase letter are optional
+                raise ValueError(f"unsupported index extension {signature!r}")
+
+    def _load_cache_tree(self, payload):
+        # Records: <directory path>\0<entry count>\n<20-byte tree SHA-1>
+        pos = 0
+        while pos < len(payload):
+            nul = payload.index(b"\0", pos)
+            newline = payload.index(b"\n", nul)
+            directory = payload[pos:nul].decode()
+            count = int(payload[nul + 1:newline])
+            sha1 = payload[newline + 1:newline + 21].hex()
+            self._cache_tree[directory] = (count, sha1)
+            pos = newline + 21
+
+    def _serialize(self):
+        data = bytearray(INDEX_SIGNATURE + struct.pack(">II", INDEX_VERSION, len(self._paths)))
+        pack = struct.Struct(ENTRY_FORMAT).pack
+        stats = self._stats
+        for i, path in enumerate(self._paths):
+            name = path.encode()
+            flags = (self._stages[i] << STAGE_SHIFT) | min(len(name), NAME_MASK)
+            base = i * STAT_FIELDS
+            data += pack(*stats[base:base + STAT_FIELDS], bytes(self._sha1s[i * 20:i * 20 + 20]), flags)
+            entry_len = ENTRY_HEADER_SIZE + len(name)
+            data += name + b"\0" * (((entry_len + 8) & ~7) - entry_len)
+        if self._cache_tree:
+            payload = b"".join(
+                directory.encode() + b"\0" + str(count).encode() + b"\n" + bytes.fromhex(sha1)
+                for directory, (count, sha1) in sorted(self._cache_tree.items())
+            )
+            data += TREE_EXTENSION + struct.pack(">I", len(payload)) + payload
+        data += hashlib.sha1(data).digest()
+        return bytes(data)
+
+    def _key(self, i):
+        return self._paths[i], self._stages[i]
+
+    def _find(self, path, stage=0):
+        """
+        Return (position, found) of (path, stage) in the sorted arrays.
+        """
+        i = bisect_left(self._paths, path)
+        n = len(self._paths)
+        while i < n and self._paths[i] == path and self._stages[i] < stage:
+            i += 1
+        return i, i < n and self._paths[i] == path and self._stages[i] == stage
+
+    def _entry(self, i):
+        base = i * STAT_FIELDS
+        (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino,
+         mode, uid, gid, size) = self._stats[base:base + STAT_FIELDS]
+        return IndexEntry(
+            self._paths[i], f"{mode:o}", self._sha1s[i * 20:i * 20 + 20].hex(), self._stages[i],
+            ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, uid, gid, size,
+        )
+
+    def _delete(self, start, stop):
+        del self._paths[start:stop]
+        del self._stages[start:stop]
+        del self._sha1s[start * 20:stop * 20]
+        del self._stats[start * STAT_FIELDS:stop * STAT_FIELDS]
+
+    def _span(self, path):
+        start = bisect_left(self._paths, path)
+        stop = bisect_right(self._paths, path, lo=start)
+        return start, stop
+
+    def _invalidate(self, path):
+        """
+        Drop the cached trees of every directory containing a path.
+        """
+        while path:
+            path = os.path.dirname(path)
+            self._cache_tree.pop(path, None)
+
+    def add(self, entry):
+        """
+        Insert an entry, replacing the one with the same path and stage.
+        Like in Git, staging a path at stage 0 resolves its conflict (stages
+        1-3 are dropped) and recording a conflict stage drops its stage 0.
+        Args:
+            entry (IndexEntry): The entry.
+        """
+        start, stop = self._span(entry.path)
+        # Refreshing the stat data of an entry keeps the cached trees valid
+        if not (stop - start == 1 and self._stages[start] == entry.stage
+                and self._sha1s[start * 20:start * 20 + 20].hex() == entry.sha1
+                and f"{self._stats[start * STAT_FIELDS + 6]:o}" == entry.mode):
+            self._invalidate(entry.path)
+        for i in range(stop - 1, start - 1, -1):
+            stage = self._stages[i]
+            if stage == entry.stage or (stage == 0) != (entry.stage == 0):
+                self._delete(i, i + 1)
+        i, _ = self._find(entry.path, entry.stage)
+        self._paths.insert(i, entry.path)
+        self._stages[i:i] = bytes([entry.stage])
+        self._sha1s[i * 20:i * 20] = bytes.fromhex(entry.sha1)
+        self._stats[i * STAT_FIELDS:i * STAT_FIELDS] = array("L", (
+            entry.ctime_s, entry.ctime_ns, entry.mtime_s, entry.mtime_ns, entry.dev, entry.ino,
+            int(entry.mode, 8), entry.uid, entry.gid, entry.size,
+        ))
+        self.changed = True
+
+    def remove(self, path):
+        """
+        Remove every stage of a path.
+        Returns:
+            bool: True if the path was in the index.
+        """
+        start, stop = self._span(path)
+        if start == stop:
+            return False
+        self._delete(start, stop)
+        self._invalidate(path)
+        self.changed = True
+        return True
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        if self._paths or self._cache_tree:
+            self.changed = True
+        self._delete(0, len(self._paths))
+        self._cache_tree.clear()
+
+    def get(self, path, stage=0):
+        """
+        Return the entry for a path and stage, or None.
+        """
+        i, found = self._find(path, stage)
+        return self._entry(i) if found else None
+
+    def paths(self):
+        """
+        Return the distinct paths in order; a conflicted path is listed once.
+        """
+        return sorted(set(self._paths))
+
+    def sorted_paths(self):
+        """
+        Return the path of every entry, in index order. The list is the
+        index's own storage and must not be modified.
+        """
+        return self._paths
+
+    def entry_at(self, position):
+        """
+        Return the entry at a position of the sorted index.
+        """
+        return self._entry(position)
+
+    def cached_tree(self, directory):
+        """
+        Return the (entry count, tree SHA-1) recorded for a directory ('' for
+        the root), or None if it was invalidated.
+        """
+        return self._cache_tree.get(directory)
+
+    def record_tree(self, directory, count, sha1):
+        """
+        Record the tree written for a directory and the number of entries it covers.
+        """
+        if self._cache_tree.get(directory) != (count, sha1):
+            self._cache_tree[directory] = (count, sha1)
+            self.changed = True
+
+    def unmerged_paths(self):
+        """
+        Return the sorted paths that have conflict stages.
+        """
+        return sorted({path for path, stage in zip(self._paths, self._stages) if stage})
+
+    def __contains__(self, path):
+        start, stop = self._span(path)
+        return start != stop
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __iter__(self):
+        for i in range(len(self._paths)):
+            yield self._entry(i)
+
+
+def read_index(index_path=".mygit/index"):
+    """
+    Read the index, in the binary format or the legacy text format.
+    Args:
+        index_path (str): Path to the index file.
+    Returns:
+        list: IndexEntry objects sorted by (path, stage). Empty if there is no index.
+    Raises:
+        ValueError: If a binary index is corrupted.
+    """
+    return list(Index.read(index_path))
+
+
+def write_index(entries, index_path=".mygit/index"):
+    """
+    Replace the index with the given entries, atomically (see Index.save).
+    Args:
+        entries (iterable): IndexEntry objects.
+        index_path (str): Path to the index file.
+    """
+    Index(index_path, entries).save()
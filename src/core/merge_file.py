@@ -0,0 +1,283 @@
+from collections import namedtuple
+
+# Git's heuristic: content with a NUL byte in its first 8000 bytes is binary
+BINARY_CHECK_SIZE = 8000
+# Edits searched from each end of a diff before settling for a split point
+# that is not optimal (like git's xdiff cost cap)
+MAX_DIFF_COST = 256
+
+# Result of a content merge: the merged bytes and the number of conflicting hunks
+MergeResult = namedtuple("MergeResult", ["content", "conflicts"])
+
+
+def is_binary(data):
+    """
+    Return True if some content looks binary (has a NUL byte near its start).
+    """
+    return b"\0" in data[:BINARY_CHECK_SIZE]
+
+
+def _bisect(a, b):
+    """
+    Find where the shortest edit path between two sequences crosses its
+    middle, searching from both ends at once (Myers' linear space
+    refinement). The sequences must be non-empty and differ in their first
+    and last items.
+    Past MAX_DIFF_COST edits from each end, the search stops and splits
+    at the point the forward search got furthest to instead (like git's
+    xdiff): the diff may then be a little longer than the shortest one.
+    Returns:
+        tuple or None: (i, j) splitting the problem in two smaller ones,
+        None if the sequences have nothing in common.
+    """
+    n, m = len(a), len(b)
+    max_d = (n + m + 1) // 2
+    size = 2 * max_d + 2
+    # Furthest x reached on each diagonal, forward from (0, 0) and backward
+    # from (n, m) (the backward one counted from the end), -1 if not yet
+    forward = [-1] * size
+    backward = [-1] * size
+    forward[max_d + 1] = backward[max_d + 1] = 0
+    delta = n - m
+    # With an odd delta the paths can only meet after a forward step
+    front = delta % 2 != 0
+    # Diagonals trimmed at each end once they left the grid
+    f_start = f_end = b_start = b_end = 0
+    for d in range(min(max_d, MAX_DIFF_COST)):
+        for k in range(-d + f_start, d + 1 - f_end, 2):
+            i = max_d + k
+            if k == -d or (k != d and forward[i - 1] < forward[i + 1]):
+                x = forward[i + 1]
+            else:
+                x = forward[i - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            forward[i] = x
+            if x > n:
+                f_end += 2
+            elif y > m:
+                f_start += 2
+            elif front:
+                j = max_d + delta - k
+                if 0 <= j < size and backward[j] != -1 and x >= n - backward[j]:
+                    return x, y
+        for k in range(-d + b_start, d + 1 - b_end, 2):
+            i = max_d + k
+            if k == -d or (k != d and backward[i - 1] < backward[i + 1]):
+                x = backward[i + 1]
+            else:
+                x = backward[i - 1] + 1
+            y = x - k
+            while x < n and y < m and a[n - x - 1] == b[m - y - 1]:
+                x += 1
+                y += 1
+            backward[i] = x
+            if x > n:
+                b_end += 2
+            elif y > m:
+                b_start += 2
+            elif not front:
+                j = max_d + delta - k
+                if 0 <= j < size and forward[j] != -1 and forward[j] >= n - x:
+                    return forward[j], forward[j] - (j - max_d)
+    if max_d <= MAX_DIFF_COST:
+        return None
+    # Too costly: split at the furthest point reached from (0, 0)
+    d = MAX_DIFF_COST - 1
+    best = None
+    for k in range(-d + f_start, d + 1 - f_end, 2):
+        x = forward[max_d + k]
+        y = x - k
+        if 0 <= x <= n and 0 <= y <= m and 0 < x + y < n + m and (best is None or x + y > sum(best)):
+            best = (x, y)
+    return best
+
+
+def _myers(a, b):
+    """
+    Find a longest common subsequence of two sequences with Myers' O(ND)
+    algorithm in linear space: the middle of the edit path is found, then
+    each half is solved the same way.
+    Items the other sequence does not have can never match and are dropped
+    first, so a rewritten block costs next to nothing, and the search
+    stops early on parts needing too many edits (see MAX_DIFF_COST).
+    Returns:
+        list: Matched (i, j) index pairs, in order.
+    """
+    a_items, b_items = set(a), set(b)
+    a_index = [i for i, item in enumerate(a) if item in b_items]
+    b_index = [j for j, item in enumerate(b) if item in a_items]
+    a = [a[i] for i in a_index]
+    b = [b[j] for j in b_index]
+    matches = []
+    ranges = [(0, len(a), 0, len(b))]
+    while ranges:
+        a_lo, a_hi, b_lo, b_hi = ranges.pop()
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            matches.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            matches.append((a_hi, b_hi))
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+        split = _bisect(a[a_lo:a_hi], b[b_lo:b_hi])
+        if split is not None:
+            x, y = split
+            ranges.append((a_lo, a_lo + x, b_lo, b_lo + y))
+            ranges.append((a_lo + x, a_hi, b_lo + y, b_hi))
+    matches.sort()
+    return [(a_index[i], b_index[j]) for i, j in matches]
+
+
+def matching_blocks(a, b):
+    """
+    Return the blocks of lines two sequences have in common.
+    Common leading and trailing lines are matched before running the diff.
+    Args:
+        a (list): Sequence of hashable items (line ids).
+        b (list): Sequence of hashable items.
+    Returns:
+        list: (i, j, length) blocks, increasing in both sequences.
+    """
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    pairs = [(i, i) for i in range(prefix)]
+    pairs += [(i + prefix, j + prefix) for i, j in _myers(a[prefix:n - suffix], b[prefix:m - suffix])]
+    pairs += [(n - suffix + i, m - suffix + i) for i in range(suffix)]
+    blocks = []
+    for i, j in pairs:
+        if blocks and blocks[-1][0] + blocks[-1][2] == i and blocks[-1][1] + blocks[-1][2] == j:
+            blocks[-1][2] += 1
+        else:
+            blocks.append([i, j, 1])
+    return [tuple(block) for block in blocks]
+
+
+def _sync_regions(base, ours, theirs):
+    """
+    Return the regions where the three versions agree, as
+    (base start, base end, ours start, ours end, theirs start, theirs end),
+    ending with an empty region at the end of every version.
+    """
+    ours_blocks = matching_blocks(base, ours)
+    theirs_blocks = matching_blocks(base, theirs)
+    regions = []
+    i = j = 0
+    while i < len(ours_blocks) and j < len(theirs_blocks):
+        o_base, o_start, o_len = ours_blocks[i]
+        t_base, t_start, t_len = theirs_blocks[j]
+        start = max(o_base, t_base)
+        end = min(o_base + o_len, t_base + t_len)
+        if start < end:
+            o_sub = o_start + start - o_base
+            t_sub = t_start + start - t_base
+            regions.append((start, end, o_sub, o_sub + end - start, t_sub, t_sub + end - start))
+        if o_base + o_len < t_base + t_len:
+            i += 1
+        else:
+            j += 1
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+
+def merge_lines(base, ours, theirs):
+    """
+    Three-way merge of line sequences (diff3).
+    Between the regions where the three versions agree, a hunk changed on
+    one side only takes that side, a hunk changed the same way on both
+    sides is taken once, and anything else is a conflict.
+    Args:
+        base (list): Lines of the common ancestor.
+        ours (list): Lines of the current side.
+        theirs (list): Lines of the merged side.
+    Yields:
+        tuple: ('lines', lines) for merged lines, or
+        ('conflict', ours lines, theirs lines).
+    """
+    # Compare small ints instead of lines
+    ids = {}
+    base_ids, ours_ids, theirs_ids = ([ids.setdefault(line, len(ids)) for line in lines]
+                                      for lines in (base, ours, theirs))
+    z = o = t = 0
+    for z_start, z_end, o_start, o_end, t_start, t_end in _sync_regions(base_ids, ours_ids, theirs_ids):
+        if o_start > o or t_start > t:
+            ours_hunk, theirs_hunk = ours_ids[o:o_start], theirs_ids[t:t_start]
+            base_hunk = base_ids[z:z_start]
+            if ours_hunk == theirs_hunk or theirs_hunk == base_hunk:
+                yield "lines", ours[o:o_start]
+            elif ours_hunk == base_hunk:
+                yield "lines", theirs[t:t_start]
+            else:
+                # Keep the lines both sides agree on out of the conflict
+                head = 0
+                while head < min(len(ours_hunk), len(theirs_hunk)) and ours_hunk[head] == theirs_hunk[head]:
+                    head += 1
+                tail = 0
+                while (tail < min(len(ours_hunk), len(theirs_hunk)) - head
+                       and ours_hunk[-1 - tail] == theirs_hunk[-1 - tail]):
+                    tail += 1
+                if head:
+                    yield "lines", ours[o:o + head]
+                yield "conflict", ours[o + head:o_start - tail], theirs[t + head:t_start - tail]
+                if tail:
+                    yield "lines", ours[o_start - tail:o_start]
+        if z_end > z_start:
+            yield "lines", base[z_start:z_end]
+        z, o, t = z_end, o_end, t_end
+
+
+def _with_newline(lines):
+    if lines and not lines[-1].endswith(b"\n"):
+        return lines[:-1] + [lines[-1] + b"\n"]
+    return lines
+
+
+def merge_file(base, ours, theirs, ours_label="HEAD", theirs_label="MERGE_HEAD"):
+    """
+    Merge two versions of a file against their common ancestor.
+
+    Text is merged line by line: changes to different parts of the file
+    merge cleanly, and each conflicting hunk is written between
+    '<<<<<<< ours', '=======' and '>>>>>>> theirs' markers. Binary content
+    is never merged: unless one side kept the base version, the result is
+    'ours', byte for byte, with one conflict.
+    Args:
+        base (bytes): Content of the common ancestor (b'' if there is none).
+        ours (bytes): Content of the current side.
+        theirs (bytes): Content of the merged side.
+        ours_label (str): Name written after '<<<<<<<'.
+        theirs_label (str): Name written after '>>>>>>>'.
+    Returns:
+        MergeResult: The merged content and the number of conflicts.
+    """
+    if ours == theirs or theirs == base:
+        return MergeResult(ours, 0)
+    if ours == base:
+        return MergeResult(theirs, 0)
+    if is_binary(base) or is_binary(ours) or is_binary(theirs):
+        return MergeResult(ours, 1)
+    out = []
+    conflicts = 0
+    for chunk in merge_lines(base.splitlines(keepends=True), ours.splitlines(keepends=True),
+                             theirs.splitlines(keepends=True)):
+        if chunk[0] == "lines":
+            out.extend(chunk[1])
+            continue
+        conflicts += 1
+        out[-1:] = _with_newline(out[-1:])
+        out.append(f"<<<<<<< {ours_label}\n".encode())
+        out.extend(_with_newline(chunk[1]))
+        out.append(b"=======\n")
+        out.extend(_with_newline(chunk[2]))
+        out.append(f">>>>>>> {theirs_label}\n".encode())
+    return MergeResult(b"".join(out), conflicts)
@@ -0,0 +1,187 @@
+from src.core.commit import parse_commit
+from src.core.tree import parse_tree
+from src.core.object_cache import ObjectCache
+
+# Byte budget of the parsed-object cache (charged by raw object size)
+DEFAULT_PARSED_CACHE_SIZE = 16 * 1024 * 1024
+
+
+class GitObject:
+    """
+    An object of the database: its OID and raw content (without header).
+    Subclasses parse their content on first access to a field, once.
+    """
+
+    __slots__ = ("oid", "raw")
+    type = None
+
+    def __init__(self, oid, raw):
+        self.oid = oid
+        self.raw = raw
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.oid}>"
+
+
+class Blob(GitObject):
+    """
+    File content.
+    """
+
+    __slots__ = ()
+    type = "blob"
+
+    @property
+    def data(self):
+        return self.raw
+
+
+class Tree(GitObject):
+    """
+    Directory listing: (mode, name, sha1) entries in tree order.
+    """
+
+    __slots__ = ("_entries", "_names")
+    type = "tree"
+
+    def __init__(self, oid, raw):
+        super().__init__(oid, raw)
+        self._entries = None
+        self._names = None
+
+    @property
+    def entries(self):
+        """
+        The (mode, name, sha1) tuples of the tree. The list is shared by
+        every user of the cached object and must not be modified.
+        """
+        if self._entries is None:
+            self._entries = parse_tree(self.raw)
+        return self._entries
+
+    def get(self, name):
+        """
+        Return the (mode, sha1) of an entry, or None if the tree has no such name.
+        """
+        if self._names is None:
+            self._names = {name: (mode, sha1) for mode, name, sha1 in self.entries}
+        return self._names.get(name)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+
+class Commit(GitObject):
+    """
+    Commit: tree, parents, author, committer, timestamp and message.
+    Commits in the old 'message:'/'timestamp:' format have no author or
+    committer (None).
+    """
+
+    __slots__ = ("_fields",)
+    type = "commit"
+
+    def __init__(self, oid, raw):
+        super().__init__(oid, raw)
+        self._fields = None
+
+    @property
+    def fields(self):
+        """
+        The parsed headers, as returned by parse_commit.
+        """
+        if self._fields is None:
+            self._fields = parse_commit(self.raw)
+        return self._fields
+
+    @property
+    def tree(self):
+        return self.fields.get("tree")
+
+    @property
+    def parents(self):
+        return self.fields["parents"]
+
+    @property
+    def author(self):
+        return self.fields.get("author")
+
+    @property
+    def committer(self):
+        return self.fields.get("committer")
+
+    @property
+    def timestamp(self):
+        return self.fields.get("timestamp", 0)
+
+    @property
+    def message(self):
+        return self.fields["message"]
+
+
+OBJECT_CLASSES = {cls.type: cls for cls in (Blob, Tree, Commit)}
+
+# Parsed trees and commits, shared by every walk in the process. Blobs are
+# not kept: they have nothing to parse and read_object already caches them.
+parsed_cache = ObjectCache(DEFAULT_PARSED_CACHE_SIZE)
+
+
+def get_object(oid, git_dir=".mygit"):
+    """
+    Return an object of the database as a Blob, Tree or Commit.
+    Trees and commits come from the parsed-object cache when possible, so
+    repeated lookups do not decode their content again.
+    Args:
+        oid (str): Object ID (SHA-1).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        GitObject or None: None if the object is missing, corrupted or of
+        an unknown type.
+    """
+    cached = parsed_cache.get(git_dir, oid)
+    if cached is not None:
+        return cached[1]
+    # Imported here: plumbing.cat_file depends on src.core
+    from src.plumbing.cat_file import read_object
+    obj_type, raw = read_object(oid, git_dir)
+    cls = OBJECT_CLASSES.get(obj_type)
+    if cls is None:
+        return None
+    obj = cls(oid, raw)
+    if cls is not Blob:
+        parsed_cache.put(git_dir, oid, obj_type, obj, size=len(raw))
+    return obj
+
+
+def _get_typed(oid, git_dir, cls):
+    obj = get_object(oid, git_dir)
+    if not isinstance(obj, cls):
+        raise ValueError(f"Object {oid} is not a {cls.type}")
+    return obj
+
+
+def get_commit(oid, git_dir=".mygit"):
+    """
+    Return a commit.
+    Raises:
+        ValueError: If the object is missing or not a commit.
+    """
+    return _get_typed(oid, git_dir, Commit)
+
+
+def get_tree(oid, git_dir=".mygit"):
+    """
+    Return a tree.
+    Raises:
+        ValueError: If the object is missing or not a tree.
+    """
+    return _get_typed(oid, git_dir, Tree)
+
+
+def get_blob(oid, git_dir=".mygit"):
+    """
+    Return a blob.
+    Raises:
+        ValueError: If the object is missing or not a blob.
+    """
+    return _get_typed(oid, git_dir, Blob)
@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Default byte budget, overridable with MYGIT_OBJECT_CACHE_SIZE (in bytes)
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+
+class ObjectCache:
+    """
+    LRU cache of decompressed objects, bounded by the total size of their content.
+
+    Entries are keyed by (repository, OID). Objects are immutable, so an entry
+    never goes stale; only the byte budget decides what is kept. The counters
+    let long-running processes check whether the budget fits their workload.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, git_dir, oid):
+        """
+        Look up an object.
+        Args:
+            git_dir (str): Path to the .mygit directory.
+            oid (str): Object ID (SHA-1).
+        Returns:
+            tuple or None: (object type, content) if cached.
+        """
+        key = (os.path.abspath(git_dir), oid)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def peek(self, git_dir, oid):
+        """
+        Look up an object without counting a hit or a miss, nor making it
+        more recently used: for callers that only need what is at hand.
+        Returns:
+            tuple or None: (object type, content) if cached.
+        """
+        with self._lock:
+            return self._entries.get((os.path.abspath(git_dir), oid))
+
+    def put(self, git_dir, oid, obj_type, content, size=None):
+        """
+        Store an object, evicting the least recently used ones past the budget.
+        Objects larger than the whole budget are not cached.
+        Args:
+            size (int, optional): Size charged to the budget, for content
+                that is not bytes (default: len(content)).
+        """
+        size = len(content) if size is None else size
+        if size > self.max_bytes:
+            return
+        key = (os.path.abspath(git_dir), oid)
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = (obj_type, content)
+            self._sizes[key] = size
+            self.size += size
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            self.size -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def set_limit(self, max_bytes):
+        """
+        Change the byte budget, evicting entries if it shrinks.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Return the cache counters.
+        Returns:
+            dict: entries, size, max_bytes, hits, misses, evictions.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _configured_size():
+    value = os.environ.get("MYGIT_OBJECT_CACHE_SIZE")
+    if value is None:
+        return DEFAULT_CACHE_SIZE
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return DEFAULT_CACHE_SIZE
+
+
+# Shared by every caller of read_object in the process
+object_cache = ObjectCache(_configured_size())
@@ -0,0 +1,194 @@
+import os
+import hashlib
+import zlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from src.core.pack import has_packed_object
+
+# Files are compressed in slices of this size when written as blobs
+CHUNK_SIZE = 1024 * 1024
+
+# Above this many objects, a batch flush syncs the whole filesystem at once
+# instead of fsyncing every object file
+BATCH_SYNC_THRESHOLD = 64
+
+# Objects written inside batch_writes() whose sync is deferred to the end of the batch
+_batch_state = threading.local()
+
+
+def get_object_path(oid, git_dir):
+    """
+    Get the path to the object file in the Git directory.
+    Args:
+        oid (str): Object ID (SHA-1).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: Path to the object file.
+    """
+    return os.path.join(git_dir, "objects", oid[:2], oid[2:])
+
+
+def object_exists(oid, git_dir):
+    """
+    Check whether an object is stored loose or in a pack.
+    Args:
+        oid (str): Object ID (SHA-1).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        bool: True if the object exists.
+    """
+    return os.path.exists(get_object_path(oid, git_dir)) or has_packed_object(oid, git_dir)
+
+
+def _current_batch():
+    return getattr(_batch_state, "batch", None)
+
+
+@contextmanager
+def batch_writes():
+    """
+    Defer the durability work of object writes to a single flush.
+
+    Outside a batch every object is fsynced and renamed, then its directory is
+    fsynced. Inside a batch, objects are still written to a temporary file and
+    renamed into place atomically, but the syncs are skipped and done when
+    the outermost batch exits: the object files (or the whole filesystem in
+    one call for large batches), then each touched objects/xx directory once.
+    Nested batches join the outer one.
+    """
+    if _current_batch() is not None:
+        yield
+        return
+    batch = {"files": [], "dirs": set()}
+    _batch_state.batch = batch
+    try:
+        yield
+    finally:
+        _batch_state.batch = None
+        _flush(batch)
+
+
+def _flush(batch):
+    if not batch["files"]:
+        return
+    if len(batch["files"]) > BATCH_SYNC_THRESHOLD and hasattr(os, "sync"):
+        os.sync()
+    else:
+        for path in batch["files"]:
+            _fsync_path(path, os.O_RDONLY)
+    for directory in batch["dirs"]:
+        _fsync_dir(directory)
+
+
+def _fsync_path(path, flags):
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(directory):
+    # Directories cannot be opened (nor fsynced) on every platform
+    if hasattr(os, "O_DIRECTORY"):
+        _fsync_path(directory, os.O_RDONLY | os.O_DIRECTORY)
+
+
+def _open_temp(git_dir):
+    objects_dir = os.path.join(git_dir, "objects")
+    os.makedirs(objects_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="tmp_obj_", dir=objects_dir)
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def _install(out, tmp_path, sha1, git_dir):
+    """
+    Make a fully written temporary object durable and move it to its final path.
+    """
+    batch = _current_batch()
+    out.flush()
+    if batch is None:
+        os.fsync(out.fileno())
+    out.close()
+    os.chmod(tmp_path, 0o444)
+    obj_path = get_object_path(sha1, git_dir)
+    obj_dir = os.path.dirname(obj_path)
+    os.makedirs(obj_dir, exist_ok=True)
+    os.replace(tmp_path, obj_path)
+    if batch is None:
+        _fsync_dir(obj_dir)
+    else:
+        batch["files"].append(obj_path)
+        batch["dirs"].add(obj_dir)
+
+
+def write_object(data, obj_type, git_dir=".mygit"):
+    """
+    Write an object to the database unless it already exists.
+    Args:
+        data (bytes): Object content.
+        obj_type (str): Object type ('blob', 'tree', 'commit').
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: The SHA-1 of the object.
+    """
+    full_data = f"{obj_type} {len(data)}\0".encode() + data
+    sha1 = hashlib.sha1(full_data).hexdigest()
+    if object_exists(sha1, git_dir):
+        return sha1
+    out, tmp_path = _open_temp(git_dir)
+    try:
+        out.write(zlib.compress(full_data))
+        _install(out, tmp_path, sha1, git_dir)
+    finally:
+        if not out.closed:
+            out.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return sha1
+
+
+def write_blob_from_file(file_path, sha1, size, git_dir=".mygit"):
+    """
+    Stream a file into the database as a blob unless it already exists.
+    The caller has already hashed the file; the hash is computed again while
+    compressing so a file modified in between is rejected rather than stored
+    under the wrong name.
+    Args:
+        file_path (str): Path to the file.
+        sha1 (str): Blob SHA-1 of the file.
+        size (int): Size of the file when it was hashed.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        bool: True if the object was written, False if it already existed.
+    Raises:
+        OSError: If the file changed since it was hashed.
+    """
+    if object_exists(sha1, git_dir):
+        return False
+    header = f"blob {size}\0".encode()
+    check = hashlib.sha1(header)
+    compressor = zlib.compressobj()
+    out, tmp_path = _open_temp(git_dir)
+    try:
+        out.write(compressor.compress(header))
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                check.update(chunk)
+                out.write(compressor.compress(chunk))
+        out.write(compressor.flush())
+        if check.hexdigest() != sha1:
+            raise OSError(f"'{file_path}' changed while it was being written")
+        _install(out, tmp_path, sha1, git_dir)
+    finally:
+        if not out.closed:
+            out.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
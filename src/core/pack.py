@@ -0,0 +1,586 @@
+import os
+import sys
+import mmap
+import struct
+import hashlib
+import zlib
+import tempfile
+from collections import OrderedDict
+from src.core.delta import apply_delta, delta_sizes
+
+PACK_SIGNATURE = b"PACK"
+PACK_VERSION = 2
+IDX_SIGNATURE = b"\377tOc"
+IDX_VERSION = 2
+
+OBJ_COMMIT = 1
+OBJ_TREE = 2
+OBJ_BLOB = 3
+OBJ_TAG = 4
+OBJ_OFS_DELTA = 6
+OBJ_REF_DELTA = 7
+
+TYPE_CODES = {"commit": OBJ_COMMIT, "tree": OBJ_TREE, "blob": OBJ_BLOB, "tag": OBJ_TAG}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+# Size of the slices fed to zlib when inflating an entry from the mapped pack
+READ_CHUNK = 64 * 1024
+# Byte budget of the cache of delta bases shared by all packs of the process
+DELTA_BASE_CACHE_SIZE = 32 * 1024 * 1024
+
+
+def get_pack_dir(git_dir):
+    """
+    Get the path to the directory holding the packfiles.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: Path to the objects/pack directory.
+    """
+    return os.path.join(git_dir, "objects", "pack")
+
+
+def encode_entry_header(type_code, size):
+    """
+    Encode the variable-length header of a pack entry (type and inflated size).
+    Args:
+        type_code (int): Object type code.
+        size (int): Size of the inflated entry data.
+    Returns:
+        bytes: Encoded header.
+    """
+    byte = (type_code << 4) | (size & 0x0F)
+    size >>= 4
+    out = bytearray()
+    while size:
+        out.append(byte | 0x80)
+        byte = size & 0x7F
+        size >>= 7
+    out.append(byte)
+    return bytes(out)
+
+
+def decode_entry_header(buf, pos):
+    """
+    Decode the header of a pack entry.
+    Args:
+        buf: Buffer holding the pack data (bytes or mmap).
+        pos (int): Offset of the entry.
+    Returns:
+        tuple: (type code, inflated size, offset of the entry data)
+    """
+    byte = buf[pos]
+    pos += 1
+    type_code = (byte >> 4) & 0x07
+    size = byte & 0x0F
+    shift = 4
+    while byte & 0x80:
+        byte = buf[pos]
+        pos += 1
+        size |= (byte & 0x7F) << shift
+        shift += 7
+    return type_code, size, pos
+
+
+def encode_ofs_delta_offset(distance):
+    """
+    Encode the backwards distance from a delta entry to its base entry.
+    """
+    out = [distance & 0x7F]
+    distance >>= 7
+    while distance:
+        distance -= 1
+        out.append(0x80 | (distance & 0x7F))
+        distance >>= 7
+    return bytes(reversed(out))
+
+
+def decode_ofs_delta_offset(buf, pos):
+    """
+    Decode the backwards distance of an OFS_DELTA entry.
+    Returns:
+        tuple: (distance, position after the encoded distance)
+    """
+    byte = buf[pos]
+    pos += 1
+    distance = byte & 0x7F
+    while byte & 0x80:
+        byte = buf[pos]
+        pos += 1
+        distance = ((distance + 1) << 7) | (byte & 0x7F)
+    return distance, pos
+
+
+class DeltaBaseCache:
+    """
+    LRU cache of resolved pack entries used as delta bases, bounded in bytes.
+    """
+
+    def __init__(self, max_bytes=DELTA_BASE_CACHE_SIZE):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, obj_type, content):
+        if len(content) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = (obj_type, content)
+        self.size += len(content)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+
+delta_base_cache = DeltaBaseCache()
+
+
+class PackIndex:
+    """
+    Read-only view of a version 2 `.idx` file.
+
+    The 256-entry fanout table gives, for every first byte of an OID, the
+    number of objects whose OID starts with a smaller or equal byte, so a
+    lookup only binary-searches the slice of the sorted OID table that
+    shares the first byte.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != IDX_SIGNATURE or struct.unpack(">I", self._map[4:8])[0] != IDX_VERSION:
+            raise ValueError(f"{path} is not a version {IDX_VERSION} pack index")
+        self.fanout = struct.unpack(">256I", self._map[8:8 + 256 * 4])
+        self.count = self.fanout[255]
+        self._oid_start = 8 + 256 * 4
+        self._crc_start = self._oid_start + 20 * self.count
+        self._offset_start = self._crc_start + 4 * self.count
+        self._large_start = self._offset_start + 4 * self.count
+
+    def oid_at(self, i):
+        """
+        Return the raw 20-byte OID stored at position i of the sorted table.
+        """
+        start = self._oid_start + 20 * i
+        return self._map[start:start + 20]
+
+    def offset_at(self, i):
+        """
+        Return the pack offset of the object stored at position i.
+        """
+        start = self._offset_start + 4 * i
+        offset = struct.unpack(">I", self._map[start:start + 4])[0]
+        if offset & 0x80000000:
+            start = self._large_start + 8 * (offset & 0x7FFFFFFF)
+            offset = struct.unpack(">Q", self._map[start:start + 8])[0]
+        return offset
+
+    def find(self, oid):
+        """
+        Binary-search the index for an object.
+        Args:
+            oid (bytes): Raw 20-byte object ID.
+        Returns:
+            int or None: Offset of the object in the pack, or None if absent.
+        """
+        first = oid[0]
+        lo = self.fanout[first - 1] if first else 0
+        hi = self.fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self.oid_at(mid)
+            if current < oid:
+                lo = mid + 1
+            elif current > oid:
+                hi = mid
+            else:
+                return self.offset_at(mid)
+        return None
+
+    def prefix_matches(self, prefix):
+        """
+        List the objects whose hex OID starts with a prefix: a binary search
+        for the first candidate, then a scan while the prefix matches.
+        Args:
+            prefix (str): Lowercase hex prefix (at least 2 characters).
+        Returns:
+            list: Matching hex OIDs, sorted.
+        """
+        lowest = bytes.fromhex(prefix.ljust(40, "0"))
+        first = lowest[0]
+        lo = self.fanout[first - 1] if first else 0
+        hi = self.fanout[first]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.oid_at(mid) < lowest:
+                lo = mid + 1
+            else:
+                hi = mid
+        matches = []
+        while lo < self.count:
+            oid = self.oid_at(lo).hex()
+            if not oid.startswith(prefix):
+                break
+            matches.append(oid)
+            lo += 1
+        return matches
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.oid_at(i).hex()
+
+    def close(self):
+        self._map.close()
+
+
+class Pack:
+    """
+    A packfile and its index.
+    """
+
+    def __init__(self, idx_path):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-len(".idx")] + ".pack"
+        self.index = PackIndex(idx_path)
+        with open(self.pack_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:4] != PACK_SIGNATURE:
+            raise ValueError(f"{self.pack_path} is not a packfile")
+
+    def _inflate(self, pos, size):
+        """
+        Inflate the zlib stream starting at pos, feeding it in bounded slices.
+        """
+        d = zlib.decompressobj()
+        out = []
+        while not d.eof:
+            chunk = self._map[pos:pos + READ_CHUNK]
+            if not chunk:
+                raise zlib.error("truncated pack entry")
+            out.append(d.decompress(chunk))
+            pos += len(chunk)
+        data = b"".join(out)
+        if len(data) != size:
+            raise zlib.error("pack entry size mismatch")
+        return data
+
+    def _inflate_prefix(self, pos, length):
+        """
+        Inflate only the first `length` bytes of the zlib stream starting at pos.
+        """
+        d = zlib.decompressobj()
+        data = b""
+        while len(data) < length and not d.eof:
+            if d.unconsumed_tail:
+                chunk = d.unconsumed_tail
+            else:
+                chunk = self._map[pos:pos + 256]
+                if not chunk:
+                    break
+                pos += len(chunk)
+            data += d.decompress(chunk, length - len(data))
+        return data
+
+    def read_header_at(self, offset):
+        """
+        Read the type and size of the object stored at a given offset without
+        inflating its content. For deltas, the size comes from the delta header
+        and the type from the end of the base chain.
+        Args:
+            offset (int): Offset of the entry in the pack.
+        Returns:
+            tuple: (object type, size)
+        """
+        size = None
+        while True:
+            type_code, entry_size, pos = decode_entry_header(self._map, offset)
+            if type_code in TYPE_NAMES:
+                return TYPE_NAMES[type_code], entry_size if size is None else size
+            if type_code == OBJ_OFS_DELTA:
+                distance, pos = decode_ofs_delta_offset(self._map, pos)
+                base_offset = offset - distance
+            elif type_code == OBJ_REF_DELTA:
+                base_offset = self.index.find(self._map[pos:pos + 20])
+                pos += 20
+                if base_offset is None:
+                    raise ValueError(f"delta base missing from {self.pack_path}")
+            else:
+                raise ValueError(f"unknown pack entry type {type_code} at offset {offset}")
+            if size is None:
+                # Two varints of at most 10 bytes each
+                _, size, _ = delta_sizes(self._inflate_prefix(pos, 20))
+            offset = base_offset
+
+    def read_at(self, offset):
+        """
+        Read the object stored at a given offset, resolving delta chains.
+        Args:
+            offset (int): Offset of the entry in the pack.
+        Returns:
+            tuple: (object type, content)
+        """
+        # Walk down the chain until a full object or a cached base is found
+        chain = []
+        while True:
+            cached = delta_base_cache.get((self.pack_path, offset))
+            if cached is not None:
+                obj_type, content = cached
+                break
+            type_code, size, pos = decode_entry_header(self._map, offset)
+            if type_code == OBJ_OFS_DELTA:
+                distance, pos = decode_ofs_delta_offset(self._map, pos)
+                chain.append((offset, pos, size))
+                offset -= distance
+            elif type_code == OBJ_REF_DELTA:
+                base_oid = self._map[pos:pos + 20]
+                chain.append((offset, pos + 20, size))
+                base_offset = self.index.find(base_oid)
+                if base_offset is None:
+                    raise ValueError(f"delta base {base_oid.hex()} missing from {self.pack_path}")
+                offset = base_offset
+            elif type_code in TYPE_NAMES:
+                obj_type, content = TYPE_NAMES[type_code], self._inflate(pos, size)
+                if chain:
+                    delta_base_cache.put((self.pack_path, offset), obj_type, content)
+                break
+            else:
+                raise ValueError(f"unknown pack entry type {type_code} at offset {offset}")
+        # Apply the deltas back up, caching intermediate bases for sibling deltas
+        for depth, (entry_offset, pos, size) in enumerate(reversed(chain)):
+            content = apply_delta(content, self._inflate(pos, size))
+            if depth < len(chain) - 1:
+                delta_base_cache.put((self.pack_path, entry_offset), obj_type, content)
+        return obj_type, content
+
+    def read(self, oid):
+        """
+        Read an object by OID.
+        Args:
+            oid (str): Object ID (SHA-1).
+        Returns:
+            tuple: (object type, content) or (None, None) if not in this pack.
+        """
+        offset = self.index.find(bytes.fromhex(oid))
+        if offset is None:
+            return None, None
+        return self.read_at(offset)
+
+    def __contains__(self, oid):
+        return self.index.find(bytes.fromhex(oid)) is not None
+
+    def close(self):
+        self.index.close()
+        self._map.close()
+
+
+# Packs opened by this process, keyed by pack directory; reloaded when the
+# directory changes (new pack written or old ones removed by repack)
+_pack_registry = {}
+
+
+def get_packs(git_dir):
+    """
+    Return the packs available in a repository.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: Pack objects, newest first.
+    """
+    pack_dir = get_pack_dir(git_dir)
+    key = os.path.abspath(pack_dir)
+    try:
+        mtime = os.stat(pack_dir).st_mtime_ns
+    except FileNotFoundError:
+        _pack_registry.pop(key, None)
+        return []
+    cached = _pack_registry.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    packs = []
+    names = [n for n in os.listdir(pack_dir) if n.startswith("pack-") and n.endswith(".idx")]
+    names.sort(key=lambda n: os.stat(os.path.join(pack_dir, n)).st_mtime_ns, reverse=True)
+    for name in names:
+        try:
+            packs.append(Pack(os.path.join(pack_dir, name)))
+        except (OSError, ValueError):
+            continue
+    _pack_registry[key] = (mtime, packs)
+    return packs
+
+
+def read_packed_object(oid, git_dir):
+    """
+    Read an object from the packs of a repository.
+    Args:
+        oid (str): Object ID (SHA-1).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple: (object type, content) or (None, None) if not packed.
+    """
+    if len(oid) != 40:
+        return None, None
+    try:
+        raw = bytes.fromhex(oid)
+    except ValueError:
+        return None, None
+    for pack in get_packs(git_dir):
+        offset = pack.index.find(raw)
+        if offset is not None:
+            return pack.read_at(offset)
+    return None, None
+
+
+def read_packed_object_header(oid, git_dir):
+    """
+    Read the type and size of a packed object without inflating its content.
+    Args:
+        oid (str): Object ID (SHA-1).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple: (object type, size) or (None, None) if not packed.
+    """
+    if len(oid) != 40:
+        return None, None
+    try:
+        raw = bytes.fromhex(oid)
+    except ValueError:
+        return None, None
+    for pack in get_packs(git_dir):
+        offset = pack.index.find(raw)
+        if offset is not None:
+            return pack.read_header_at(offset)
+    return None, None
+
+
+def has_packed_object(oid, git_dir):
+    """
+    Check whether an object is stored in one of the packs of a repository.
+    """
+    if len(oid) != 40:
+        return False
+    try:
+        raw = bytes.fromhex(oid)
+    except ValueError:
+        return False
+    return any(pack.index.find(raw) is not None for pack in get_packs(git_dir))
+
+
+def write_pack(objects, pack_dir):
+    """
+    Write a packfile and its `.idx` from a stream of objects.
+    Args:
+        objects (iterable): (oid, object type, payload, base oid) tuples. When the
+            base oid is set, the payload is a delta against that object, which must
+            appear earlier in the stream; otherwise it is the full content.
+        pack_dir (str): Directory receiving the pack.
+    Returns:
+        str or None: Name of the pack (pack-<sha1>), or None if there was nothing to pack.
+    """
+    os.makedirs(pack_dir, exist_ok=True)
+    fd, tmp_pack = tempfile.mkstemp(prefix="tmp_pack_", dir=pack_dir)
+    entries = []
+    checksum = hashlib.sha1()
+    try:
+        with os.fdopen(fd, "wb") as f:
+            # The object count is patched in once the stream is exhausted
+            f.write(PACK_SIGNATURE + struct.pack(">II", PACK_VERSION, 0))
+            offset = 12
+            offsets = {}
+            for oid, obj_type, payload, base_oid in objects:
+                if base_oid is None:
+                    header = encode_entry_header(TYPE_CODES[obj_type], len(payload))
+                else:
+                    header = encode_entry_header(OBJ_OFS_DELTA, len(payload))
+                    header += encode_ofs_delta_offset(offset - offsets[base_oid])
+                entry = header + zlib.compress(payload)
+                f.write(entry)
+                offsets[oid] = offset
+                entries.append((bytes.fromhex(oid), offset, zlib.crc32(entry)))
+                offset += len(entry)
+            if not entries:
+                os.remove(tmp_pack)
+                return None
+            f.seek(8)
+            f.write(struct.pack(">I", len(entries)))
+    except BaseException:
+        if os.path.exists(tmp_pack):
+            os.remove(tmp_pack)
+        raise
+    # Re-read the pack to compute its trailing checksum (the header was patched)
+    with open(tmp_pack, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+            checksum.update(chunk)
+    pack_sha = checksum.digest()
+    with open(tmp_pack, "ab") as f:
+        f.write(pack_sha)
+        f.flush()
+        os.fsync(f.fileno())
+
+    name = f"pack-{pack_sha.hex()}"
+    pack_path = os.path.join(pack_dir, name + ".pack")
+    idx_path = os.path.join(pack_dir, name + ".idx")
+    os.replace(tmp_pack, pack_path)
+    _write_index(entries, pack_sha, idx_path)
+    return name
+
+
+def _write_index(entries, pack_sha, idx_path):
+    """
+    Write the version 2 `.idx` for a pack: fanout, sorted OIDs, CRC32s and offsets.
+    """
+    entries.sort()
+    fanout = [0] * 256
+    for oid, _, _ in entries:
+        fanout[oid[0]] += 1
+    total = 0
+    for i in range(256):
+        total += fanout[i]
+        fanout[i] = total
+
+    small_offsets = []
+    large_offsets = []
+    for _, offset, _ in entries:
+        if offset < 0x80000000:
+            small_offsets.append(offset)
+        else:
+            small_offsets.append(0x80000000 | len(large_offsets))
+            large_offsets.append(offset)
+
+    data = bytearray()
+    data += IDX_SIGNATURE + struct.pack(">I", IDX_VERSION)
+    data += struct.pack(">256I", *fanout)
+    for oid, _, _ in entries:
+        data += oid
+    for _, _, crc in entries:
+        data += struct.pack(">I", crc)
+    for offset in small_offsets:
+        data += struct.pack(">I", offset)
+    for offset in large_offsets:
+        data += struct.pack(">Q", offset)
+    data += pack_sha
+    data += hashlib.sha1(data).digest()
+
+    fd, tmp_idx = tempfile.mkstemp(prefix="tmp_idx_", dir=os.path.dirname(idx_path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_idx, idx_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python pack.py <idx_path>", file=sys.stderr)
+        sys.exit(1)
+    for oid in PackIndex(sys.argv[1]):
+        print(oid)
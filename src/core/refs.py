@@ -0,0 +1,418 @@
+import os
+import re
+from contextlib import contextmanager
+
+PACKED_REFS_FILE = "packed-refs"
+PACKED_REFS_HEADER = b"# pack-refs with: sorted \n"
+SYMREF_PREFIX = "ref: "
+NULL_OID = "0" * 40
+# New value of a ref a transaction only verifies
+_KEEP = object()
+# Symbolic refs pointing to symbolic refs are followed this many times at most
+MAX_SYMREF_DEPTH = 5
+# Where a short name is looked for, in order
+REF_SEARCH_PATHS = ("refs/heads/{}", "refs/tags/{}")
+
+_SHA1_RE = re.compile(r"[0-9a-fA-F]{40}")
+
+
+class RefLockedError(OSError):
+    """
+    Raised when the lock file of a ref (or of packed-refs) already exists.
+    """
+
+
+class PackedRefs:
+    """
+    Content of a packed-refs file: '<sha1> <refname>' lines sorted by name.
+    Lookups are binary searches over the raw bytes, so loading the file
+    costs one read whatever its number of refs.
+    """
+
+    __slots__ = ("data", "start")
+
+    def __init__(self, data=b""):
+        header_end = data.index(b"\n") + 1 if data.startswith(b"#") else 0
+        body = data[header_end:]
+        if data and (b" sorted " not in data[:header_end] or body.startswith(b"^") or b"\n^" in body):
+            # Written by another tool: drop peeled lines and sort once
+            lines = sorted((line for line in body.splitlines() if line and not line.startswith(b"^")),
+                           key=lambda line: line[41:])
+            data = b"".join(line + b"\n" for line in lines)
+            header_end = 0
+        self.data = data
+        self.start = header_end
+
+    def get(self, refname):
+        """
+        Return the SHA-1 of a packed ref, or None if it is not packed.
+        """
+        key = refname.encode()
+        data = self.data
+        lo, hi = self.start, len(data)
+        # lo and hi always sit at the start of a line
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b"\n", lo, mid) + 1 or lo
+            end = data.find(b"\n", start)
+            if end < 0:
+                end = len(data)
+            name = data[start + 41:end]
+            if name == key:
+                return data[start:start + 40].decode()
+            if name < key:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def __iter__(self):
+        for line in self.data[self.start:].splitlines():
+            if line:
+                yield line[41:].decode(), line[:40].decode()
+
+
+# {git_dir: ((mtime_ns, size, inode) of packed-refs, PackedRefs)}
+_snapshots = {}
+
+
+def packed_refs(git_dir=".mygit"):
+    """
+    Return the packed refs of a repository.
+    The file is read once per process and kept as long as its stat data
+    does not change, so lookups after the first one cost a single stat.
+    """
+    path = os.path.join(git_dir, PACKED_REFS_FILE)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        _snapshots.pop(git_dir, None)
+        return PackedRefs()
+    key = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cached = _snapshots.get(git_dir)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "rb") as f:
+        snapshot = PackedRefs(f.read())
+    _snapshots[git_dir] = (key, snapshot)
+    return snapshot
+
+
+def read_loose_ref(refname, git_dir=".mygit"):
+    """
+    Return the stripped content of a loose ref file, or None if there is none.
+    """
+    try:
+        with open(os.path.join(git_dir, refname)) as f:
+            return f.read().strip()
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+
+
+def read_ref(refname, git_dir=".mygit"):
+    """
+    Return the SHA-1 a ref points to, following symbolic refs such as HEAD.
+    A loose ref file takes precedence over the same ref in packed-refs.
+    Args:
+        refname (str): Full ref name ('HEAD', 'refs/heads/main'...).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str or None: The SHA-1, or None if the ref (or the ref it points
+        to) does not exist or is not valid.
+    """
+    for _ in range(MAX_SYMREF_DEPTH):
+        content = read_loose_ref(refname, git_dir)
+        if content is None:
+            return packed_refs(git_dir).get(refname)
+        if not content.startswith(SYMREF_PREFIX):
+            return content if _SHA1_RE.fullmatch(content) else None
+        refname = content[len(SYMREF_PREFIX):].strip()
+    return None
+
+
+def dwim_ref(name, git_dir=".mygit"):
+    """
+    Find the ref a short name means: a branch, then a tag, then a full ref name.
+    Args:
+        name (str): Ref name ('main', 'v1.0', 'refs/heads/main'...).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple or None: (full ref name, SHA-1), or None if nothing matches.
+    """
+    candidates = [pattern.format(name) for pattern in REF_SEARCH_PATHS]
+    if name.startswith("refs/"):
+        candidates.append(name)
+    for refname in candidates:
+        sha = read_ref(refname, git_dir)
+        if sha is not None:
+            return refname, sha
+    return None
+
+
+def list_refs(git_dir=".mygit", prefix="refs/"):
+    """
+    List the refs of a repository, loose and packed, including nested
+    names such as 'refs/heads/feature/x'. Loose refs override packed ones.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        prefix (str): Only list the refs whose name starts with this.
+    Returns:
+        list: (ref name, SHA-1) tuples sorted by name.
+    """
+    refs = {name: sha for name, sha in packed_refs(git_dir) if name.startswith(prefix)}
+    refs_dir = os.path.join(git_dir, "refs")
+    for root, _, names in os.walk(refs_dir):
+        for name in names:
+            if name.endswith(".lock"):
+                continue
+            refname = os.path.relpath(os.path.join(root, name), git_dir).replace(os.sep, "/")
+            if not refname.startswith(prefix):
+                continue
+            sha = read_ref(refname, git_dir)
+            if sha is not None:
+                refs[refname] = sha
+    return sorted(refs.items())
+
+
+def _remove_loose_ref(refname, git_dir):
+    os.remove(os.path.join(git_dir, refname))
+    # Remove the directories of nested names left empty, keeping refs/<namespace>
+    directory = os.path.dirname(refname)
+    while directory.count("/") > 1:
+        try:
+            os.rmdir(os.path.join(git_dir, directory))
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def _lock(path):
+    """
+    Create the lock file of a ref file exclusively.
+    Returns:
+        int: File descriptor of '<path>.lock', open for writing.
+    Raises:
+        RefLockedError: If the lock file already exists.
+    """
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    try:
+        return os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        raise RefLockedError(
+            f"Unable to create '{lock_path}': another mygit process seems to be running. "
+            "If it crashed, remove the file manually."
+        ) from None
+
+
+def _serialize_packed(refs):
+    return PACKED_REFS_HEADER + "".join(f"{sha} {name}\n" for name, sha in sorted(refs.items())).encode()
+
+
+def pack_refs(git_dir=".mygit", all_refs=False, prune=True):
+    """
+    Move loose refs into the packed-refs file.
+    Like git pack-refs, only tags and refs already packed are packed by
+    default: branches move often and are better kept loose.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        all_refs (bool): Pack every ref, branches included.
+        prune (bool): Delete the loose files of the refs packed.
+    Returns:
+        int: The number of refs in the packed-refs file.
+    Raises:
+        RefLockedError: If packed-refs is locked by another process.
+    """
+    path = os.path.join(git_dir, PACKED_REFS_FILE)
+    fd = _lock(path)
+    try:
+        packed = dict(packed_refs(git_dir))
+        loose = [(name, sha) for name, sha in list_refs(git_dir)
+                 if read_loose_ref(name, git_dir) == sha
+                 and (all_refs or name.startswith("refs/tags/") or name in packed)]
+        packed.update(loose)
+        with os.fdopen(fd, "wb") as f:
+            f.write(_serialize_packed(packed))
+        os.replace(path + ".lock", path)
+    finally:
+        if os.path.exists(path + ".lock"):
+            os.remove(path + ".lock")
+    if prune:
+        for name, sha in loose:
+            # A ref updated since it was read keeps its loose file
+            if read_loose_ref(name, git_dir) == sha:
+                _remove_loose_ref(name, git_dir)
+    return len(packed)
+
+
+class RefMismatchError(ValueError):
+    """
+    Raised when a ref does not have the value a transaction expects.
+    """
+
+
+class RefTransaction:
+    """
+    A set of ref updates applied all together or not at all.
+
+    Each update may give the value the ref is expected to have (compare-
+    and-swap): NULL_OID means the ref must not exist yet, None means any
+    value. Committing locks every ref ('<ref>.lock', created exclusively),
+    checks the expected values once all the locks are held, then writes
+    the new values to the lock files and renames them over the refs. If a
+    lock cannot be taken or a ref has moved, nothing is changed.
+    Use ref_transaction() to commit on success and roll back on errors.
+    """
+
+    def __init__(self, git_dir=".mygit"):
+        self.git_dir = git_dir
+        # [(ref name, new content or None to delete, expected SHA-1 or None, follow symrefs)]
+        self.updates = []
+        self._locks = []
+
+    def update(self, refname, new, old=None):
+        """
+        Set a ref (through HEAD, the branch it points to) to a SHA-1;
+        NULL_OID as the new value deletes it.
+        """
+        self.updates.append((refname, None if new == NULL_OID else new, old, True))
+
+    def create(self, refname, new):
+        """
+        Create a ref that must not exist yet.
+        """
+        self.update(refname, new, NULL_OID)
+
+    def delete(self, refname, old=None):
+        """
+        Delete a ref, loose and packed.
+        """
+        self.updates.append((refname, None, old, True))
+
+    def verify(self, refname, old):
+        """
+        Only check that a ref has a value (NULL_OID: that it does not exist).
+        """
+        self.updates.append((refname, _KEEP, old, True))
+
+    def set_symbolic(self, refname, target):
+        """
+        Make a ref such as HEAD point to another ref ('ref: <target>').
+        """
+        self.updates.append((refname, SYMREF_PREFIX + target, None, False))
+
+    @staticmethod
+    def _check_name(refname):
+        parts = refname.split("/")
+        if refname != "HEAD" and (parts[0] != "refs" or len(parts) < 2 or
+                                  any(part in ("", ".", "..") or part.endswith(".lock") for part in parts)):
+            raise ValueError(f"invalid ref name '{refname}'")
+
+    def _target(self, refname, deref):
+        # The ref an update writes: symbolic refs are followed when asked to
+        for _ in range(MAX_SYMREF_DEPTH):
+            content = read_loose_ref(refname, self.git_dir)
+            if not deref or content is None or not content.startswith(SYMREF_PREFIX):
+                return refname
+            refname = content[len(SYMREF_PREFIX):].strip()
+        return refname
+
+    def _acquire(self, path):
+        fd = _lock(path)
+        os.close(fd)
+        self._locks.append(path + ".lock")
+
+    def abort(self):
+        """
+        Release the locks taken without changing any ref.
+        """
+        for lock_path in self._locks:
+            if os.path.exists(lock_path):
+                os.remove(lock_path)
+        self._locks = []
+
+    def commit(self):
+        """
+        Apply every update, or none.
+        Returns:
+            list: The (ref name, new value or None if deleted) pairs written, in order.
+        Raises:
+            RefLockedError: If a ref is locked by another process.
+            RefMismatchError: If a ref does not have its expected value, or
+                is updated twice.
+            ValueError: If a ref name is not valid.
+        """
+        try:
+            planned = {}
+            for refname, new, old, deref in self.updates:
+                self._check_name(refname)
+                target = self._target(refname, deref)
+                if target in planned:
+                    raise RefMismatchError(f"multiple updates for ref '{target}' not allowed")
+                planned[target] = (new, old)
+            for target in sorted(planned):
+                self._acquire(os.path.join(self.git_dir, target))
+            for target, (new, old) in sorted(planned.items()):
+                current = read_ref(target, self.git_dir)
+                if old is not None and current != (None if old == NULL_OID else old):
+                    raise RefMismatchError(
+                        f"cannot lock ref '{target}': is at {current or NULL_OID} but expected {old}")
+            deleted = [target for target, (new, _) in planned.items() if new is None]
+            packed_path = os.path.join(self.git_dir, PACKED_REFS_FILE)
+            prune_packed = any(packed_refs(self.git_dir).get(target) for target in deleted)
+            if prune_packed:
+                # Deleted refs must go from packed-refs too, or they would show again
+                self._acquire(packed_path)
+                packed = dict(packed_refs(self.git_dir))
+            written = []
+            for target, (new, _) in sorted(planned.items()):
+                if new is _KEEP:
+                    continue
+                path = os.path.join(self.git_dir, target)
+                if new is None:
+                    if os.path.lexists(path):
+                        _remove_loose_ref(target, self.git_dir)
+                else:
+                    with open(path + ".lock", "w") as f:
+                        f.write(new + "\n")
+                    os.replace(path + ".lock", path)
+                written.append((target, new))
+            if prune_packed:
+                for target in deleted:
+                    packed.pop(target, None)
+                with open(packed_path + ".lock", "wb") as f:
+                    f.write(_serialize_packed(packed))
+                os.replace(packed_path + ".lock", packed_path)
+            return written
+        finally:
+            self.abort()
+            self.updates = []
+
+
+@contextmanager
+def ref_transaction(git_dir=".mygit"):
+    """
+    Collect ref updates and commit them when the block ends; nothing is
+    written if the block raises.
+    Raises:
+        RefLockedError, RefMismatchError: As RefTransaction.commit.
+    """
+    transaction = RefTransaction(git_dir)
+    yield transaction
+    transaction.commit()
+
+
+def update_ref(refname, new, old=None, git_dir=".mygit"):
+    """
+    Update one ref in its own transaction (see RefTransaction.update).
+    Args:
+        refname (str): Ref name; HEAD updates the branch it points to.
+        new (str): New SHA-1.
+        old (str, optional): Expected current SHA-1, NULL_OID if the ref must
+            not exist, None to skip the check.
+        git_dir (str): Path to the .mygit directory.
+    Raises:
+        RefLockedError, RefMismatchError: As RefTransaction.commit.
+    """
+    with ref_transaction(git_dir) as transaction:
+        transaction.update(refname, new, old)
@@ -0,0 +1,137 @@
+import re
+import time
+import heapq
+import calendar
+from src.core.commit_graph import lookup_commit, get_commit_graph
+from src.core.bloom import filter_contains
+from src.core.tree import find_tree_entry
+
+# Seconds per unit accepted in relative dates ("2 weeks ago")
+DATE_UNITS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+    "week": 7 * 86400,
+    "month": 30 * 86400,
+    "year": 365 * 86400,
+}
+
+
+def walk_revisions(tips, git_dir=".mygit", first_parent=False, since=None):
+    """
+    Walk the history reachable from some commits, newest first.
+
+    Commits are taken from a heap ordered by commit time, so each one is
+    produced as soon as it is the most recent commit left: the walk only
+    goes as deep as the caller consumes. Commit times and parents come from
+    the commit-graph when possible; commit objects are not read here.
+    Args:
+        tips (iterable): Commit SHA-1s to start from.
+        git_dir (str): Path to the .mygit directory.
+        first_parent (bool): Only follow the first parent of merges.
+        since (int, optional): Stop at commits older than this timestamp;
+            their ancestors are not walked either.
+    Yields:
+        tuple: (commit SHA-1, CommitInfo)
+    """
+    heap = []
+    seen = set()
+    # The counter keeps commits with the same time in the order they were reached
+    counter = 0
+    for tip in tips:
+        if tip in seen:
+            continue
+        seen.add(tip)
+        info = lookup_commit(tip, git_dir)
+        if info is not None:
+            heapq.heappush(heap, (-info.timestamp, counter, tip, info))
+            counter += 1
+    while heap:
+        _, _, oid, info = heapq.heappop(heap)
+        if since is not None and info.timestamp < since:
+            continue
+        yield oid, info
+        parents = info.parents[:1] if first_parent else info.parents
+        for parent in parents:
+            if parent in seen:
+                continue
+            seen.add(parent)
+            parent_info = lookup_commit(parent, git_dir)
+            if parent_info is not None:
+                heapq.heappush(heap, (-parent_info.timestamp, counter, parent, parent_info))
+                counter += 1
+
+
+def normalize_pathspec(path):
+    """
+    Return a path given on the command line relative to the repository
+    root, without './' or trailing '/' ('' for the root itself).
+    """
+    return "/".join(part for part in path.replace("\\", "/").split("/") if part not in ("", "."))
+
+
+def _path_entries(tree, paths, git_dir):
+    try:
+        return [find_tree_entry(tree, path, git_dir) for path in paths]
+    except ValueError:
+        return [None] * len(paths)
+
+
+def touches_paths(oid, info, paths, git_dir=".mygit"):
+    """
+    Check whether a commit changes one of some paths.
+
+    A commit is skipped when one of its parents has the same entries for
+    all the paths (for a merge, the change came from the other side). The
+    changed-path Bloom filter of the commit-graph is checked first: when it
+    excludes every path, the commit is the same as its first parent and no
+    tree is read. Only probable hits are checked against the trees.
+    Args:
+        oid (str): Commit SHA-1.
+        info (CommitInfo): The commit's tree and parents.
+        paths (list): Normalized, non-empty paths (files or directories).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        bool: True if the commit changes one of the paths.
+    """
+    graph = get_commit_graph(git_dir)
+    bloom = graph.bloom_filter(oid) if graph is not None and info.parents else None
+    if bloom is not None and not any(filter_contains(bloom, path) for path in paths):
+        return False
+    entries = _path_entries(info.tree, paths, git_dir)
+    if not info.parents:
+        return any(entry is not None for entry in entries)
+    for parent in info.parents:
+        parent_info = lookup_commit(parent, git_dir)
+        if parent_info is not None and _path_entries(parent_info.tree, paths, git_dir) == entries:
+            return False
+    return True
+
+
+def parse_date(value, now=None):
+    """
+    Parse a date given to --since/--until.
+    Accepted forms: a Unix timestamp, 'YYYY-MM-DD' optionally followed by
+    'HH:MM[:SS]' (UTC), and relative dates such as '3 days ago' or
+    '2.weeks.ago'.
+    Args:
+        value (str): The date.
+        now (int, optional): Reference time for relative dates (default: now).
+    Returns:
+        int: Seconds since the epoch.
+    Raises:
+        ValueError: If the date cannot be parsed.
+    """
+    value = value.strip()
+    if re.fullmatch(r"\d+", value):
+        return int(value)
+    match = re.fullmatch(r"(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2}))?)?", value)
+    if match:
+        fields = [int(v) if v else 0 for v in match.groups()]
+        return calendar.timegm((*fields, 0, 0, 0))
+    match = re.fullmatch(r"(\d+)[ .]+(second|minute|hour|day|week|month|year)s?[ .]+ago", value)
+    if match:
+        now = int(time.time()) if now is None else now
+        return now - int(match.group(1)) * DATE_UNITS[match.group(2)]
+    raise ValueError(f"invalid date '{value}'")
@@ -0,0 +1,181 @@
+from bisect import bisect_left
+from src.core.objects import write_object
+
+# Mode of an entry that points to a subtree
+TREE_MODE = "40000"
+
+
+def is_tree_mode(mode):
+    """
+    Return True if a tree entry mode designates a subtree.
+    """
+    return mode.lstrip("0") == TREE_MODE
+
+
+def parse_tree(content):
+    """
+    Parse the content of a tree object.
+    Trees hold one 'mode name sha1' line per entry. Trees written before
+    subtrees existed list full paths ('dir/file') instead, which callers
+    handle transparently since names are joined to their parent path.
+    Args:
+        content (bytes): Raw tree content.
+    Returns:
+        list: (mode, name, sha1) tuples.
+    """
+    entries = []
+    for line in content.decode().splitlines():
+        parts = line.strip().split()
+        if len(parts) == 3:
+            entries.append(tuple(parts))
+    return entries
+
+
+def tree_sort_key(entry):
+    """
+    Git orders tree entries by name, comparing a subtree as if its name
+    ended with '/'.
+    """
+    mode, name, _ = entry
+    return name + "/" if is_tree_mode(mode) else name
+
+
+def serialize_tree(entries):
+    """
+    Build the content of a tree object.
+    Args:
+        entries (iterable): (mode, name, sha1) tuples.
+    Returns:
+        bytes: Tree content.
+    """
+    return "\n".join(f"{mode} {name} {sha1}" for mode, name, sha1 in sorted(entries, key=tree_sort_key)).encode()
+
+
+def read_tree(tree_sha, git_dir=".mygit"):
+    """
+    Read and parse a tree object (through the parsed-object cache).
+    Args:
+        tree_sha (str): SHA-1 of the tree object.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: (mode, name, sha1) tuples, not to be modified.
+    Raises:
+        ValueError: If the object is not a tree.
+    """
+    # Imported here: src.core.model depends on this module
+    from src.core.model import get_tree
+    return get_tree(tree_sha, git_dir).entries
+
+
+def flatten_tree(tree_sha, git_dir=".mygit", prefix="", trees=None):
+    """
+    List every file reachable from a tree, recursing into subtrees.
+    Args:
+        tree_sha (str): SHA-1 of the tree object.
+        git_dir (str): Path to the .mygit directory.
+        prefix (str): Path of the tree relative to the root.
+        trees (dict, optional): Filled with {directory path: tree SHA-1},
+            the root being ''.
+    Returns:
+        dict: {path: (mode, sha1)}
+    Raises:
+        ValueError: If an object is not a tree.
+    """
+    files = {}
+    if trees is not None:
+        trees[prefix.rstrip("/")] = tree_sha
+    for mode, name, sha1 in read_tree(tree_sha, git_dir):
+        path = prefix + name
+        if is_tree_mode(mode):
+            files.update(flatten_tree(sha1, git_dir, path + "/", trees))
+        else:
+            files[path] = (mode, sha1)
+    return files
+
+
+def find_tree_entry(tree_sha, path, git_dir=".mygit"):
+    """
+    Look up a path in a tree, reading only the trees along the path.
+    Args:
+        tree_sha (str): SHA-1 of the root tree.
+        path (str): Path relative to the root ('dir/file').
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple or None: (mode, sha1) of the entry, None if the path is absent.
+    Raises:
+        ValueError: If an object is not a tree.
+    """
+    from src.core.model import get_tree
+    tree = get_tree(tree_sha, git_dir)
+    # Trees from before subtrees existed hold full paths as names
+    entry = tree.get(path)
+    if entry is not None:
+        return entry
+    name, sep, rest = path.partition("/")
+    subtree = tree.get(name) if sep else None
+    if subtree is not None and is_tree_mode(subtree[0]):
+        return find_tree_entry(subtree[1], rest, git_dir)
+    return None
+
+
+def _subtree_end(paths, lo, hi, directory):
+    # Paths under 'dir/' sort contiguously, before 'dir0' ('0' follows '/')
+    return bisect_left(paths, directory + "0", lo, hi)
+
+
+def write_index_tree(index, git_dir=".mygit"):
+    """
+    Write the index as nested tree objects, one per directory.
+
+    Directories whose tree is recorded in the index's cache-tree (and still
+    covers the same number of entries) are reused without being rebuilt;
+    the trees written are recorded back into the index.
+    Args:
+        index (Index): Index without unmerged entries.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: SHA-1 of the root tree.
+    """
+    paths = index.sorted_paths()
+
+    def build(lo, hi, prefix):
+        directory = prefix.rstrip("/")
+        cached = index.cached_tree(directory)
+        if cached and cached[0] == hi - lo:
+            return cached[1]
+        entries = []
+        i = lo
+        while i < hi:
+            name, sep, _ = paths[i][len(prefix):].partition("/")
+            if sep:
+                end = _subtree_end(paths, i, hi, prefix + name)
+                entries.append((TREE_MODE, name, build(i, end, prefix + name + "/")))
+                i = end
+            else:
+                entry = index.entry_at(i)
+                entries.append((entry.mode, name, entry.sha1))
+                i += 1
+        sha1 = write_object(serialize_tree(entries), "tree", git_dir)
+        index.record_tree(directory, hi - lo, sha1)
+        return sha1
+
+    return build(0, len(paths), "")
+
+
+def prime_cache_tree(index, trees):
+    """
+    Record in the index the trees its entries were just read from, so the
+    next write_index_tree reuses them.
+    Args:
+        index (Index): Index matching the trees exactly.
+        trees (dict): {directory path: tree SHA-1}, as filled by flatten_tree.
+    """
+    paths = index.sorted_paths()
+    for directory, sha1 in trees.items():
+        if directory:
+            lo = bisect_left(paths, directory + "/")
+            count = _subtree_end(paths, lo, len(paths), directory) - lo
+        else:
+            count = len(paths)
+        index.record_tree(directory, count, sha1)
+
@@ -0,0 +1,148 @@
+import heapq
+from collections import namedtuple
+from src.core.tree import read_tree, flatten_tree, is_tree_mode, tree_sort_key
+
+# One changed path: status is 'A' (added), 'M' (modified) or 'D' (deleted);
+# the mode and SHA-1 of a missing side are None
+DiffEntry = namedtuple("DiffEntry", ["status", "path", "old_mode", "old_sha", "new_mode", "new_sha"])
+
+# One path where two trees merged against a base differ: (mode, sha1) or None per side
+MergeEntry = namedtuple("MergeEntry", ["path", "base", "ours", "theirs"])
+
+
+def _read_sorted(tree_sha, git_dir):
+    """
+    Return the entries of a tree as {sort key: (mode, name, sha1)} and the
+    sorted keys, or (None, None) for trees from before subtrees existed
+    (their names are full paths and cannot be walked level by level).
+    """
+    if tree_sha is None:
+        return {}, []
+    entries = read_tree(tree_sha, git_dir)
+    if any("/" in name for _, name, _ in entries):
+        return None, None
+    by_key = {tree_sort_key(entry): entry for entry in entries}
+    return by_key, sorted(by_key)
+
+
+def _merge_keys(*key_lists):
+    """
+    Merge sorted key lists, yielding each key once, in order.
+    """
+    previous = None
+    for key in heapq.merge(*key_lists):
+        if key != previous:
+            yield key
+            previous = key
+
+
+def _mode_sha(entry):
+    return (entry[0], entry[2]) if entry else None
+
+
+def _flat_side(tree_sha, git_dir, prefix):
+    return flatten_tree(tree_sha, git_dir, prefix) if tree_sha else {}
+
+
+def _diff_flat(old_sha, new_sha, git_dir, prefix):
+    # Fallback for trees from before subtrees existed: compare file lists
+    old = _flat_side(old_sha, git_dir, prefix)
+    new = _flat_side(new_sha, git_dir, prefix)
+    for path in sorted(old.keys() | new.keys()):
+        before, after = old.get(path), new.get(path)
+        if before != after:
+            yield _entry(path, before, after)
+
+
+def _entry(path, before, after):
+    old_mode, old_sha = before if before else (None, None)
+    new_mode, new_sha = after if after else (None, None)
+    status = "A" if before is None else "D" if after is None else "M"
+    return DiffEntry(status, path, old_mode, old_sha, new_mode, new_sha)
+
+
+def diff_trees(old_tree, new_tree, git_dir=".mygit", recursive=True, prefix=""):
+    """
+    Compare two trees, walking both in tree order at the same time.
+
+    Subtrees with the same SHA-1 on both sides are skipped without being
+    read, so the cost follows the size of the change rather than the size
+    of the trees. A path that is a file on one side and a directory on the
+    other is reported as a deletion and additions.
+    Args:
+        old_tree (str or None): Tree SHA-1 (None for an empty tree).
+        new_tree (str or None): Tree SHA-1 (None for an empty tree).
+        git_dir (str): Path to the .mygit directory.
+        recursive (bool): Report the files inside changed subtrees instead
+            of the subtrees themselves.
+        prefix (str): Path of the trees, prepended to the paths reported.
+    Yields:
+        DiffEntry: Changed paths, in tree order.
+    Raises:
+        ValueError: If an object is not a tree.
+    """
+    if old_tree == new_tree:
+        return
+    old, old_keys = _read_sorted(old_tree, git_dir)
+    new, new_keys = _read_sorted(new_tree, git_dir)
+    if old is None or new is None:
+        yield from _diff_flat(old_tree, new_tree, git_dir, prefix)
+        return
+    for key in _merge_keys(old_keys, new_keys):
+        before, after = old.get(key), new.get(key)
+        if before == after:
+            continue
+        path = prefix + (before or after)[1]
+        if recursive and is_tree_mode((before or after)[0]):
+            # Same key on both sides: both are subtrees
+            yield from diff_trees(before[2] if before else None, after[2] if after else None,
+                                  git_dir, recursive, path + "/")
+        else:
+            yield _entry(path, _mode_sha(before), _mode_sha(after))
+
+
+def _diff_flat3(base_sha, ours_sha, theirs_sha, git_dir, prefix):
+    base = _flat_side(base_sha, git_dir, prefix)
+    ours = _flat_side(ours_sha, git_dir, prefix)
+    theirs = _flat_side(theirs_sha, git_dir, prefix)
+    for path in sorted(base.keys() | ours.keys() | theirs.keys()):
+        if ours.get(path) != theirs.get(path):
+            yield MergeEntry(path, base.get(path), ours.get(path), theirs.get(path))
+
+
+def diff_trees3(base_tree, ours_tree, theirs_tree, git_dir=".mygit", prefix=""):
+    """
+    Walk three trees in parallel for a merge, reporting the files where
+    'ours' and 'theirs' differ. Everything else merges to 'ours' as is:
+    subtrees that are the same on both sides are skipped, whatever the base.
+    Args:
+        base_tree (str or None): Tree SHA-1 of the merge base.
+        ours_tree (str or None): Tree SHA-1 of the current side.
+        theirs_tree (str or None): Tree SHA-1 of the merged side.
+        git_dir (str): Path to the .mygit directory.
+        prefix (str): Path of the trees, prepended to the paths reported.
+    Yields:
+        MergeEntry: Files (never subtrees) where 'ours' and 'theirs' differ,
+        in tree order; 'base' is the entry in the merge base.
+    Raises:
+        ValueError: If an object is not a tree.
+    """
+    if ours_tree == theirs_tree:
+        return
+    sides = [_read_sorted(sha, git_dir) for sha in (base_tree, ours_tree, theirs_tree)]
+    if any(entries is None for entries, _ in sides):
+        yield from _diff_flat3(base_tree, ours_tree, theirs_tree, git_dir, prefix)
+        return
+    base, ours, theirs = (entries for entries, _ in sides)
+    for key in _merge_keys(*(keys for _, keys in sides)):
+        entries = [side.get(key) for side in (base, ours, theirs)]
+        if entries[1] == entries[2]:
+            continue
+        present = next(entry for entry in entries if entry)
+        path = prefix + present[1]
+        if key.endswith("/"):
+            # A directory on every side that has the name
+            yield from diff_trees3(*(entry[2] if entry else None for entry in entries),
+                                   git_dir, path + "/")
+        else:
+            yield MergeEntry(path, *(_mode_sha(entry) for entry in entries))
@@ -0,0 +1,209 @@
+from collections import namedtuple
+from src.core.tree_diff import diff_trees3
+from src.core.tree import read_tree, flatten_tree, serialize_tree, is_tree_mode, TREE_MODE
+from src.core.merge_file import merge_file
+from src.core.model import get_blob
+from src.core.objects import write_object
+
+# Result of an in-memory merge: the merged tree (conflicted files hold their
+# conflict markers), the changes from 'ours' and the conflicts
+TreeMergeResult = namedtuple("TreeMergeResult", ["tree", "changes", "conflicts"])
+
+
+def merge_modes(base, ours, theirs):
+    """
+    Merge the modes of a file: a mode changed on one side only wins.
+    Returns:
+        str or None: The merged mode, None if both sides changed it differently.
+    """
+    if ours == theirs or theirs == base:
+        return ours
+    if ours == base:
+        return theirs
+    return None
+
+
+def merge_contents(entry, git_dir=".mygit"):
+    """
+    Merge a file that both sides changed, line by line (see merge_file).
+    A cleanly merged file is written to the database as a new blob.
+    Args:
+        entry (MergeEntry): The path and its (mode, sha1) on each side.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple: ((mode, sha1) of the merged file, or None if it conflicts;
+        content for the working file)
+    """
+    if entry.ours is None or entry.theirs is None:
+        # Deleted on one side, changed on the other: keep the changed version
+        return None, get_blob((entry.ours or entry.theirs)[1], git_dir).data
+    base_mode, base_data = (entry.base[0], get_blob(entry.base[1], git_dir).data) if entry.base else (None, b"")
+    result = merge_file(base_data, get_blob(entry.ours[1], git_dir).data, get_blob(entry.theirs[1], git_dir).data)
+    mode = merge_modes(base_mode, entry.ours[0], entry.theirs[0])
+    if result.conflicts or mode is None:
+        return None, result.content
+    return (mode, write_object(result.content, "blob", git_dir)), result.content
+
+
+def _side_path(path, label, taken):
+    side = f"{path}~{label}"
+    candidate, n = side, 0
+    while candidate in taken:
+        candidate = f"{side}_{n}"
+        n += 1
+    return candidate
+
+
+def _move_dir_file_conflicts(entries, changes, conflicts, git_dir):
+    """
+    Find the names that would be both a file and a directory in the merged
+    tree (a file on one side, a directory on the other) and move the file
+    aside to '<path>~HEAD' or '<path>~MERGE_HEAD', as a conflict.
+    Only reported paths need to be looked at: a path where 'ours' and
+    'theirs' agree cannot collide with anything.
+    """
+    files = set()
+    for path, entry in entries.items():
+        if path in changes:
+            if changes[path] is not None:
+                files.add(path)
+        elif path in conflicts or entry.ours is not None:
+            files.add(path)
+    dirs = {path[:i] for path in files for i, char in enumerate(path) if char == "/"}
+    taken = files | dirs
+    for path in sorted(files & dirs):
+        entry = entries[path]
+        if path in conflicts:
+            content = conflicts.pop(path)[1]
+        else:
+            side = changes.pop(path, None) or entry.ours
+            content = get_blob(side[1], git_dir).data
+        if entry.ours is not None:
+            # The file is in 'ours': it leaves its place to the directory
+            changes[path] = None
+        side_path = _side_path(path, "HEAD" if entry.ours is not None else "MERGE_HEAD", taken)
+        taken.add(side_path)
+        # The MergeEntry keeps the original path, so the move can be reported
+        conflicts[side_path] = (entry, content)
+
+
+def merge_trees(base_tree, ours_tree, theirs_tree, git_dir=".mygit"):
+    """
+    Merge three trees and detect conflicts.
+    Only the paths where 'ours' and 'theirs' differ are looked at: the
+    trees are walked together and identical subtrees are skipped. Files
+    changed on both sides are merged line by line, so only overlapping
+    changes conflict. A file in the way of a directory from the other side
+    is moved to '<path>~HEAD' (or '<path>~MERGE_HEAD') and reported as a
+    conflict under that name.
+    Args:
+        base_tree (str or None): SHA-1 of the merge base tree.
+        ours_tree (str): SHA-1 of the current tree.
+        theirs_tree (str): SHA-1 of the tree merged in.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple: ({path: (mode, sha1) or None} for the paths whose merged
+        entry differs from 'ours', None meaning deleted;
+        {path: (MergeEntry, content with conflict markers)} for the conflicts)
+    """
+    entries = {}
+    changes = {}
+    conflicts = {}
+    for entry in diff_trees3(base_tree, ours_tree, theirs_tree, git_dir):
+        entries[entry.path] = entry
+        if entry.base == entry.ours:
+            changes[entry.path] = entry.theirs
+        elif entry.base != entry.theirs:
+            # Both changed differently: merge the contents
+            merged, content = merge_contents(entry, git_dir)
+            if merged is None:
+                conflicts[entry.path] = (entry, content)
+            else:
+                changes[entry.path] = merged
+    _move_dir_file_conflicts(entries, changes, conflicts, git_dir)
+    return changes, conflicts
+
+
+def _apply(tree_sha, changes, git_dir):
+    # Returns None for a tree left empty, so that its parent drops it
+    entries = {name: (mode, sha1) for mode, name, sha1 in read_tree(tree_sha, git_dir)} if tree_sha else {}
+    if any("/" in name for name in entries):
+        # Tree from before subtrees existed: rebuild it from its file list
+        files = {path: entry for path, entry in flatten_tree(tree_sha, git_dir).items()
+                 if path not in changes}
+        files.update((path, entry) for path, entry in changes.items() if entry is not None)
+        return _apply(None, files, git_dir)
+    subdirs = {}
+    for path, entry in changes.items():
+        name, sep, rest = path.partition("/")
+        if sep:
+            subdirs.setdefault(name, {})[rest] = entry
+        elif entry is None:
+            entries.pop(name, None)
+        else:
+            entries[name] = entry
+    for name, sub_changes in subdirs.items():
+        current = entries.get(name)
+        subtree = current[1] if current and is_tree_mode(current[0]) else None
+        new_subtree = _apply(subtree, sub_changes, git_dir)
+        if new_subtree is not None:
+            if current and subtree is None:
+                raise ValueError(f"'{name}' would be both a file and a directory")
+            entries[name] = (TREE_MODE, new_subtree)
+        elif subtree is not None:
+            del entries[name]
+    if not entries:
+        return None
+    return write_object(serialize_tree((mode, name, sha1) for name, (mode, sha1) in entries.items()),
+                        "tree", git_dir)
+
+
+def apply_tree_changes(tree_sha, changes, git_dir=".mygit"):
+    """
+    Write the tree obtained by applying changes to a tree.
+    Only the trees on the way to a changed path are rewritten; the other
+    subtrees are reused as they are.
+    Args:
+        tree_sha (str or None): SHA-1 of the tree to change (None for an empty tree).
+        changes (dict): {path: (mode, sha1) or None to delete}. A file
+            replacing a directory (or the reverse) needs the deletions too.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: SHA-1 of the new tree.
+    Raises:
+        ValueError: If a tree object cannot be read, or if a file is left
+        where a directory is added.
+    """
+    if not changes and tree_sha is not None:
+        return tree_sha
+    new_tree = _apply(tree_sha, changes, git_dir)
+    return new_tree if new_tree is not None else write_object(b"", "tree", git_dir)
+
+
+def merge_tree(base_tree, ours_tree, theirs_tree, git_dir=".mygit"):
+    """
+    Merge three trees without an index or a working tree.
+
+    Everything is read from and written to the object database: the files
+    both sides changed are merged in memory and the result tree is built
+    from 'ours' by rewriting only the directories on the way to a change.
+    A conflicted file is stored with its conflict markers (binary files and
+    files deleted on one side keep the version that is there), so the tree
+    can still be inspected.
+    Args:
+        base_tree (str or None): SHA-1 of the merge base tree.
+        ours_tree (str): SHA-1 of the current tree.
+        theirs_tree (str): SHA-1 of the tree merged in.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        TreeMergeResult: The result tree, the changes and the conflicts (as
+        returned by merge_trees). The merge is clean if there are no conflicts.
+    Raises:
+        ValueError: If an object is missing or has the wrong type.
+    """
+    changes, conflicts = merge_trees(base_tree, ours_tree, theirs_tree, git_dir)
+    tree_changes = dict(changes)
+    for path, (entry, content) in conflicts.items():
+        mode = (entry.ours or entry.theirs)[0]
+        tree_changes[path] = (mode, write_object(content, "blob", git_dir))
+    return TreeMergeResult(apply_tree_changes(ours_tree, tree_changes, git_dir), changes, conflicts)
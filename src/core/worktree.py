@@ -0,0 +1,295 @@
+import os
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from src.core.index import make_entry, entry_matches_stat, is_racy, index_mtime, mode_from_stat
+from src.core.tree import write_index_tree, find_tree_entry
+from src.core.tree_diff import diff_trees
+from src.core.model import get_blob
+from src.core.config import read_config
+
+EXECUTABLE_MODE = "100755"
+# Fewer files than this are written by the current process
+PARALLEL_CHECKOUT_MIN_FILES = 100
+MAX_CHUNK_FILES = 256
+
+
+class CheckoutConflictError(Exception):
+    """
+    Raised when updating the working tree would lose local changes.
+    Attributes:
+        paths (list): The paths at risk, sorted.
+    """
+
+    def __init__(self, message, paths):
+        super().__init__(message)
+        self.paths = sorted(paths)
+
+
+def _file_differs(entry, index_time, git_dir):
+    """
+    Check whether the working file of an index entry has changed.
+    A missing file counts as changed.
+    """
+    try:
+        st = os.stat(entry.path)
+    except (FileNotFoundError, NotADirectoryError):
+        return True
+    if entry_matches_stat(entry, st) and not (index_time and is_racy(entry, index_time)):
+        return False
+    # Imported here: plumbing.hash_object depends on src.core
+    from src.plumbing.hash_object import hash_file
+    return entry.mode != mode_from_stat(st) or hash_file(entry.path, git_dir) != entry.sha1
+
+
+def _path_blocked(path, deletions):
+    """
+    Return True if writing a file at `path` is prevented by something that
+    is not about to be deleted: a file where one of its parent directories
+    should be, or a directory holding files at `path` itself.
+    """
+    parent = os.path.dirname(path)
+    while parent:
+        if (os.path.islink(parent) or os.path.isfile(parent)) and parent not in deletions:
+            return True
+        parent = os.path.dirname(parent)
+    if os.path.islink(path) or not os.path.isdir(path):
+        return False
+    for root, _, names in os.walk(path):
+        for name in names:
+            if os.path.relpath(os.path.join(root, name)).replace(os.sep, "/") not in deletions:
+                return True
+    return False
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        # Remove the directories left empty, up to the working tree root
+        try:
+            os.removedirs(directory)
+        except OSError:
+            pass
+
+
+def write_file(path, mode, sha1, git_dir=".mygit"):
+    """
+    Write a blob to the working tree with the permissions of its mode.
+    The parent directory must exist and a directory in the way must be gone.
+    Args:
+        path (str): Path relative to the working tree.
+        mode (str): Git file mode.
+        sha1 (str): Blob SHA-1.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        os.stat_result: Stat data of the written file, for the index.
+    Raises:
+        OSError: If the file cannot be written.
+        ValueError: If the blob is missing.
+    """
+    with open(path, "wb") as f:
+        f.write(get_blob(sha1, git_dir).data)
+    set_file_mode(path, mode)
+    return os.stat(path)
+
+
+def set_file_mode(path, mode):
+    """
+    Make a working file executable or not, following its Git mode.
+    """
+    st = os.stat(path)
+    executable = st.st_mode & stat.S_IXUSR
+    if (mode == EXECUTABLE_MODE) != bool(executable):
+        if mode == EXECUTABLE_MODE:
+            # Executable for whoever can read the file
+            os.chmod(path, st.st_mode | ((st.st_mode & 0o444) >> 2))
+        else:
+            os.chmod(path, st.st_mode & ~0o111)
+
+
+def checkout_workers(git_dir=".mygit", jobs=None):
+    """
+    Return the number of processes used to write files.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        jobs (int, optional): Requested number; otherwise the checkout.workers
+            config value. Zero or less means one per CPU, as does no setting.
+    """
+    if jobs is None:
+        try:
+            jobs = int(read_config(git_dir).get("checkout.workers", 0))
+        except ValueError:
+            jobs = 0
+    return jobs if jobs > 0 else os.cpu_count() or 1
+
+
+def _write_chunk(items, git_dir):
+    # Runs in a worker process: errors are returned so every file is attempted
+    results = []
+    for path, mode, sha1 in items:
+        try:
+            results.append((path, write_file(path, mode, sha1, git_dir), None))
+        except (OSError, ValueError) as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+def write_files(items, git_dir=".mygit", jobs=None, progress=None):
+    """
+    Write blobs to the working tree, across a process pool for large sets.
+
+    Parent directories are all created first, so workers only inflate and
+    write files. A failure does not stop the other writes: once every file
+    was attempted, the error of the first failed path (in path order) is
+    raised, whatever the number of workers.
+    Args:
+        items (list): (path, mode, sha1) tuples, paths sorted.
+        git_dir (str): Path to the .mygit directory.
+        jobs (int, optional): Number of worker processes (see checkout_workers).
+        progress (callable, optional): Called with (files done, total).
+    Returns:
+        dict: {path: os.stat_result} of the written files.
+    Raises:
+        OSError: If a file could not be written.
+    """
+    for directory in sorted({os.path.dirname(path) for path, _, _ in items} - {""}):
+        os.makedirs(directory, exist_ok=True)
+    jobs = checkout_workers(git_dir, jobs)
+    parallel = jobs > 1 and len(items) >= PARALLEL_CHECKOUT_MIN_FILES
+    # Several chunks per worker so a chunk of large files does not leave the others idle
+    size = max(1, min(MAX_CHUNK_FILES, len(items) // (jobs * 4))) if parallel else MAX_CHUNK_FILES
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    written = {}
+    errors = []
+
+    def collect(results):
+        for path, st, error in results:
+            if error is None:
+                written[path] = st
+            else:
+                errors.append((path, error))
+        if progress:
+            progress(len(written) + len(errors), len(items))
+
+    if parallel:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for results in pool.map(_write_chunk, chunks, [git_dir] * len(chunks)):
+                collect(results)
+    else:
+        for chunk in chunks:
+            collect(_write_chunk(chunk, git_dir))
+    if errors:
+        path, error = min(errors)
+        raise OSError(f"unable to write '{path}': {error}" +
+                      (f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""))
+    return written
+
+
+def checkout_tree(index, target_tree, git_dir=".mygit", head_tree=None, force=False, jobs=None, progress=None):
+    """
+    Update the index and the working tree to a tree, touching only the paths
+    where the index differs from it.
+
+    The index is compared to the target through its tree (rebuilt from the
+    cache-tree, so unchanged directories cost nothing) and the tree diff,
+    which skips identical subtrees. Files are written, deleted or chmod'ed
+    path by path and their fresh stat data goes into the index.
+
+    Without `force`, nothing is touched when a path to update has local
+    changes: a modified working file, a staged change (an index entry
+    differing from `head_tree`), or an untracked file in the way. Paths
+    that are the same in `head_tree` and in the target keep their staged
+    and local changes, as with git checkout. With `force` (reset --hard),
+    local changes are discarded, including in paths the target does not
+    change, and unmerged entries are resolved to the target.
+    Args:
+        index (Index): The index, locked by the caller.
+        target_tree (str): SHA-1 of the tree to check out.
+        git_dir (str): Path to the .mygit directory.
+        head_tree (str, optional): Tree of the commit being left, to tell
+            staged changes apart (used without `force`).
+        force (bool): Discard local changes instead of refusing.
+        jobs (int, optional): Number of processes writing files (see write_files).
+        progress (callable, optional): Called with (files written, total).
+    Returns:
+        list: The paths updated in the working tree, sorted.
+    Raises:
+        CheckoutConflictError: If local changes are in the way (without
+            `force`), or untracked files are where files must be written.
+        OSError: If a file cannot be written; the index is left unchanged.
+    """
+    unmerged = index.unmerged_paths()
+    if unmerged and not force:
+        raise CheckoutConflictError("you need to resolve your current index first", unmerged)
+    for path in unmerged:
+        index.remove(path)
+    index_time = index_mtime(index.path)
+    current_tree = write_index_tree(index, git_dir)
+
+    # {path: (mode, sha1) or None for a deletion}
+    updates = {}
+    kept_local = False
+    for change in diff_trees(current_tree, target_tree, git_dir):
+        target_entry = (change.new_mode, change.new_sha) if change.new_sha else None
+        if not force and head_tree is not None and find_tree_entry(head_tree, change.path, git_dir) == target_entry:
+            # Unchanged between the two commits: keep the local version
+            kept_local = True
+            continue
+        updates[change.path] = target_entry
+
+    if force:
+        # Local changes in paths the target does not change are discarded too
+        for entry in index:
+            if entry.path not in updates and _file_differs(entry, index_time, git_dir):
+                updates[entry.path] = (entry.mode, entry.sha1)
+        for path in unmerged:
+            if path not in updates:
+                target_entry = find_tree_entry(target_tree, path, git_dir)
+                updates[path] = target_entry
+    else:
+        at_risk = []
+        for path, target_entry in updates.items():
+            entry = index.get(path)
+            if entry is None:
+                # Untracked file in the way of an added one
+                if os.path.isfile(path) and target_entry is not None:
+                    from src.plumbing.hash_object import hash_file
+                    if hash_file(path, git_dir) != target_entry[1]:
+                        at_risk.append(path)
+                continue
+            if head_tree is not None and find_tree_entry(head_tree, path, git_dir) != (entry.mode, entry.sha1):
+                at_risk.append(path)
+            elif os.path.lexists(path) and _file_differs(entry, index_time, git_dir):
+                at_risk.append(path)
+        if at_risk:
+            raise CheckoutConflictError("local changes would be overwritten", at_risk)
+    deletions = {path for path, target_entry in updates.items() if target_entry is None}
+    blocked = [path for path, target_entry in updates.items()
+               if target_entry is not None and _path_blocked(path, deletions)]
+    if blocked:
+        raise CheckoutConflictError("untracked files are in the way", blocked)
+
+    # Deletions first: a directory may replace a file of the same name, and the reverse
+    for path in sorted(deletions):
+        index.remove(path)
+        _remove_file(path)
+    to_write = []
+    for path in sorted(updates.keys() - deletions):
+        mode, sha1 = updates[path]
+        old = index.get(path)
+        if old is not None and old.sha1 == sha1 and not _file_differs(old, index_time, git_dir):
+            # Only the mode changed
+            set_file_mode(path, mode)
+            index.add(make_entry(path, mode, sha1, os.stat(path)))
+        else:
+            to_write.append((path, mode, sha1))
+    written = write_files(to_write, git_dir, jobs, progress)
+    for path, mode, sha1 in to_write:
+        index.add(make_entry(path, mode, sha1, written[path]))
+    if not kept_local:
+        # The index now matches the target: record it so the next commit reuses it
+        index.record_tree("", len(index), target_tree)
+    return sorted(updates)
@@ -2,30 +2,85 @@ import sys
 import os
 import zlib
 import hashlib
+from src.core.pack import read_packed_object, read_packed_object_header
+from src.core.objects import get_object_path, object_exists
+from src.core.object_cache import object_cache
 
-def get_object_path(oid, git_dir):
+def read_object(oid, git_dir):
     """
-    Get the path to the object file in the Git directory.
+    Read and decompress a Git object, serving it from the shared object cache
+    when possible.
     Args:
         oid (str): Object ID (SHA-1).
         git_dir (str): Path to the .mygit directory.
     Returns:
-        str: Path to the object file.
+        tuple: (object type, content) or (None, None) if not found or corrupted.
     """
-    return os.path.join(git_dir, "objects", oid[:2], oid[2:])
+    cached = object_cache.get(git_dir, oid)
+    if cached is not None:
+        return cached
+    obj_type, content = read_object_uncached(oid, git_dir)
+    if obj_type is not None:
+        object_cache.put(git_dir, oid, obj_type, content)
+    return obj_type, content
 
-def read_object(oid, git_dir):
+def read_object_header(oid, git_dir):
     """
-    Read and decompress a Git object from disk.
+    Read the type and size of a Git object without decompressing its content:
+    only the "<type> <size>\\0" prefix of a loose object is inflated.
     Args:
         oid (str): Object ID (SHA-1).
         git_dir (str): Path to the .mygit directory.
     Returns:
-        tuple: (object type, content) or (None, None) if not found or corrupted.
+        tuple: (object type, size) or (None, None) if not found or corrupted.
     """
+    # Without the content at hand, only the header is read: that is no cache miss
+    cached = object_cache.peek(git_dir, oid)
+    if cached is not None:
+        return cached[0], len(cached[1])
     obj_path = get_object_path(oid, git_dir)
     if not os.path.exists(obj_path):
+        try:
+            return read_packed_object_header(oid, git_dir)
+        except (zlib.error, ValueError):
+            return None, None
+    d = zlib.decompressobj()
+    data = b""
+    try:
+        with open(obj_path, 'rb') as f:
+            # The header is at most a type name, 20 digits and two separators
+            while b'\0' not in data and len(data) < 64:
+                chunk = d.unconsumed_tail or f.read(256)
+                if not chunk:
+                    break
+                data += d.decompress(chunk, 64 - len(data))
+    except zlib.error:
         return None, None
+    header_end = data.find(b'\0')
+    if header_end == -1:
+        return None, None
+    try:
+        obj_type, size = data[:header_end].decode().split(' ')
+        return obj_type, int(size)
+    except ValueError:
+        return None, None
+
+def read_object_uncached(oid, git_dir):
+    """
+    Read and decompress a Git object from disk, looking at loose objects first
+    and then at the packs.
+    Args:
+        oid (str): Object ID (SHA-1).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        tuple: (object type, content) or (None, None) if not found or corrupted.
+    """
+    obj_path = get_object_path(oid, git_dir)
+    if not os.path.exists(obj_path):
+        try:
+            return read_packed_object(oid, git_dir)
+        except (zlib.error, ValueError):
+            return None, None
     with open(obj_path, 'rb') as f:
         compressed = f.read()
     try:
@@ -42,21 +97,26 @@ def read_object(oid, git_dir):
 
 def cat_file(oid, opt, git_dir):
     """
-    Print the type or content of a Git object.
+    Print the type, size or content of a Git object.
     Args:
         oid (str): Object ID (SHA-1).
-        opt (str): '-t' for type, '-p' for pretty print content.
+        opt (str): '-t' for type, '-s' for size, '-p' for pretty print content.
         git_dir (str): Path to the .mygit directory.
     """
-    if opt not in ['-t', '-p']:
-        print("Invalid option. Use -t or -p.", file=sys.stderr)
+    if opt not in ['-t', '-s', '-p']:
+        print("Invalid option. Use -t, -s or -p.", file=sys.stderr)
         sys.exit(1)
-    obj_type, content = read_object(oid, git_dir)
+    if opt in ['-t', '-s']:
+        obj_type, size = read_object_header(oid, git_dir)
+    else:
+        obj_type, content = read_object(oid, git_dir)
     if obj_type is None:
         print(f"Error: OID '{oid}' not found or corrupted.", file=sys.stderr)
         sys.exit(1)
     if opt == '-t':
         print(obj_type)
+    elif opt == '-s':
+        print(size)
     elif opt == '-p':
         if obj_type == 'blob':
             try:
@@ -66,9 +126,53 @@ def cat_file(oid, opt, git_dir):
         else:
             print(content.decode(errors='replace'), end='')
 
+def cat_file_batch(git_dir, check_only=False, input_stream=None, output_stream=None, buffered=False):
+    """
+    Serve object lookups read from a stream, one OID per line, until end of input.
+    For each OID, writes "<oid> <type> <size>\n<content>\n", or only the header
+    line with check_only, or "<oid> missing\n" if the object does not exist.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        check_only (bool): If True, only write the header line (--batch-check).
+        input_stream: Text stream of OIDs (defaults to stdin).
+        output_stream: Binary stream receiving the records (defaults to stdout).
+        buffered (bool): If True, only flush at the end instead of after every record.
+    Returns:
+        int: Number of requests served.
+    """
+    input_stream = input_stream if input_stream is not None else sys.stdin
+    output_stream = output_stream if output_stream is not None else sys.stdout.buffer
+    served = 0
+    for line in input_stream:
+        oid = line.strip()
+        if not oid:
+            continue
+        served += 1
+        if check_only:
+            obj_type, size = read_object_header(oid, git_dir)
+        else:
+            obj_type, content = read_object(oid, git_dir)
+            size = len(content) if content is not None else None
+        if obj_type is None:
+            output_stream.write(f"{oid} missing\n".encode())
+        else:
+            output_stream.write(f"{oid} {obj_type} {size}\n".encode())
+            if not check_only:
+                output_stream.write(content)
+                output_stream.write(b"\n")
+        if not buffered:
+            output_stream.flush()
+    output_stream.flush()
+    return served
+
 if __name__ == "__main__":
+    # Batch mode without the CLI start-up cost: python cat_file.py --batch[-check] [<git_dir>]
+    if len(sys.argv) in (2, 3) and sys.argv[1] in ("--batch", "--batch-check"):
+        git_dir = sys.argv[2] if len(sys.argv) == 3 else ".mygit"
+        cat_file_batch(git_dir, check_only=sys.argv[1] == "--batch-check")
+        sys.exit(0)
     if len(sys.argv) != 3:
-        print("Usage: python cat_file.py -t|-p <oid> [<git_dir>]", file=sys.stderr)
+        print("Usage: python cat_file.py -t|-s|-p <oid> | --batch | --batch-check", file=sys.stderr)
         sys.exit(1)
     opt = sys.argv[1]
     oid = sys.argv[2]
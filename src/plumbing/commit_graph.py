@@ -0,0 +1,35 @@
+import sys
+from src.core.commit_graph import write_commit_graph, get_commit_graph
+
+def commit_graph(action, git_dir=".mygit"):
+    """
+    Manage the commit-graph file (.mygit/objects/info/commit-graph).
+    Args:
+        action (str): 'write' to (re)write the graph from HEAD and every ref,
+            'verify' to check that it can be read and print its size.
+        git_dir (str): Path to the .mygit directory.
+    """
+    if action == "write":
+        try:
+            count = write_commit_graph(git_dir)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Wrote commit-graph with {count} commits")
+    elif action == "verify":
+        graph = get_commit_graph(git_dir)
+        if graph is None:
+            print("Error: no valid commit-graph found.", file=sys.stderr)
+            sys.exit(1)
+        with_filters = sum(1 for i in range(len(graph)) if graph.bloom_filter_at(i) is not None)
+        print(f"commit-graph: {len(graph)} commits, {with_filters} with changed-path filters")
+    else:
+        print(f"Error: unknown commit-graph action '{action}'. Use write or verify.", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python commit_graph.py <write|verify> [<git_dir>]", file=sys.stderr)
+        sys.exit(1)
+    git_dir = sys.argv[2] if len(sys.argv) > 2 else ".mygit"
+    commit_graph(sys.argv[1], git_dir)
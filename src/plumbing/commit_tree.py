@@ -1,44 +1,68 @@
-import sys
 import os
-import hashlib
-import zlib
-from datetime import datetime
+import time
+from src.core.objects import write_object
+from src.core.config import read_config
+from src.core.commit import DEFAULT_NAME, DEFAULT_EMAIL, format_timezone
 
-def commit_tree(tree_sha, message, parents=None, git_dir=".mygit"):
+def get_identity(role, git_dir=".mygit", timestamp=None):
     """
-    Create a commit object from a tree and optional parent(s), and write it to the Git database.
+    Build the identity line of the author or committer of a new commit.
+    The name and email come from MYGIT_<ROLE>_NAME / MYGIT_<ROLE>_EMAIL,
+    then user.name / user.email in the repository config; the time zone
+    is the local one.
+    Args:
+        role (str): 'author' or 'committer'.
+        git_dir (str): Path to the .mygit directory.
+        timestamp (int, optional): Seconds since the epoch (default: now).
+    Returns:
+        str: 'Name <email> timestamp +hhmm'.
+    """
+    config = read_config(git_dir)
+    name = os.environ.get(f"MYGIT_{role.upper()}_NAME") or config.get("user.name") or DEFAULT_NAME
+    email = os.environ.get(f"MYGIT_{role.upper()}_EMAIL") or config.get("user.email") or DEFAULT_EMAIL
+    if timestamp is None:
+        timestamp = int(time.time())
+    offset = time.localtime(timestamp).tm_gmtoff
+    return f"{name} <{email}> {timestamp} {format_timezone(offset)}"
+
+def create_commit(tree_sha, message, parents=None, git_dir=".mygit", timestamp=None):
+    """
+    Write a commit object in Git's format and return its SHA-1, without printing it.
     Args:
         tree_sha (str): SHA of the tree object.
         message (str): Commit message.
         parents (str or list, optional): Parent commit SHA(s).
         git_dir (str): Path to the .mygit directory.
+        timestamp (int, optional): Commit time in seconds since the epoch (default: now).
     Returns:
         str: The SHA-1 of the created commit object.
     """
+    if isinstance(parents, str):
+        parents = [parents]
+    if timestamp is None:
+        timestamp = int(time.time())
     lines = [f"tree {tree_sha}"]
-    if parents:
-        if isinstance(parents, str):
-            lines.append(f"parent {parents}")
-        else:
-            for parent in parents:
-                lines.append(f"parent {parent}")
-    author = f"Author <author@example.com> {int(datetime.now().timestamp())} +0000"
-    committer = author
-    lines.append(f"author {author}")
-    lines.append(f"committer {committer}")
+    for parent in parents or []:
+        lines.append(f"parent {parent}")
+    lines.append(f"author {get_identity('author', git_dir, timestamp)}")
+    lines.append(f"committer {get_identity('committer', git_dir, timestamp)}")
     lines.append("")
-    lines.append(message)
+    lines.append(message if message.endswith("\n") else message + "\n")
     content = "\n".join(lines).encode()
-    header = f"commit {len(content)}\0".encode()
-    full_data = header + content
-    sha1 = hashlib.sha1(full_data).hexdigest()
+    return write_object(content, "commit", git_dir)
 
-    obj_dir = os.path.join(git_dir, "objects", sha1[:2])
-    obj_path = os.path.join(obj_dir, sha1[2:])
-    os.makedirs(obj_dir, exist_ok=True)
-    compressed = zlib.compress(full_data)
-    with open(obj_path, 'wb') as f:
-        f.write(compressed)
+def commit_tree(tree_sha, message, parents=None, git_dir=".mygit"):
+    """
+    Create a commit object from a tree and optional parent(s), and write it to the Git database.
+    Args:
+        tree_sha (str): SHA of the tree object.
+        message (str): Commit message.
+        parents (str or list, optional): Parent commit SHA(s).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: The SHA-1 of the created commit object.
+    """
+    sha1 = create_commit(tree_sha, message, parents, git_dir)
     print(sha1)
     return sha1
 
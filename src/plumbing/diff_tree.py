@@ -0,0 +1,74 @@
+import sys
+from src.core.model import get_object, Commit, Tree
+from src.core.tree_diff import diff_trees
+from src.porcelain.rev_parse import resolve_revision
+
+NULL_MODE = "000000"
+NULL_OID = "0" * 40
+
+def resolve_tree(revision, git_dir=".mygit"):
+    """
+    Resolve a revision naming a tree or a commit to a tree SHA-1.
+    Args:
+        revision (str): Revision (SHA-1, ref, HEAD~1...).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: Tree SHA-1.
+    """
+    sha = resolve_revision(revision, git_dir)
+    obj = get_object(sha, git_dir)
+    if isinstance(obj, Commit):
+        return obj.tree
+    if isinstance(obj, Tree):
+        return sha
+    print(f"Error: {revision} is not a tree or a commit.", file=sys.stderr)
+    sys.exit(1)
+
+def format_diff_entry(entry):
+    """
+    Format a change like git diff-tree's raw output:
+    ':<old mode> <new mode> <old sha1> <new sha1> <status>\\t<path>'.
+    """
+    return (f":{(entry.old_mode or NULL_MODE).zfill(6)} {(entry.new_mode or NULL_MODE).zfill(6)} "
+            f"{entry.old_sha or NULL_OID} {entry.new_sha or NULL_OID} {entry.status}\t{entry.path}")
+
+def diff_tree(revisions, git_dir=".mygit", recursive=False, name_only=False):
+    """
+    Print the differences between two trees (like git diff-tree).
+    With a single commit, it is compared to its first parent (a root commit
+    to the empty tree).
+    Args:
+        revisions (list): One commit, or two trees/commits (old, new).
+        git_dir (str): Path to the .mygit directory.
+        recursive (bool): List the files of changed subtrees instead of the subtrees.
+        name_only (bool): Only print the paths.
+    Returns:
+        list: The DiffEntry records printed.
+    """
+    if len(revisions) == 1:
+        commit = get_object(resolve_revision(revisions[0], git_dir), git_dir)
+        if not isinstance(commit, Commit):
+            print(f"Error: {revisions[0]} is not a commit.", file=sys.stderr)
+            sys.exit(1)
+        old_tree = get_object(commit.parents[0], git_dir).tree if commit.parents else None
+        new_tree = commit.tree
+    elif len(revisions) == 2:
+        old_tree, new_tree = (resolve_tree(rev, git_dir) for rev in revisions)
+    else:
+        print("Error: diff-tree needs one commit or two trees.", file=sys.stderr)
+        sys.exit(1)
+    entries = []
+    for entry in diff_trees(old_tree, new_tree, git_dir, recursive=recursive):
+        print(entry.path if name_only else format_diff_entry(entry))
+        entries.append(entry)
+    return entries
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare the content of two trees")
+    parser.add_argument("revisions", nargs="+", help="One commit, or two trees or commits")
+    parser.add_argument("-r", dest="recursive", action="store_true", help="Recurse into subtrees")
+    parser.add_argument("--name-only", action="store_true", help="Only show the paths")
+    parser.add_argument("--git-dir", default=".mygit", help="Path to the .mygit directory")
+    args = parser.parse_args()
+    diff_tree(args.revisions, args.git_dir, args.recursive, args.name_only)
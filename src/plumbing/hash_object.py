@@ -1,7 +1,39 @@
 import sys
 import os
 import hashlib
-import zlib
+from src.core.objects import write_object, write_blob_from_file
+
+# Files are read and hashed in slices of this size
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path, git_dir=".mygit", write=False):
+    """
+    Compute the blob SHA-1 of a file in constant memory, optionally writing
+    the compressed object. The file is hashed in fixed-size chunks first, so
+    an object that already exists is never compressed again.
+    Args:
+        file_path (str): Path to the file to hash.
+        git_dir (str): Path to the .mygit directory.
+        write (bool): If True, write the object to the Git database.
+    Returns:
+        str: The SHA-1 hash of the object.
+    Raises:
+        OSError: If the file changes while it is being read.
+    """
+    size = os.stat(file_path).st_size
+    sha = hashlib.sha1(f"blob {size}\0".encode())
+    read = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            read += len(chunk)
+            sha.update(chunk)
+    if read != size:
+        raise OSError(f"'{file_path}' changed while it was being hashed")
+    sha1 = sha.hexdigest()
+    if write:
+        write_blob_from_file(file_path, sha1, size, git_dir)
+    return sha1
 
 
 def hash_object(file_path, git_dir=".mygit", write=False):
@@ -18,26 +50,11 @@ def hash_object(file_path, git_dir=".mygit", write=False):
         print(f"Error: '{file_path}' not found or is not a file.", file=sys.stderr)
         sys.exit(1)
 
-    with open(file_path, 'rb') as f:
-        data = f.read()
-
-    header = f"blob {len(data)}\0".encode()
-
-    full_data = header + data
-
-    sha1 = hashlib.sha1(full_data).hexdigest()
-
-    if write:
-        # .git/objects/<xx>/<yyyyyy...>
-        obj_dir = os.path.join(git_dir, "objects", sha1[:2])
-        obj_path = os.path.join(obj_dir, sha1[2:])
-
-        os.makedirs(obj_dir, exist_ok=True)
-
-        compressed = zlib.compress(full_data)
-
-        with open(obj_path, 'wb') as f:
-            f.write(compressed)
+    try:
+        sha1 = hash_file(file_path, git_dir, write)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
     print(sha1)
     return sha1
@@ -55,16 +72,10 @@ def hash_object_data(data, obj_type, git_dir=".mygit", write=False):
     """
     if isinstance(data, str):
         data = data.encode()
-    header = f"{obj_type} {len(data)}\0".encode()
-    full_data = header + data
-    sha1 = hashlib.sha1(full_data).hexdigest()
     if write:
-        obj_dir = os.path.join(git_dir, "objects", sha1[:2])
-        obj_path = os.path.join(obj_dir, sha1[2:])
-        os.makedirs(obj_dir, exist_ok=True)
-        compressed = zlib.compress(full_data)
-        with open(obj_path, 'wb') as f:
-            f.write(compressed)
+        sha1 = write_object(data, obj_type, git_dir)
+    else:
+        sha1 = hashlib.sha1(f"{obj_type} {len(data)}\0".encode() + data).hexdigest()
     print(sha1)
     return sha1
 
@@ -0,0 +1,187 @@
+import sys
+import heapq
+from src.core.commit_graph import lookup_commit
+
+# Paint flags of the merge-base walk
+PARENT1 = 1
+PARENT2 = 2
+STALE = 4
+RESULT = 8
+BOTH_PARENTS = PARENT1 | PARENT2
+
+# Priority of commits missing from the commit-graph: their generation is unknown,
+# so they are walked before any commit whose generation is known
+GENERATION_INFINITY = float("inf")
+
+
+class _CommitCache:
+    """
+    Commit lookups done during one walk, so each commit is read at most once.
+    """
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self._infos = {}
+
+    def get(self, oid):
+        info = self._infos.get(oid)
+        if info is None and oid not in self._infos:
+            info = self._infos[oid] = lookup_commit(oid, self.git_dir)
+        return info
+
+    def priority(self, oid):
+        """
+        Heap entry of a commit: highest generation first, then most recent
+        commit time; the OID comes last.
+        """
+        info = self.get(oid)
+        if info is None:
+            return (0, 0, oid)
+        generation = GENERATION_INFINITY if info.generation is None else info.generation
+        return (-generation, -info.timestamp, oid)
+
+
+def _paint_down_to_common(one, twos, commits):
+    """
+    Walk down from `one` (painted PARENT1) and `twos` (painted PARENT2),
+    highest generation first. A commit reached by both colours is a common
+    ancestor: it is recorded and its own ancestors are marked STALE, as they
+    cannot be better merge bases. The walk stops as soon as every commit
+    left in the queue is stale.
+    Returns:
+        tuple: (candidate bases in the order found, {oid: flags})
+    """
+    flags = {one: PARENT1}
+    for two in twos:
+        flags[two] = flags.get(two, 0) | PARENT2
+    queue = [commits.priority(oid) for oid in flags]
+    heapq.heapify(queue)
+    queued = set(flags)
+    # Queued commits not marked STALE: the walk ends when there are none left
+    active = len(queued)
+    found = []
+    while active:
+        oid = heapq.heappop(queue)[-1]
+        queued.discard(oid)
+        current = flags[oid]
+        if not current & STALE:
+            active -= 1
+        paint = current & (PARENT1 | PARENT2 | STALE)
+        if paint & BOTH_PARENTS == BOTH_PARENTS:
+            if not current & RESULT:
+                flags[oid] = current | RESULT
+                found.append(oid)
+            paint |= STALE
+        info = commits.get(oid)
+        for parent in info.parents if info else []:
+            parent_flags = flags.get(parent, 0)
+            if parent_flags & paint == paint:
+                continue
+            flags[parent] = parent_flags | paint
+            if parent in queued:
+                if paint & STALE and not parent_flags & STALE:
+                    active -= 1
+            else:
+                queued.add(parent)
+                heapq.heappush(queue, commits.priority(parent))
+                if not flags[parent] & STALE:
+                    active += 1
+    return found, flags
+
+
+def is_ancestor(ancestor, descendant, git_dir=".mygit", commits=None):
+    """
+    Check whether a commit is reachable from another.
+    With generation numbers, the walk never goes below the ancestor's generation.
+    Args:
+        ancestor (str): Candidate ancestor SHA-1.
+        descendant (str): Commit SHA-1 to walk from.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        bool: True if `ancestor` is `descendant` or one of its ancestors.
+    """
+    commits = commits or _CommitCache(git_dir)
+    target = commits.get(ancestor)
+    floor = target.generation if target and target.generation is not None else None
+    seen = {descendant}
+    queue = [commits.priority(descendant)]
+    while queue:
+        oid = heapq.heappop(queue)[-1]
+        if oid == ancestor:
+            return True
+        info = commits.get(oid)
+        if info is None:
+            continue
+        if floor is not None and info.generation is not None and info.generation <= floor:
+            # Same or lower generation: no path to the ancestor can go through here
+            continue
+        for parent in info.parents:
+            if parent not in seen:
+                seen.add(parent)
+                heapq.heappush(queue, commits.priority(parent))
+    return False
+
+
+def merge_bases(one, twos, git_dir=".mygit"):
+    """
+    Compute the best common ancestors of `one` and any of `twos`.
+    A common ancestor is a best one when it is not an ancestor of another
+    common ancestor. Criss-cross histories can have several.
+    Args:
+        one (str): Commit SHA-1.
+        twos (str or list): Commit SHA-1(s).
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: Merge base SHA-1s, most recent first. Empty if the histories are unrelated.
+    """
+    if isinstance(twos, str):
+        twos = [twos]
+    if one in twos:
+        return [one]
+    commits = _CommitCache(git_dir)
+    found, flags = _paint_down_to_common(one, twos, commits)
+    # Candidates reached from another candidate after being found are not best
+    candidates = [oid for oid in found if not flags[oid] & STALE]
+    if len(candidates) > 1:
+        candidates = [
+            c for c in candidates
+            if not any(other != c and is_ancestor(c, other, git_dir, commits) for other in candidates)
+        ]
+    candidates.sort(key=lambda oid: (-(commits.get(oid).timestamp), oid))
+    return candidates
+
+
+def merge_base(revisions, show_all=False, git_dir=".mygit"):
+    """
+    Print the merge base(s) of the first revision and the others (like git merge-base).
+    Args:
+        revisions (list): At least two revisions.
+        show_all (bool): Print every best common ancestor instead of one.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: The merge bases printed.
+    """
+    # Imported here: the porcelain package imports this module (through merge)
+    from src.porcelain.rev_parse import resolve_revision
+    if len(revisions) < 2:
+        print("Error: merge-base needs at least two commits.", file=sys.stderr)
+        sys.exit(1)
+    shas = [resolve_revision(rev, git_dir) for rev in revisions]
+    bases = merge_bases(shas[0], shas[1:], git_dir)
+    if not bases:
+        sys.exit(1)
+    if not show_all:
+        bases = bases[:1]
+    for base in bases:
+        print(base)
+    return bases
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Find the best common ancestors of commits")
+    parser.add_argument("commits", nargs="+", help="Commits (the first one is compared to the others)")
+    parser.add_argument("--all", action="store_true", help="Print all merge bases")
+    parser.add_argument("--git-dir", default=".mygit", help="Path to the .mygit directory")
+    args = parser.parse_args()
+    merge_base(args.commits, args.all, args.git_dir)
@@ -0,0 +1,82 @@
+import sys
+from src.porcelain.rev_parse import resolve_revision
+from src.core.model import get_commit
+from src.core.tree_merge import merge_tree as merge_tree_objects
+from src.plumbing.merge_base import merge_bases
+
+def conflict_message(path, entry):
+    """
+    Describe a conflict the way git does ('CONFLICT (<kind>): ...').
+    """
+    if path != entry.path:
+        side = "HEAD" if entry.ours is not None else "MERGE_HEAD"
+        return (f"CONFLICT (file/directory): directory in the way of {entry.path} from {side}; "
+                f"moving it to {path} instead.")
+    if entry.ours is None:
+        return f"CONFLICT (modify/delete): {path} deleted in ours and modified in theirs."
+    if entry.theirs is None:
+        return f"CONFLICT (modify/delete): {path} deleted in theirs and modified in ours."
+    kind = "content" if entry.base else "add/add"
+    return f"CONFLICT ({kind}): Merge conflict in {path}"
+
+def merge_tree(branch1, branch2, git_dir=".mygit", name_only=False, merge_base=None):
+    """
+    Merge two commits without touching the index or the working tree, and
+    print the result (like git merge-tree --write-tree).
+
+    The first line is the OID of the merged tree. If there are conflicts,
+    the tree holds the conflicted files with their markers and is followed
+    by the index entries of every side of each conflicted path
+    ('<mode> <oid> <stage>\\t<path>'), a blank line and one message per
+    conflict.
+    Args:
+        branch1 (str): Revision of the current side.
+        branch2 (str): Revision merged into it.
+        git_dir (str): Path to the .mygit directory.
+        name_only (bool): List only the conflicted paths, not their entries.
+        merge_base (str, optional): Revision to use as the merge base instead
+            of the best common ancestor.
+    Returns:
+        TreeMergeResult: The result; the merge is clean if it has no conflicts.
+    """
+    ours = resolve_revision(branch1, git_dir)
+    theirs = resolve_revision(branch2, git_dir)
+    if merge_base is not None:
+        base = resolve_revision(merge_base, git_dir)
+    else:
+        bases = merge_bases(ours, theirs, git_dir)
+        if not bases:
+            print("Error: refusing to merge unrelated histories.", file=sys.stderr)
+            sys.exit(1)
+        base = bases[0]
+    try:
+        result = merge_tree_objects(get_commit(base, git_dir).tree, get_commit(ours, git_dir).tree,
+                                    get_commit(theirs, git_dir).tree, git_dir)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(result.tree)
+    if result.conflicts:
+        for path, (entry, _) in sorted(result.conflicts.items()):
+            if name_only:
+                print(path)
+                continue
+            for stage, side in ((1, entry.base), (2, entry.ours), (3, entry.theirs)):
+                if side:
+                    print(f"{side[0].zfill(6)} {side[1]} {stage}\t{path}")
+        print()
+        for path, (entry, _) in sorted(result.conflicts.items()):
+            print(conflict_message(path, entry))
+    return result
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Merge two commits without a working tree")
+    parser.add_argument("branch1", help="Current side")
+    parser.add_argument("branch2", help="Side merged in")
+    parser.add_argument("--name-only", action="store_true", help="Only list the conflicted paths")
+    parser.add_argument("--merge-base", help="Merge base to use instead of computing it")
+    parser.add_argument("--git-dir", default=".mygit", help="Path to the .mygit directory")
+    args = parser.parse_args()
+    result = merge_tree(args.branch1, args.branch2, args.git_dir, args.name_only, args.merge_base)
+    sys.exit(1 if result.conflicts else 0)
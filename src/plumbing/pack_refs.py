@@ -0,0 +1,29 @@
+import sys
+from src.core.refs import pack_refs as pack_loose_refs, RefLockedError
+
+def pack_refs(git_dir=".mygit", all_refs=False, prune=True):
+    """
+    Pack refs into the sorted packed-refs file (like git pack-refs).
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        all_refs (bool): Pack branches too, not only tags and refs already packed.
+        prune (bool): Delete the loose files of the refs packed.
+    Returns:
+        int: The number of packed refs.
+    """
+    try:
+        count = pack_loose_refs(git_dir, all_refs=all_refs, prune=prune)
+    except RefLockedError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Packed {count} refs.")
+    return count
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Pack refs into the packed-refs file")
+    parser.add_argument("--all", dest="all_refs", action="store_true", help="Pack branches too")
+    parser.add_argument("--no-prune", dest="prune", action="store_false", help="Keep the loose ref files")
+    parser.add_argument("--git-dir", default=".mygit", help="Path to the .mygit directory")
+    args = parser.parse_args()
+    pack_refs(args.git_dir, args.all_refs, args.prune)
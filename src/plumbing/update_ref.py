@@ -0,0 +1,100 @@
+import re
+import sys
+from src.porcelain.rev_parse import resolve_revision
+from src.core.refs import ref_transaction, RefLockedError, NULL_OID
+
+def _object_name(value, git_dir):
+    # '' and the null OID mean 'no value'; anything else names an object
+    if value in ("", NULL_OID):
+        return NULL_OID
+    if re.fullmatch(r"[0-9a-fA-F]{40}", value):
+        return value.lower()
+    return resolve_revision(value, git_dir)
+
+def _commit(queue, git_dir):
+    try:
+        with ref_transaction(git_dir) as transaction:
+            queue(transaction)
+    except (RefLockedError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def update_ref(refname, new_value=None, old_value=None, delete=False, git_dir=".mygit"):
+    """
+    Update or delete one ref safely (like git update-ref).
+    Args:
+        refname (str): Ref to update ('HEAD' updates the branch it points to).
+        new_value (str): New object (SHA-1 or revision); ignored with `delete`.
+        old_value (str, optional): Value the ref must have; '' or the null
+            OID if it must not exist.
+        delete (bool): Delete the ref instead.
+        git_dir (str): Path to the .mygit directory.
+    """
+    old = _object_name(old_value, git_dir) if old_value is not None else None
+    if delete:
+        _commit(lambda transaction: transaction.delete(refname, old), git_dir)
+    else:
+        new = _object_name(new_value or "", git_dir)
+        _commit(lambda transaction: transaction.update(refname, new, old), git_dir)
+
+def update_ref_stdin(git_dir=".mygit", stream=None):
+    """
+    Read ref updates from standard input and apply them in one transaction:
+    either they all succeed or no ref is changed. One command per line:
+        update <ref> <new> [<old>]
+        create <ref> <new>
+        delete <ref> [<old>]
+        verify <ref> [<old>]
+    An empty or null <old> means the ref must not exist.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        stream (file, optional): Input to read instead of sys.stdin.
+    Returns:
+        int: The number of commands applied.
+    """
+    commands = []
+    for number, line in enumerate(stream or sys.stdin, 1):
+        words = line.split()
+        if not words:
+            continue
+        command, args = words[0], words[1:]
+        arity = {"update": (2, 3), "create": (2, 2), "delete": (1, 2), "verify": (1, 2)}.get(command)
+        if arity is None:
+            print(f"Error: unknown command on line {number}: {command}", file=sys.stderr)
+            sys.exit(1)
+        if not arity[0] <= len(args) <= arity[1]:
+            print(f"Error: {command} on line {number}: wrong number of arguments", file=sys.stderr)
+            sys.exit(1)
+        values = [_object_name(value, git_dir) for value in args[1:]]
+        commands.append((command, args[0], values))
+
+    def queue(transaction):
+        for command, refname, values in commands:
+            if command == "update":
+                transaction.update(refname, *values)
+            elif command == "create":
+                transaction.create(refname, values[0])
+            elif command == "delete":
+                transaction.delete(refname, *values)
+            else:
+                transaction.verify(refname, values[0] if values else NULL_OID)
+
+    _commit(queue, git_dir)
+    return len(commands)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Update refs safely")
+    parser.add_argument("ref", nargs="?", help="Ref to update")
+    parser.add_argument("values", nargs="*", help="<new> [<old>], or [<old>] with -d")
+    parser.add_argument("-d", dest="delete", action="store_true", help="Delete the ref")
+    parser.add_argument("--stdin", action="store_true", help="Read a batch of updates from standard input")
+    parser.add_argument("--git-dir", default=".mygit", help="Path to the .mygit directory")
+    args = parser.parse_args()
+    if args.stdin:
+        update_ref_stdin(args.git_dir)
+    elif args.ref and (args.values or args.delete):
+        values = args.values if not args.delete else [None] + args.values
+        update_ref(args.ref, values[0], values[1] if len(values) > 1 else None, args.delete, args.git_dir)
+    else:
+        parser.error("a ref and a value are needed, or --stdin")
@@ -1,24 +1,25 @@
-import os
-from src.plumbing.hash_object import hash_object_data
+import sys
+from src.core.index import Index
+from src.core.tree import write_index_tree
 
 def write_tree(git_dir=".mygit", index_path=".mygit/index"):
     """
-    Write the current index as a tree object and return its SHA-1.
+    Write the current index as nested tree objects and return the root's SHA-1.
+    Directories left unchanged since the last write are reused from the
+    index's cache-tree instead of being hashed again.
     Args:
         git_dir (str): Path to the .mygit directory.
         index_path (str): Path to the index file.
     Returns:
-        str: The SHA-1 of the created tree object.
+        str: The SHA-1 of the root tree object.
     """
-    tree_entries = []
-    with open(index_path) as idx:
-        for line in idx:
-            mode, path, sha1 = line.strip().split()
-            tree_entries.append(f"{mode} {path} {sha1}")
-
-    tree_content = "\n".join(tree_entries)
-    tree_sha1 = hash_object_data(tree_content, "tree", git_dir, write=True)
-    return tree_sha1
+    # The lock is only needed to save the cache-tree, so a busy index is not an error
+    with Index.locked(index_path, optional=True) as index:
+        unmerged = index.unmerged_paths()
+        if unmerged:
+            print(f"Error: cannot write a tree with unmerged paths: {', '.join(unmerged)}", file=sys.stderr)
+            sys.exit(1)
+        return write_index_tree(index, git_dir)
 
 if __name__ == "__main__":
     print(write_tree())
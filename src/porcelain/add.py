@@ -1,34 +1,113 @@
 
 import os
 import sys
-from src.plumbing.hash_object import hash_object
+from concurrent.futures import ProcessPoolExecutor
+from src.plumbing.hash_object import hash_file
+from src.core.objects import batch_writes
+from src.core.index import Index, make_entry, mode_from_stat, entry_matches_stat, is_racy, index_mtime
 
-def add(file_path, git_dir=".mygit", index_path=".mygit/index"):
+# Below this many files to hash, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 64
+# Files hashed per task sent to a worker; each task syncs its objects once
+MAX_CHUNK_FILES = 256
+
+def expand_paths(paths):
     """
-    Add a file to the index (staging area).
+    Expand the paths given to add into the list of files to stage.
+    Directories are walked recursively, skipping hidden files and directories
+    (including .mygit) like status does.
     Args:
-        file_path (str): Path to the file to add.
-        git_dir (str): Path to the .mygit directory.
-        index_path (str): Path to the index file.
+        paths (iterable): Files and directories.
+    Returns:
+        list: Relative file paths, without duplicates, in the order found.
     """
-    import io
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for name in sorted(names):
+                    if not name.startswith("."):
+                        files.setdefault(os.path.relpath(os.path.join(root, name)), None)
+        elif os.path.isfile(path):
+            files.setdefault(os.path.relpath(path), None)
+        else:
+            print(f"Error: '{path}' not found or is not a file.", file=sys.stderr)
+            sys.exit(1)
+    return list(files)
 
-    old_stdout = sys.stdout
-    sys.stdout = io.StringIO()
-    hash_object(file_path, git_dir, write=True)
-    sha1 = sys.stdout.getvalue().strip()
-    sys.stdout = old_stdout
+def _hash_chunk(paths, git_dir):
+    # Runs in a worker process: write the blobs and sync them together
+    with batch_writes():
+        return [hash_file(path, git_dir, write=True) for path in paths]
 
-    mode = "100644"
-    rel_path = os.path.relpath(file_path)
-    os.makedirs(os.path.dirname(index_path), exist_ok=True)
-    with open(index_path, "a") as idx:
-        idx.write(f"{mode} {rel_path} {sha1}\n")
+def hash_files(paths, git_dir=".mygit", jobs=None):
+    """
+    Hash files and write them as blobs, across a process pool for large sets.
+    Args:
+        paths (list): Files to hash.
+        git_dir (str): Path to the .mygit directory.
+        jobs (int, optional): Number of worker processes (default: CPU count).
+    Returns:
+        list: The SHA-1 of each file, in the same order.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) < PARALLEL_MIN_FILES:
+        return _hash_chunk(paths, git_dir)
+    # Several chunks per worker so a chunk of large files does not leave the others idle
+    size = max(1, min(MAX_CHUNK_FILES, len(paths) // (jobs * 4)))
+    chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(_hash_chunk, chunks, [git_dir] * len(chunks))
+        return [sha1 for chunk in results for sha1 in chunk]
+
+def add(paths, git_dir=".mygit", index_path=".mygit/index", jobs=None):
+    """
+    Add files to the index (staging area).
+    Files whose stat data matches their index entry are skipped without
+    being read; the others are hashed and the index is written once.
+    Args:
+        paths (str or list): Files and directories to add.
+        git_dir (str): Path to the .mygit directory.
+        index_path (str): Path to the index file.
+        jobs (int, optional): Number of worker processes used to hash files.
+    Returns:
+        list: The paths whose index entry was added or updated.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = expand_paths(paths)
+    with Index.locked(index_path) as index:
+        index_time = index_mtime(index_path)
+        todo = []
+        stats = []
+        for path in files:
+            # Stat before hashing: a write racing with the hash leaves a newer
+            # mtime behind, so status will notice and rehash the file
+            st = os.stat(path)
+            entry = index.get(path)
+            if entry and entry_matches_stat(entry, st) and not (index_time and is_racy(entry, index_time)):
+                continue
+            todo.append(path)
+            stats.append(st)
+        try:
+            sha1s = hash_files(todo, git_dir, jobs)
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        staged = []
+        for path, st, sha1 in zip(todo, stats, sha1s):
+            entry = index.get(path)
+            mode = mode_from_stat(st)
+            if not (entry and entry.sha1 == sha1 and entry.mode == mode):
+                staged.append(path)
+            # Replaces any previous entry for the path, including conflict
+            # stages; an unchanged file only gets fresh stat data
+            index.add(make_entry(path, mode, sha1, st))
+    return staged
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python add.py <file_path> [<git_dir>]", file=sys.stderr)
+        print("Usage: python add.py <path>...", file=sys.stderr)
         sys.exit(1)
-    file_path = sys.argv[1]
-    git_dir = sys.argv[2] if len(sys.argv) > 2 else ".mygit"
-    add(file_path, git_dir)
\ No newline at end of file
+    add(sys.argv[1:])
@@ -1,47 +1,75 @@
 import os
 import sys
 from src.porcelain.rev_parse import rev_parse
-from src.porcelain.reset import reset
+from src.porcelain.reset import print_checkout_error, progress_printer
+from src.core.index import Index
+from src.core.model import get_commit
+from src.core.worktree import checkout_tree, CheckoutConflictError
+from src.core.refs import read_ref, update_ref, ref_transaction, RefLockedError, NULL_OID
 
 GIT_DIR = ".mygit"
 INDEX_FILE = os.path.join(GIT_DIR, "index")
 
 
-def checkout(target, create_branch=None, git_dir=GIT_DIR, index_path=INDEX_FILE):
+def head_commit(git_dir=GIT_DIR):
+    """
+    Return the commit HEAD points to, or None on a branch without commits.
+    """
+    return read_ref("HEAD", git_dir)
+
+def checkout(target, create_branch=None, git_dir=GIT_DIR, index_path=INDEX_FILE, jobs=None):
     """
     Switch to a branch or commit. Optionally create a new branch.
+    Only the files that differ between the index and the target are
+    written or deleted; the switch is refused if it would overwrite
+    local changes.
     Args:
         target (str): Branch name or commit SHA to checkout.
         create_branch (str, optional): Name of new branch to create and checkout.
         git_dir (str): Path to the .mygit directory.
         index_path (str): Path to the index file.
+        jobs (int, optional): Number of processes writing files
+            (default: checkout.workers config, else CPU count).
     """
-    head_path = os.path.join(git_dir, "HEAD")
-    refs_heads_dir = os.path.join(git_dir, "refs", "heads")
-    os.makedirs(refs_heads_dir, exist_ok=True)
-
     # If -b <branch> is specified, create a new branch pointing to current HEAD
     if create_branch:
-        branch_ref = os.path.join(refs_heads_dir, create_branch)
-        if os.path.exists(branch_ref):
+        if read_ref(f"refs/heads/{create_branch}", git_dir) is not None:
             print(f"Error: branch '{create_branch}' already exists.", file=sys.stderr)
             sys.exit(1)
         # Get current HEAD commit
         current_commit = rev_parse("HEAD", git_dir)
-        with open(branch_ref, "w") as f:
-            f.write(current_commit + "\n")
+        try:
+            # Created only if it still does not exist once locked
+            update_ref(f"refs/heads/{create_branch}", current_commit, NULL_OID, git_dir)
+        except (RefLockedError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
         # Now set target to the new branch
         target = create_branch
 
     # Resolve the target (branch name, tag, or SHA)
-    branch_path = os.path.join(refs_heads_dir, target)
-    if os.path.exists(branch_path):
+    if read_ref(f"refs/heads/{target}", git_dir) is not None:
         commit_sha = rev_parse(target, git_dir)
-        # Update HEAD to point to the branch
-        with open(head_path, "w") as f:
-            f.write(f"ref: refs/heads/{target}\n")
+        current = head_commit(git_dir)
+        head_tree = get_commit(current, git_dir).tree if current else None
         # Update index and working directory to match the commit
-        reset(commit_sha, mode="hard", git_dir=git_dir, index_path=index_path)
+        with Index.locked(index_path) as index:
+            try:
+                checkout_tree(index, get_commit(commit_sha, git_dir).tree, git_dir, head_tree=head_tree,
+                              jobs=jobs, progress=progress_printer())
+            except CheckoutConflictError as e:
+                print_checkout_error(e)
+                sys.exit(1)
+            except OSError as e:
+                print(f"error: {e}", file=sys.stderr)
+                sys.exit(1)
+        # Update HEAD to point to the branch
+        try:
+            with ref_transaction(git_dir) as transaction:
+                transaction.set_symbolic("HEAD", f"refs/heads/{target}")
+        except RefLockedError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
         print(f"Switched to branch {target}")
     else:
         print(f"Error: reference '{target}' not found.", file=sys.stderr)
@@ -52,6 +80,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Switch to a branch or commit. Optionally create a new branch.")
     parser.add_argument("target", help="Branch name or commit SHA to checkout")
     parser.add_argument("-b", dest="create_branch", help="Create a new branch and check it out", default=None)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of processes writing files")
     parser.add_argument("--git-dir", default=GIT_DIR, help="Path to the .mygit directory")
     args = parser.parse_args()
-    checkout(args.target, create_branch=args.create_branch, git_dir=args.git_dir, index_path=os.path.join(args.git_dir, "index")) 
\ No newline at end of file
+    checkout(args.target, create_branch=args.create_branch, git_dir=args.git_dir,
+             index_path=os.path.join(args.git_dir, "index"), jobs=args.jobs) 
\ No newline at end of file
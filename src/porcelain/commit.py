@@ -1,10 +1,6 @@
 # python
 import os
-import time
-import hashlib
-import zlib
-import io
-import sys
+from src.core.index import Index
 
 GIT_DIR = ".mygit"
 INDEX_FILE = os.path.join(GIT_DIR, "index")
@@ -16,19 +12,14 @@ def read_index():
     Returns:
         dict: {filename: sha1}
     """
-    index = {}
-    if not os.path.exists(INDEX_FILE):
-        return index
-    with open(INDEX_FILE, "r") as f:
-        for line in f:
-            parts = line.strip().split(" ")
-            if len(parts) == 3:
-                _, filename, sha1 = parts
-                index[filename] = sha1
-    return index
+    return {e.path: e.sha1 for e in Index.read(INDEX_FILE) if not e.stage}
 
 from src.plumbing.write_tree import write_tree
-from src.porcelain.rev_parse import rev_parse
+from src.plumbing.commit_tree import create_commit
+from src.core.objects import batch_writes
+from src.core.commit_graph import update_commit_graph
+from src.core.refs import NULL_OID, read_ref
+from src.porcelain.reset import move_head
 
 def commit(message):
     """
@@ -42,74 +33,24 @@ def commit(message):
         print("Nothing to commit, the index is empty.")
         return
 
-    tree_sha = write_tree()
-    content_str = f"tree {tree_sha}\n"
-    
-    parent_sha = None
-    head_path = os.path.join(GIT_DIR, "HEAD")
-    if os.path.exists(head_path):
-        with open(head_path) as f:
-            head_content = f.read().strip()
-        
-        is_initial_commit = False
-        if head_content.startswith("ref: "):
-            ref_path = os.path.join(GIT_DIR, head_content[5:].strip())
-            if not os.path.exists(ref_path):
-                is_initial_commit = True
-        
-        if not is_initial_commit and head_content:
-            old_stdout = sys.stdout
-            sys.stdout = io.StringIO()
-            try:
-                parent_sha = rev_parse("HEAD", git_dir=GIT_DIR)
-            except SystemExit:
-                parent_sha = None
-            finally:
-                sys.stdout = old_stdout
+    # None for the first commit of a branch; the branch may be loose or packed
+    parent_sha = read_ref("HEAD", GIT_DIR)
 
-    if parent_sha:
-        content_str += f"parent {parent_sha}\n"
-    
-    timestamp = int(time.time())
-    # 2. Build the commit content with the tree line
-    content_str += f"message: {message}\ntimestamp: {timestamp}\n"
-    for fname, sha1 in index.items():
-        content_str += f"  {fname}: {sha1}\n"
-    # Git format: header + content
-    header = f"commit {len(content_str)}\0".encode()
-    full_data = header + content_str.encode()
-    commit_hash = hashlib.sha1(full_data).hexdigest()
-    # Store the commit object in .mygit/objects/
-    obj_dir = os.path.join(GIT_DIR, "objects", commit_hash[:2])
-    obj_path = os.path.join(obj_dir, commit_hash[2:])
-    os.makedirs(obj_dir, exist_ok=True)
-    compressed = zlib.compress(full_data)
-    with open(obj_path, "wb") as f:
-        f.write(compressed)
+    # Tree and commit objects are synced together once both are written
+    with batch_writes():
+        tree_sha = write_tree()
+        # The commit only references the tree: its size does not depend on the number of files
+        commit_hash = create_commit(tree_sha, message, parent_sha, GIT_DIR)
     # (Optional) also write to .mygit/commits/ for debugging
     # commit_file = os.path.join(COMMITS_DIR, commit_hash)
     # with open(commit_file, "w") as f:
     #     f.write(content_str)
     print(f"Commit created: {commit_hash}")
+    update_commit_graph(GIT_DIR, [commit_hash])
 
-    head_path = os.path.join(GIT_DIR, "HEAD")
-    if os.path.exists(head_path):
-        with open(head_path) as f:
-            content = f.read().strip()
-        if content.startswith("ref: "):
-            ref_rel = content[5:].strip()
-            ref_path = os.path.join(GIT_DIR, ref_rel)
-            os.makedirs(os.path.dirname(ref_path), exist_ok=True)
-            with open(ref_path, "w") as rf:
-                rf.write(commit_hash + "\n")
-        else:
-            # detached HEAD, write directly
-            with open(head_path, "w") as f:
-                f.write(commit_hash + "\n")
-    else:
-        # HEAD does not exist, create it and point to commit
-        with open(head_path, "w") as f:
-            f.write(commit_hash + "\n")
+    # HEAD (or its branch) must still point to the parent: a commit made
+    # meanwhile by another process is not overwritten
+    move_head(commit_hash, GIT_DIR, parent_sha or NULL_OID)
 
 # For CLI integration:
 # from src.porcelain.commit import commit as commit_func
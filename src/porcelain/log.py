@@ -1,65 +1,109 @@
 import os
-from src.porcelain.rev_parse import rev_parse
-from src.plumbing.cat_file import read_object
+import re
+import sys
+import time
+from src.porcelain.rev_parse import resolve_revision
+from src.core.commit import parse_identity
+from src.core.model import get_object, Commit
+from src.core.revision import walk_revisions, parse_date, normalize_pathspec, touches_paths
 
-def parse_commit(content):
+def format_date(timestamp, timezone):
     """
-    Parse the content of a commit object and extract its information.
+    Format a commit time like Git's default log format, in the commit's own time zone.
     Args:
-        content (bytes): The raw content of the commit object.
+        timestamp (int): Seconds since the epoch.
+        timezone (str): '+hhmm' or '-hhmm'.
     Returns:
-        dict: Parsed commit information (tree, parent, author, committer, message).
+        str: e.g. 'Mon Jan 1 12:00:00 2024 +0100'.
     """
-    lines = content.decode().splitlines()
-    commit_info = {}
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        if line.startswith('tree '):
-            commit_info['tree'] = line[5:].strip()
-        elif line.startswith('parent '):
-            commit_info['parent'] = line[7:].strip()
-        elif line.startswith('author '):
-            commit_info['author'] = line[7:].strip()
-        elif line.startswith('committer '):
-            commit_info['committer'] = line[10:].strip()
-        elif line.strip() == '':
-            # The rest is the commit message
-            commit_info['message'] = '\n'.join(lines[i+1:]).strip()
-            break
-        i += 1
-    return commit_info
+    sign = -1 if timezone.startswith("-") else 1
+    digits = timezone.lstrip("+-").rjust(4, "0")
+    offset = sign * (int(digits[:2]) * 3600 + int(digits[2:]) * 60)
+    t = time.gmtime(timestamp + offset)
+    return f"{time.strftime('%a %b', t)} {t.tm_mday} {time.strftime('%H:%M:%S %Y', t)} {timezone}"
 
-def log(git_dir='.mygit'):
+def format_commit(oid, commit, oneline=False):
     """
-    Print the commit history starting from HEAD.
+    Format one commit for log.
     Args:
-        git_dir (str): Path to the .mygit directory.
+        oid (str): Commit SHA-1.
+        commit (Commit): The commit.
+        oneline (bool): Only print the SHA-1 and the first line of the message.
+    Returns:
+        str: The formatted commit, without a trailing newline.
     """
-    # Get HEAD commit SHA
-    head_sha = rev_parse('HEAD', git_dir)
-    if isinstance(head_sha, str):
-        current = head_sha
+    message = commit.message
+    if oneline:
+        return f"{oid} {message.splitlines()[0] if message else ''}"
+    lines = [f"commit {oid}"]
+    if len(commit.parents) > 1:
+        lines.append("Merge: " + " ".join(parent[:7] for parent in commit.parents))
+    if commit.author is not None:
+        name, email, timestamp, timezone = parse_identity(commit.author)
+        lines.append(f"Author: {name} <{email}>")
     else:
-        # rev_parse prints and returns, so if not string, try to read HEAD manually
-        with open(os.path.join(git_dir, 'HEAD')) as f:
-            ref = f.read().strip()
-        if ref.startswith('ref: '):
-            ref_path = os.path.join(git_dir, ref[5:].strip())
-            with open(ref_path) as rf:
-                current = rf.read().strip()
-        else:
-            current = ref
-    while current:
-        obj_type, content = read_object(current, git_dir)
-        if obj_type != 'commit':
-            print(f"Object {current} is not a commit.")
-            break
-        info = parse_commit(content)
-        # Format oneline compatible avec git log --pretty=oneline
-        print(f"message: {info.get('message', '')}")
-        parent = info.get('parent')
-        if parent:
-            current = parent
-        else:
-            break
+        # Commits in the old format only record a timestamp
+        timestamp, timezone = commit.timestamp, "+0000"
+    lines.append(f"Date:   {format_date(timestamp, timezone)}")
+    lines.append("")
+    lines.extend(f"    {line}" for line in message.splitlines())
+    return "\n".join(lines)
+
+def log(git_dir='.mygit', revisions=None, max_count=None, since=None, until=None,
+        author=None, oneline=False, first_parent=False, paths=None):
+    """
+    Print the commit history reachable from some revisions, newest first.
+    Commits are printed as they are found, so limited output (-n, --since)
+    does not walk the rest of the history.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        revisions (list, optional): Revisions to start from (default: HEAD).
+        max_count (int, optional): Print at most this many commits.
+        since (str, optional): Only commits more recent than this date.
+        until (str, optional): Only commits older than this date.
+        author (str, optional): Only commits whose author matches this regular expression.
+        oneline (bool): One line per commit.
+        first_parent (bool): Only follow the first parent of merge commits.
+        paths (list, optional): Only commits changing one of these paths
+            (relative to the repository root).
+    Returns:
+        int: Number of commits printed.
+    """
+    try:
+        since_ts = parse_date(since) if since else None
+        until_ts = parse_date(until) if until else None
+        author_re = re.compile(author) if author else None
+    except (ValueError, re.error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    paths = [normalize_pathspec(path) for path in paths or []]
+    if "" in paths:
+        # The root matches every commit
+        paths = []
+    tips = [resolve_revision(rev, git_dir) for rev in (revisions or ["HEAD"])]
+    if max_count is not None and max_count <= 0:
+        return 0
+    printed = 0
+    try:
+        for oid, info in walk_revisions(tips, git_dir, first_parent=first_parent, since=since_ts):
+            if until_ts is not None and info.timestamp > until_ts:
+                continue
+            if paths and not touches_paths(oid, info, paths, git_dir):
+                continue
+            commit = get_object(oid, git_dir)
+            if not isinstance(commit, Commit):
+                print(f"Object {oid} is not a commit.", file=sys.stderr)
+                break
+            if author_re and not author_re.search(commit.author or ""):
+                continue
+            if printed and not oneline:
+                print()
+            print(format_commit(oid, commit, oneline), flush=True)
+            printed += 1
+            if max_count is not None and printed >= max_count:
+                break
+    except BrokenPipeError:
+        # The reader (e.g. a pager or head) went away: stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    return printed
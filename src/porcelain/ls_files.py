@@ -1,4 +1,6 @@
+import os
 import sys
+from src.core.index import Index
 
 def ls_files(index_path=".mygit/index"):
     """
@@ -6,15 +8,12 @@ def ls_files(index_path=".mygit/index"):
     Args:
         index_path (str): Path to the index file.
     """
-    try:
-        with open(index_path) as idx:
-            for line in idx:
-                parts = line.strip().split()
-                if len(parts) >= 2:
-                    print(parts[1])
-    except FileNotFoundError:
+    if not os.path.exists(index_path):
         print(f"Index file not found: {index_path}", file=sys.stderr)
         sys.exit(1)
+    # Conflicted paths have one entry per stage but are listed once
+    for path in Index.read(index_path).paths():
+        print(path)
 
 if __name__ == "__main__":
     ls_files() 
\ No newline at end of file
@@ -1,22 +1,34 @@
 import sys
-from src.plumbing.cat_file import read_object
+from src.core.model import get_object, Tree
+from src.core.tree import is_tree_mode
 
-def ls_tree(tree_sha, git_dir=".mygit"):
-    obj_type, content = read_object(tree_sha, git_dir)
-    if obj_type != "tree":
+def ls_tree(tree_sha, git_dir=".mygit", recursive=False, prefix=""):
+    """
+    List the entries of a tree object.
+    Args:
+        tree_sha (str): SHA-1 of the tree object.
+        git_dir (str): Path to the .mygit directory.
+        recursive (bool): If True, list the files of subtrees instead of the subtrees.
+        prefix (str): Path of the tree, prepended to the names listed.
+    """
+    tree = get_object(tree_sha, git_dir)
+    if not isinstance(tree, Tree):
         print(f"Object {tree_sha} is not a tree", file=sys.stderr)
         sys.exit(1)
-    lines = content.decode().splitlines()
-    for line in lines:
-        parts = line.strip().split()
-        if len(parts) == 3:
-            mode, path, sha1 = parts
-            print(f"{mode} {sha1} {path}")
+    for mode, name, sha1 in tree:
+        path = prefix + name
+        if recursive and is_tree_mode(mode):
+            ls_tree(sha1, git_dir, recursive, path + "/")
+        else:
+            print(f"{mode.zfill(6)} {sha1} {path}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python ls_tree.py <tree_sha> [<git_dir>]", file=sys.stderr)
+        print("Usage: python ls_tree.py [-r] <tree_sha> [<git_dir>]", file=sys.stderr)
         sys.exit(1)
-    tree_sha = sys.argv[1]
-    git_dir = sys.argv[2] if len(sys.argv) > 2 else ".mygit"
-    ls_tree(tree_sha, git_dir) 
\ No newline at end of file
+    args = sys.argv[1:]
+    recursive = "-r" in args
+    args = [a for a in args if a != "-r"]
+    tree_sha = args[0]
+    git_dir = args[1] if len(args) > 1 else ".mygit"
+    ls_tree(tree_sha, git_dir, recursive)
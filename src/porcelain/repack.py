@@ -0,0 +1,163 @@
+import os
+import sys
+import re
+from collections import deque
+from src.plumbing.cat_file import read_object_header, read_object_uncached
+from src.core.pack import get_pack_dir, get_packs, write_pack
+from src.core.delta import create_delta
+
+GIT_DIR = ".mygit"
+
+# Commits first, then trees, then blobs: history walks touch a contiguous region
+TYPE_ORDER = {"commit": 0, "tag": 1, "tree": 2, "blob": 3}
+# Number of preceding objects tried as delta bases
+DEFAULT_WINDOW = 10
+# Longest delta chain a reader may have to resolve
+DEFAULT_DEPTH = 50
+# Objects smaller than this are not worth a delta
+MIN_DELTA_SIZE = 64
+# Objects larger than this are stored whole rather than held in the window:
+# the window may hold DEFAULT_WINDOW of them, and delta search is slow on big content
+BIG_FILE_THRESHOLD = 32 * 1024 * 1024
+
+
+def list_loose_objects(git_dir=GIT_DIR):
+    """
+    List the OIDs of all loose objects of a repository.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: Object IDs found under objects/xx/.
+    """
+    objects_dir = os.path.join(git_dir, "objects")
+    oids = []
+    if not os.path.isdir(objects_dir):
+        return oids
+    for prefix in os.listdir(objects_dir):
+        if not re.fullmatch(r"[0-9a-f]{2}", prefix):
+            continue
+        for name in os.listdir(os.path.join(objects_dir, prefix)):
+            if re.fullmatch(r"[0-9a-f]{38}", name):
+                oids.append(prefix + name)
+    return oids
+
+
+def collect_name_hints(content, hints):
+    """
+    Record the path under which a tree references each of its entries.
+    Objects sharing a name are likely revisions of the same file, hence
+    good delta candidates for each other.
+    """
+    for line in content.decode(errors="replace").splitlines():
+        parts = line.strip().split()
+        if len(parts) == 3:
+            _, path, sha1 = parts
+            hints.setdefault(sha1, path)
+
+
+def delta_sort_key(obj_type, oid, size, hints):
+    """
+    Order objects by type, then by name (basename first), then by decreasing size.
+    """
+    path = hints.get(oid, "")
+    return (TYPE_ORDER.get(obj_type, 4), os.path.basename(path), path, -size, oid)
+
+
+def find_deltas(ordered, git_dir, window=DEFAULT_WINDOW, depth=DEFAULT_DEPTH):
+    """
+    Stream objects in pack order, encoding each as a delta against the best
+    base among the previous `window` objects of the same type.
+    Args:
+        ordered (list): Object IDs in pack order.
+        git_dir (str): Path to the .mygit directory.
+        window (int): Number of candidate bases kept in the sliding window.
+        depth (int): Maximum delta chain length.
+    Yields:
+        tuple: (oid, object type, payload, base oid or None)
+    """
+    candidates = deque(maxlen=max(window, 0))
+    current_type = None
+    for oid in ordered:
+        # Each object is read once: going through the shared cache would only evict what others use
+        obj_type, content = read_object_uncached(oid, git_dir)
+        if obj_type != current_type:
+            candidates.clear()
+            current_type = obj_type
+        best = None
+        if window > 0 and MIN_DELTA_SIZE <= len(content) <= BIG_FILE_THRESHOLD:
+            max_size = len(content) // 2 - 20
+            for base_oid, base, base_depth in candidates:
+                if base_depth >= depth or len(content) < len(base) // 32:
+                    continue
+                delta = create_delta(base, content, max_size)
+                if delta is not None:
+                    best = (base_oid, delta, base_depth + 1)
+                    max_size = len(delta) - 1
+        if best:
+            base_oid, delta, obj_depth = best
+            yield oid, obj_type, delta, base_oid
+        else:
+            obj_depth = 0
+            yield oid, obj_type, content, None
+        if len(content) <= BIG_FILE_THRESHOLD:
+            candidates.append((oid, content, obj_depth))
+
+
+def repack(git_dir=GIT_DIR, window=DEFAULT_WINDOW, depth=DEFAULT_DEPTH):
+    """
+    Consolidate every loose object and existing pack into a single new pack,
+    then remove the loose objects and the old packs. Similar objects are
+    stored as deltas against each other.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+        window (int): Number of candidate bases tried for each object (0 disables deltas).
+        depth (int): Maximum delta chain length.
+    Returns:
+        str or None: Name of the new pack, or None if there was nothing to pack.
+    """
+    old_packs = list(get_packs(git_dir))
+    loose = list_loose_objects(git_dir)
+    oids = set(loose)
+    for pack in old_packs:
+        oids.update(pack.index)
+    if not oids:
+        print("Nothing to pack.")
+        return None
+
+    # Contents are read again while streaming, so only the delta window is held in memory
+    sizes = {}
+    hints = {}
+    for oid in oids:
+        obj_type, size = read_object_header(oid, git_dir)
+        if obj_type is None:
+            print(f"Error: object {oid} is corrupted, aborting repack.", file=sys.stderr)
+            sys.exit(1)
+        sizes[oid] = (obj_type, size)
+        if obj_type == "tree":
+            collect_name_hints(read_object_uncached(oid, git_dir)[1], hints)
+    ordered = sorted(oids, key=lambda oid: delta_sort_key(sizes[oid][0], oid, sizes[oid][1], hints))
+
+    name = write_pack(find_deltas(ordered, git_dir, window, depth), get_pack_dir(git_dir))
+
+    # The new pack holds everything: drop the old packs and the loose copies
+    for pack in old_packs:
+        if os.path.basename(pack.pack_path).startswith(name):
+            continue
+        pack.close()
+        for path in (pack.idx_path, pack.pack_path):
+            if os.path.exists(path):
+                os.remove(path)
+    objects_dir = os.path.join(git_dir, "objects")
+    for oid in loose:
+        os.remove(os.path.join(objects_dir, oid[:2], oid[2:]))
+        try:
+            os.rmdir(os.path.join(objects_dir, oid[:2]))
+        except OSError:
+            pass
+    print(f"Packed {len(ordered)} objects into {name}")
+    return name
+
+
+if __name__ == "__main__":
+    git_dir = sys.argv[1] if len(sys.argv) > 1 else GIT_DIR
+    repack(git_dir)
@@ -1,36 +1,17 @@
 import os
 import sys
 from src.porcelain.rev_parse import rev_parse
-from src.plumbing.cat_file import read_object
+from src.core.index import Index, make_entry
+from src.core.tree import flatten_tree, prime_cache_tree
+from src.core.model import get_object, Commit, Tree
+from src.core.worktree import checkout_tree, CheckoutConflictError
+from src.core.refs import read_ref, update_ref, RefLockedError, NULL_OID
 
 GIT_DIR = ".mygit"
 INDEX_FILE = os.path.join(GIT_DIR, "index")
 
 
-def parse_commit(content):
-    """
-    Parse the content of a commit object and extract its information.
-    Args:
-        content (bytes): The raw content of the commit object.
-    Returns:
-        dict: Parsed commit information (tree, parent, author, committer).
-    """
-    lines = content.decode().splitlines()
-    commit_info = {}
-    for line in lines:
-        if line.startswith('tree '):
-            commit_info['tree'] = line[5:].strip()
-        elif line.startswith('parent '):
-            commit_info['parent'] = line[7:].strip()
-        elif line.startswith('author '):
-            commit_info['author'] = line[7:].strip()
-        elif line.startswith('committer '):
-            commit_info['committer'] = line[10:].strip()
-        elif line.strip() == '':
-            break
-    return commit_info
-
-def reset(commit_ref, mode="mixed", git_dir=GIT_DIR, index_path=INDEX_FILE):
+def reset(commit_ref, mode="mixed", git_dir=GIT_DIR, index_path=INDEX_FILE, jobs=None):
     """
     Reset HEAD, index, and working directory to a given commit.
     Args:
@@ -38,66 +19,104 @@ def reset(commit_ref, mode="mixed", git_dir=GIT_DIR, index_path=INDEX_FILE):
         mode (str): Reset mode: 'soft', 'mixed', or 'hard'.
         git_dir (str): Path to the .mygit directory.
         index_path (str): Path to the index file.
+        jobs (int, optional): Number of processes writing files for --hard
+            (default: checkout.workers config, else CPU count).
     """
-    # 1. Resolve the commit
+    # 1. Resolve the commit, and remember where HEAD was to move it safely
+    head_before = read_ref("HEAD", git_dir) or NULL_OID
     commit_sha = rev_parse(commit_ref, git_dir)
     if not isinstance(commit_sha, str):
         # rev_parse may print and return None
         print(f"Unable to resolve {commit_ref}", file=sys.stderr)
         sys.exit(1)
     # 2. Read the commit object
-    obj_type, commit_content = read_object(commit_sha, git_dir)
-    if obj_type != "commit":
+    commit = get_object(commit_sha, git_dir)
+    if not isinstance(commit, Commit):
         print(f"{commit_sha} is not a commit.", file=sys.stderr)
         sys.exit(1)
-    commit_info = parse_commit(commit_content)
-    tree_sha = commit_info["tree"]
-    # 3. --soft: move HEAD
-    # HEAD can point to a ref or contain the SHA directly
-    head_path = os.path.join(git_dir, "HEAD")
-    with open(head_path) as f:
-        head_content = f.read().strip()
-    if head_content.startswith("ref: "):
-        ref_rel = head_content[5:].strip()
-        ref_path = os.path.join(git_dir, ref_rel)
-        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
-        with open(ref_path, "w") as rf:
-            rf.write(commit_sha + "\n")
-    else:
-        with open(head_path, "w") as f:
-            f.write(commit_sha + "\n")
+    tree_sha = commit.tree
+    # --soft: only move HEAD
     if mode == "soft":
+        move_head(commit_sha, git_dir, head_before)
         print(f"HEAD moved to {commit_sha}")
         return
-    # 4. --mixed: reset the index
-    obj_type, tree_content = read_object(tree_sha, git_dir)
-    if obj_type != "tree":
+    if not isinstance(get_object(tree_sha, git_dir), Tree):
         print(f"{tree_sha} is not a tree.", file=sys.stderr)
         sys.exit(1)
-    # Overwrite the index with the tree content
-    with open(index_path, "w") as idx:
-        for line in tree_content.decode().splitlines():
-            parts = line.strip().split()
-            if len(parts) == 3:
-                mode, path, sha1 = parts
-                idx.write(f"{mode} {path} {sha1}\n")
+    with Index.locked(index_path) as index:
+        if mode == "mixed":
+            # 3. --mixed: overwrite the index with the tree content, keeping the stat
+            # data of entries that do not change so status does not rehash them
+            trees = {}
+            tree_entries = flatten_tree(tree_sha, git_dir, trees=trees)
+            old_index = Index(index_path, index)
+            index.clear()
+            for path, (file_mode, sha1) in tree_entries.items():
+                old = old_index.get(path)
+                if old and old.sha1 == sha1 and old.mode == file_mode:
+                    index.add(old)
+                else:
+                    index.add(make_entry(path, file_mode, sha1))
+            # The index now matches the tree: the next commit reuses its subtrees
+            prime_cache_tree(index, trees)
+        else:
+            # 4. --hard: only the paths that differ from the tree (or were
+            # modified locally) are rewritten
+            try:
+                checkout_tree(index, tree_sha, git_dir, force=True, jobs=jobs, progress=progress_printer())
+            except CheckoutConflictError as e:
+                print_checkout_error(e)
+                sys.exit(1)
+            except OSError as e:
+                print(f"error: {e}", file=sys.stderr)
+                sys.exit(1)
+    # 5. Move HEAD once the index and working directory are updated
+    move_head(commit_sha, git_dir, head_before)
     if mode == "mixed":
         print(f"Index reset to {tree_sha}")
-        return
-    # 5. --hard: reset the working directory
-    for line in tree_content.decode().splitlines():
-        parts = line.strip().split()
-        if len(parts) == 3:
-            mode, path, sha1 = parts
-            obj_type, blob_content = read_object(sha1, git_dir)
-            if obj_type != "blob":
-                continue
-            dir_path = os.path.dirname(path)
-            if dir_path:
-                os.makedirs(dir_path, exist_ok=True)
-            with open(path, "wb") as f:
-                f.write(blob_content)
-    print(f"Working directory reset to {tree_sha}")
+    else:
+        print(f"Working directory reset to {tree_sha}")
+
+def move_head(commit_sha, git_dir=GIT_DIR, old=None):
+    """
+    Point HEAD, or the branch it refers to, to a commit. The ref is updated
+    under its lock file; exits with an error if HEAD no longer points to
+    `old` (another process moved it) or is locked.
+    Args:
+        commit_sha (str): Commit SHA-1.
+        git_dir (str): Path to the .mygit directory.
+        old (str, optional): Commit HEAD is expected to point to (NULL_OID
+            for a branch without commits), None to skip the check.
+    """
+    try:
+        update_ref("HEAD", commit_sha, old, git_dir)
+    except (RefLockedError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def progress_printer(title="Updating files"):
+    """
+    Return a progress callback printing '<title>: <pct>% (<done>/<total>)'
+    on stderr, or None when stderr is not a terminal.
+    """
+    if not sys.stderr.isatty():
+        return None
+
+    def report(done, total):
+        end = ", done.\n" if done == total else ""
+        print(f"\r{title}: {done * 100 // total}% ({done}/{total}){end}", end="", file=sys.stderr, flush=True)
+    return report
+
+def print_checkout_error(error):
+    """
+    Report the paths that stopped a working tree update.
+    Args:
+        error (CheckoutConflictError): The error.
+    """
+    print(f"error: {error}:", file=sys.stderr)
+    for path in error.paths:
+        print(f"\t{path}", file=sys.stderr)
+    print("Aborting", file=sys.stderr)
 
 if __name__ == "__main__":
     import argparse
@@ -106,6 +125,7 @@ if __name__ == "__main__":
     parser.add_argument("--soft", action="store_true", help="Move HEAD only")
     parser.add_argument("--mixed", action="store_true", help="Move HEAD and reset the index (default)")
     parser.add_argument("--hard", action="store_true", help="Move HEAD, reset the index and the working directory")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of processes writing files")
     parser.add_argument("--git-dir", default=GIT_DIR, help="Path to the .mygit directory")
     args = parser.parse_args()
     if args.soft:
@@ -114,4 +134,4 @@ if __name__ == "__main__":
         mode = "hard"
     else:
         mode = "mixed"
-    reset(args.commit_ref, mode=mode, git_dir=args.git_dir, index_path=os.path.join(args.git_dir, "index")) 
\ No newline at end of file
+    reset(args.commit_ref, mode=mode, git_dir=args.git_dir, index_path=os.path.join(args.git_dir, "index"), jobs=args.jobs) 
\ No newline at end of file
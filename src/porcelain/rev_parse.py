@@ -1,10 +1,56 @@
 import os
 import sys
 import re
+from src.plumbing.cat_file import object_exists
+from src.core.commit_graph import lookup_commit
+from src.core.refs import dwim_ref
+from src.core.abbrev import resolve_abbrev, AmbiguousObjectError, HEX_PREFIX_RE
 
 def rev_parse(ref, git_dir=".mygit"):
     """
-    Resolve a reference (branch, tag, HEAD, or SHA-1) to its commit SHA-1.
+    Resolve a reference (branch, tag, HEAD, or SHA-1) to its commit SHA-1 and print it.
+    A SHA-1 may be abbreviated to a unique prefix of at least 4 characters.
+    Ancestry suffixes are supported: '<ref>~<n>' is the n-th first-parent
+    ancestor and '<ref>^<n>' the n-th parent ('~' and '^' alone mean 1).
+    Args:
+        ref (str): Reference name or SHA-1.
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        str: The resolved SHA-1 string.
+    """
+    sha = resolve_revision(ref, git_dir)
+    print(sha)
+    return sha
+
+def resolve_revision(ref, git_dir=".mygit"):
+    """
+    Resolve a revision like rev_parse, without printing it.
+    Parents are read from the commit-graph when it has the commits.
+    """
+    match = re.fullmatch(r"(.+?)((?:[~^][0-9]*)+)", ref)
+    if not match:
+        return resolve_ref(ref, git_dir)
+    sha = resolve_ref(match.group(1), git_dir)
+    for op, count in re.findall(r"([~^])([0-9]*)", match.group(2)):
+        count = int(count) if count else 1
+        steps = [1] * count if op == "~" else [count]
+        for nth in steps:
+            if nth == 0:
+                continue
+            info = lookup_commit(sha, git_dir)
+            if info is None:
+                print(f"Error: {sha} is not a commit.", file=sys.stderr)
+                sys.exit(1)
+            if len(info.parents) < nth:
+                print(f"Error: revision '{ref}' does not exist.", file=sys.stderr)
+                sys.exit(1)
+            sha = info.parents[nth - 1]
+    return sha
+
+def resolve_ref(ref, git_dir=".mygit"):
+    """
+    Resolve a reference (branch, tag, HEAD, SHA-1 or unique SHA-1 prefix of
+    at least 4 characters) to its SHA-1, without printing it.
     Args:
         ref (str): Reference name or SHA-1.
         git_dir (str): Path to the .mygit directory.
@@ -13,9 +59,7 @@ def rev_parse(ref, git_dir=".mygit"):
     """
     # 1. If it's a full SHA-1 (40 hex characters)
     if re.fullmatch(r"[0-9a-fA-F]{40}", ref):
-        obj_path = os.path.join(git_dir, "objects", ref[:2], ref[2:])
-        if os.path.exists(obj_path):
-            print(ref)
+        if object_exists(ref, git_dir):
             return ref
         else:
             print(f"Error: object {ref} does not exist.", file=sys.stderr)
@@ -34,23 +78,27 @@ def rev_parse(ref, git_dir=".mygit"):
         else:
             # HEAD contains a SHA-1 directly
             if re.fullmatch(r"[0-9a-fA-F]{40}", content):
-                print(content)
                 return content
             else:
                 print("Error: Invalid HEAD.", file=sys.stderr)
                 sys.exit(1)
 
-    # 3. If it's a reference (branch or tag)
-    # Search in heads, then tags, then absolute ref
-    for ref_path in [
-        os.path.join(git_dir, "refs", "heads", ref),
-        os.path.join(git_dir, "refs", "tags", ref),
-        os.path.join(git_dir, ref) if ref.startswith("refs/") else None
-    ]:
-        if ref_path and os.path.exists(ref_path):
-            with open(ref_path) as f:
-                sha = f.read().strip()
-            print(sha)
+    # 3. If it's a reference: a branch, then a tag, then a full ref name,
+    # loose or packed
+    found = dwim_ref(ref, git_dir)
+    if found:
+        return found[1]
+
+    # 4. If it's an abbreviated SHA-1 (at least 4 hex characters)
+    if HEX_PREFIX_RE.fullmatch(ref):
+        try:
+            sha = resolve_abbrev(ref, git_dir)
+        except AmbiguousObjectError as e:
+            print(f"Error: {e}. The candidates are:", file=sys.stderr)
+            for candidate in e.candidates:
+                print(f"  {candidate}", file=sys.stderr)
+            sys.exit(1)
+        if sha:
             return sha
 
     print(f"Error: reference '{ref}' not found.", file=sys.stderr)
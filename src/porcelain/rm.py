@@ -1,5 +1,6 @@
 import os
 import sys
+from src.core.index import Index
 
 GIT_DIR = ".mygit"
 INDEX_FILE = os.path.join(GIT_DIR, "index")
@@ -18,20 +19,10 @@ def rm(file_path, git_dir=GIT_DIR, index_path=INDEX_FILE, cached=False):
     if not os.path.exists(index_path):
         print(f"Index file not found: {index_path}", file=sys.stderr)
         sys.exit(1)
-    new_lines = []
-    removed = False
-    with open(index_path, "r") as idx:
-        for line in idx:
-            parts = line.strip().split()
-            if len(parts) >= 2 and parts[1] == rel_path:
-                removed = True
-                continue  # skip this line (removes from index)
-            new_lines.append(line)
-    if not removed:
-        print(f"File '{rel_path}' not found in index.", file=sys.stderr)
-        sys.exit(1)
-    with open(index_path, "w") as idx:
-        idx.writelines(new_lines)
+    with Index.locked(index_path) as index:
+        if not index.remove(rel_path):
+            print(f"File '{rel_path}' not found in index.", file=sys.stderr)
+            sys.exit(1)
     # Remove from working directory if not cached
     if not cached:
         if os.path.exists(file_path):
@@ -1,22 +1,20 @@
-import os
+from src.core.refs import list_refs
 
 def show_ref(git_dir=".mygit"):
-    refs_dir = os.path.join(git_dir, "refs")
-    for ref_type in ["heads", "tags"]:
-        ref_path = os.path.join(refs_dir, ref_type)
-        if not os.path.isdir(ref_path):
-            continue
-        for ref_name in os.listdir(ref_path):
-            full_ref = f"refs/{ref_type}/{ref_name}"
-            ref_file = os.path.join(ref_path, ref_name)
-            try:
-                with open(ref_file, "r") as f:
-                    sha = f.read().strip()
-                print(f"{sha} {full_ref}")
-            except Exception:
-                continue
+    """
+    Print every ref under refs/ with its SHA-1, sorted by name (like git show-ref).
+    Nested names ('refs/heads/feature/x') and packed refs are listed too.
+    Args:
+        git_dir (str): Path to the .mygit directory.
+    Returns:
+        list: The (ref name, SHA-1) tuples printed.
+    """
+    refs = list_refs(git_dir)
+    for name, sha in refs:
+        print(f"{sha} {name}")
+    return refs
 
 if __name__ == "__main__":
     import sys
     git_dir = sys.argv[1] if len(sys.argv) > 1 else ".mygit"
-    show_ref(git_dir) 
\ No newline at end of file
+    show_ref(git_dir)
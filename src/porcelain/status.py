@@ -1,39 +1,18 @@
 import os
-import hashlib
+from src.plumbing.hash_object import hash_file
+from src.core.index import Index, make_entry, entry_matches_stat, is_racy, index_mtime, mode_from_stat
 
 # Chemin du dossier où on stocke les données Git
 GIT_DIR = ".mygit"
 # Chemin du fichier d'index qui référence les fichiers suivis
 INDEX_FILE = os.path.join(GIT_DIR, "index")
 
-def read_index():
-    index = {}
-    # Si le fichier d'index n'existe pas, on retourne un dictionnaire vide
-    if not os.path.exists(INDEX_FILE):
-        return index
-    # On ouvre le fichier d'index en lecture
-    with open(INDEX_FILE, "r") as f:
-        for line in f:
-            #On découpe chaque ligne en 3 parties : mode, nom du fichier, sha1
-            parts = line.strip().split(" ")
-            if len(parts) == 3:
-                _, filename, sha1 = parts
-                index[filename] = sha1
+def read_index(index_path=INDEX_FILE):
     # On retourne le dictionnaire avec {nom_fichier: sha1}
-    return index
-
-# Fonction qui calcule le hash (sha1) d'un fichier selon le format Git
-def hash_file(path):
-    with open(path, "rb") as f:
-        data = f.read()
-    # On ajoute un header comme Git ("blob <taille>\0") avant les données
-    header = f"blob {len(data)}\0".encode()
-    # On calcule le sha1 sur le header + les données
-    return hashlib.sha1(header + data).hexdigest()
+    return {e.path: e.sha1 for e in Index.read(index_path)}
 
 # Fonction principale qui affiche l'état du dépôt (comme "git status")
-def status():
-    index = read_index()  # On récupère les fichiers suivis (dans l'index)
+def status(index_path=INDEX_FILE):
     wd_files = []         # Liste des fichiers dans le working directory (le dossier courant)
 
     # On parcourt tous les fichiers du dossier courant (récursivement)
@@ -52,15 +31,33 @@ def status():
     modified = [] # fichiers suivis mais modifiés depuis le dernier ajout à l'index
     untracked = [] # fichiers non suivis par Git
 
-    # Pour chaque fichier de l'index
-    for fname, sha1 in index.items():
-        if not os.path.exists(fname):
-            continue # Si le fichier a été supprimé du dossier, on l'ignore ici
-        current_sha1 = hash_file(fname) # On calcule son sha1 actuel
-        if current_sha1 == sha1:
-            staged.append(fname) # Il est prêt à être commit (pas changé)
-        else:
-            modified.append(fname) # Il a été modifié depuis l'index
+    # On verrouille l'index pour pouvoir y enregistrer les données stat rafraîchies.
+    # S'il est déjà verrouillé par une autre commande, on le lit simplement sans rien écrire
+    with Index.locked(index_path, optional=True) as index:
+        index_time = index_mtime(index_path)  # Date d'écriture de l'index, pour détecter les entrées "racy"
+        unmerged = index.unmerged_paths() # fichiers en conflit après un merge
+
+        # Pour chaque fichier de l'index
+        for entry in list(index):
+            if entry.stage:
+                continue
+            fname = entry.path
+            try:
+                st = os.stat(fname)
+            except FileNotFoundError:
+                continue # Si le fichier a été supprimé du dossier, on l'ignore ici
+            # Si les données stat n'ont pas bougé, le fichier n'a pas changé : pas besoin de le relire.
+            # Sauf s'il a été modifié dans la même "tranche" de temps que l'écriture de l'index (racy)
+            if entry_matches_stat(entry, st) and not (index_time and is_racy(entry, index_time)):
+                staged.append(fname)
+                continue
+            current_sha1 = hash_file(fname) # On calcule son sha1 actuel
+            if current_sha1 == entry.sha1 and entry.mode == mode_from_stat(st):
+                staged.append(fname) # Il est prêt à être commit (pas changé)
+                # On enregistre les nouvelles données stat pour ne plus le relire la prochaine fois
+                index.add(make_entry(fname, entry.mode, entry.sha1, st))
+            else:
+                modified.append(fname) # Il a été modifié depuis l'index
 
     # On cherche tous les fichiers qui sont dans le dossier mais pas dans l'index
     for fname in wd_files:
@@ -76,12 +73,16 @@ def status():
         print("Modified files (not staged):")
         for f in modified:
             print(f"  {f}")
+    if unmerged:
+        print("Unmerged paths:")
+        for f in unmerged:
+            print(f"  {f}")
     if untracked:
         print("Untracked files:")
         for f in untracked:
             print(f"  {f}")
     # Si tout est vide, le dossier est "propre"
-    if not (staged or modified or untracked):
+    if not (staged or modified or unmerged or untracked):
         print("Nothing to commit, working tree clean.")
 
 # Si on lance ce fichier directement, on exécute la commande status
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.objects import write_object, get_object_path
+from src.plumbing.cat_file import read_object
+from src.core.pack import write_pack, get_pack_dir
+from src.core.abbrev import find_by_prefix, resolve_abbrev, loose_oids, AmbiguousObjectError
+from src.porcelain.rev_parse import resolve_revision
+
+class TestAbbrev(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _objects_sharing_prefix(self, length):
+        # Blobs written until two share their first `length` hex characters
+        seen = {}
+        i = 0
+        while True:
+            oid = write_object(str(i).encode(), "blob", self.git_dir)
+            if oid[:length] in seen:
+                return seen[oid[:length]], oid
+            seen[oid[:length]] = oid
+            i += 1
+
+    def test_loose_prefixes(self):
+        first, second = self._objects_sharing_prefix(4)
+        self.assertEqual(resolve_abbrev(first[:8].upper(), self.git_dir), first)
+        self.assertIsNone(resolve_abbrev("f" * 40, self.git_dir))
+        with self.assertRaises(AmbiguousObjectError) as ctx:
+            resolve_abbrev(first[:4], self.git_dir)
+        self.assertEqual(ctx.exception.candidates, sorted([first, second]))
+        with self.assertRaises(ValueError):
+            find_by_prefix("abc", self.git_dir)
+        # A new object in the same directory is seen
+        self.assertIn(first, loose_oids(first[:2], self.git_dir))
+
+    def test_packed_prefixes(self):
+        first, second = self._objects_sharing_prefix(4)
+        loose = write_object(b"loose only", "blob", self.git_dir)
+        # Move the two objects into a pack
+        objects = []
+        for oid in (first, second):
+            objects.append((oid, "blob", read_object(oid, self.git_dir)[1], None))
+            os.remove(get_object_path(oid, self.git_dir))
+        write_pack(objects, get_pack_dir(self.git_dir))
+        self.assertEqual(find_by_prefix(first[:8], self.git_dir), [first])
+        self.assertEqual(find_by_prefix(first[:4], self.git_dir), sorted([first, second]))
+        self.assertEqual(find_by_prefix(loose[:5], self.git_dir), [loose])
+
+    def test_rev_parse_short_sha(self):
+        first, second = self._objects_sharing_prefix(4)
+        self.assertEqual(resolve_revision(first[:7], self.git_dir), first)
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as err:
+            with self.assertRaises(SystemExit):
+                resolve_revision(first[:4], self.git_dir)
+        self.assertIn("ambiguous", err.getvalue())
+        self.assertIn(second, err.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.objects import write_object
+from src.core.tree import serialize_tree, TREE_MODE
+from src.core.bloom import (murmur3_32, build_filter, filter_contains, changed_paths,
+                            path_and_parents, LARGE_FILTER, EMPTY_FILTER)
+
+class TestBloom(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _tree(self, files):
+        # files: {name: content or nested dict}
+        entries = []
+        for name, value in files.items():
+            if isinstance(value, dict):
+                entries.append((TREE_MODE, name, self._tree(value)))
+            else:
+                entries.append(("100644", name, write_object(value, "blob", self.git_dir)))
+        return write_object(serialize_tree(entries), "tree", self.git_dir)
+
+    def test_murmur3(self):
+        self.assertEqual(murmur3_32(b"", 0), 0)
+        self.assertEqual(murmur3_32(b"", 1), 0x514E28B7)
+        self.assertEqual(murmur3_32(b"Hello world!", 0), 0x627B0C2C)
+        self.assertEqual(murmur3_32(b"The quick brown fox jumps over the lazy dog", 0), 0x2E4FF723)
+
+    def test_filter(self):
+        paths = set(path_and_parents("src/core/index.py")) | {"README.md"}
+        bloom = build_filter(paths)
+        self.assertEqual(len(bloom), (4 * 10 + 7) // 8)
+        for path in paths:
+            self.assertTrue(filter_contains(bloom, path))
+        misses = [p for p in (f"file{i}.txt" for i in range(200)) if not filter_contains(bloom, p)]
+        self.assertGreater(len(misses), 180)
+        self.assertFalse(filter_contains(EMPTY_FILTER, "README.md"))
+        self.assertTrue(filter_contains(LARGE_FILTER, "anything/at/all"))
+        self.assertEqual(build_filter(None), LARGE_FILTER)
+
+    def test_changed_paths(self):
+        old = self._tree({"a.txt": b"a", "lib": {"x.py": b"1", "y.py": b"y"}, "doc": {"r.md": b"r"}})
+        new = self._tree({"a.txt": b"a", "lib": {"x.py": b"2", "y.py": b"y"}, "doc": {"r.md": b"r"}, "b.txt": b"b"})
+        self.assertEqual(changed_paths(old, new, self.git_dir), {"lib", "lib/x.py", "b.txt"})
+        self.assertEqual(changed_paths(None, old, self.git_dir),
+                         {"a.txt", "lib", "lib/x.py", "lib/y.py", "doc", "doc/r.md"})
+        self.assertEqual(changed_paths(old, old, self.git_dir), set())
+        self.assertIsNone(changed_paths(None, old, self.git_dir, limit=3))
+
+if __name__ == "__main__":
+    unittest.main()
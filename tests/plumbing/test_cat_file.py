@@ -7,7 +7,7 @@ import io
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.plumbing.hash_object import hash_object
-from src.plumbing.cat_file import cat_file
+from src.plumbing.cat_file import cat_file, cat_file_batch, read_object_header
 
 class TestCatFile(unittest.TestCase):
     def setUp(self):
@@ -38,6 +38,17 @@ class TestCatFile(unittest.TestCase):
         sys.stdout = sys.__stdout__
         self.assertEqual(captured.getvalue(), 'hello world\n')
 
+    def test_cat_file_size(self):
+        captured = io.StringIO()
+        sys.stdout = captured
+        cat_file(self.oid, '-s', self.git_dir)
+        sys.stdout = sys.__stdout__
+        self.assertEqual(captured.getvalue().strip(), '12')
+
+    def test_read_object_header(self):
+        self.assertEqual(read_object_header(self.oid, self.git_dir), ('blob', 12))
+        self.assertEqual(read_object_header('deadbeefdeadbeefdeadbeefdeadbeefdeadbeef', self.git_dir), (None, None))
+
     def test_cat_file_invalid_oid(self):
         captured = io.StringIO()
         sys.stderr = captured
@@ -54,5 +65,17 @@ class TestCatFile(unittest.TestCase):
         sys.stderr = sys.__stderr__
         self.assertIn("Option invalide", captured.getvalue())
 
+    def test_cat_file_batch(self):
+        out = io.BytesIO()
+        missing = 'deadbeefdeadbeefdeadbeefdeadbeefdeadbeef'
+        served = cat_file_batch(self.git_dir, input_stream=io.StringIO(f"{self.oid}\n{missing}\n"), output_stream=out)
+        self.assertEqual(served, 2)
+        self.assertEqual(out.getvalue(), f"{self.oid} blob 12\nhello world\n\n{missing} missing\n".encode())
+
+    def test_cat_file_batch_check(self):
+        out = io.BytesIO()
+        cat_file_batch(self.git_dir, check_only=True, input_stream=io.StringIO(f"{self.oid}\n"), output_stream=out)
+        self.assertEqual(out.getvalue(), f"{self.oid} blob 12\n".encode())
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
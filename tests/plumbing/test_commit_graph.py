@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import importlib
+from src.plumbing.commit_tree import create_commit
+from src.core.commit_graph import (write_commit_graph, update_commit_graph, get_commit_graph,
+                                   lookup_commit, get_graph_path, get_layers_dir)
+from src.porcelain.rev_parse import resolve_revision
+
+# src.plumbing re-exports the cat_file function under the module's name
+cat_file_module = importlib.import_module("src.plumbing.cat_file")
+
+class TestCommitGraph(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+        with open(os.path.join(self.git_dir, "HEAD"), "w") as f:
+            f.write("ref: refs/heads/main\n")
+        tree = "a" * 40
+        self.root = create_commit(tree, "root", None, self.git_dir, timestamp=1000)
+        self.left = create_commit(tree, "left", self.root, self.git_dir, timestamp=2000)
+        self.right = create_commit(tree, "right", self.root, self.git_dir, timestamp=3000)
+        self.side = create_commit(tree, "side", self.root, self.git_dir, timestamp=3500)
+        # Three parents: the third one goes to the extra edges chunk
+        self.octopus = create_commit("b" * 40, "merge", [self.left, self.right, self.side], self.git_dir, timestamp=2 ** 33 + 5)
+        self._set_ref("main", self.octopus)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _set_ref(self, name, sha):
+        with open(os.path.join(self.git_dir, "refs", "heads", name), "w") as f:
+            f.write(sha + "\n")
+
+    def test_write_and_lookup(self):
+        self.assertEqual(write_commit_graph(self.git_dir), 5)
+        graph = get_commit_graph(self.git_dir)
+        self.assertEqual(len(graph), 5)
+        info = graph.lookup(self.octopus)
+        self.assertEqual(info.tree, "b" * 40)
+        self.assertEqual(info.parents, [self.left, self.right, self.side])
+        self.assertEqual(info.timestamp, 2 ** 33 + 5)
+        self.assertEqual(info.generation, 3)
+        self.assertEqual(graph.lookup(self.root).generation, 1)
+        self.assertEqual(graph.lookup(self.left).parents, [self.root])
+        self.assertIsNone(graph.lookup("c" * 40))
+
+    def test_lookup_skips_object_reads(self):
+        write_commit_graph(self.git_dir)
+        with mock.patch.object(cat_file_module, "read_object") as read_object:
+            info = lookup_commit(self.octopus, self.git_dir)
+            self.assertEqual(resolve_revision(f"{self.octopus}^3~1", self.git_dir), self.root)
+            read_object.assert_not_called()
+        self.assertEqual(info.parents[1], self.right)
+
+    def test_lookup_without_graph(self):
+        info = lookup_commit(self.left, self.git_dir)
+        self.assertEqual((info.tree, info.parents, info.timestamp, info.generation),
+                         ("a" * 40, [self.root], 2000, None))
+        self.assertEqual(resolve_revision("main~2", self.git_dir), self.root)
+
+    def test_incremental_update(self):
+        self.assertFalse(update_commit_graph(self.git_dir, [self.octopus]))
+        self.assertFalse(os.path.exists(get_graph_path(self.git_dir)))
+        write_commit_graph(self.git_dir)
+        child = create_commit("a" * 40, "child", self.octopus, self.git_dir, timestamp=5000)
+        with mock.patch.object(cat_file_module, "read_object", wraps=cat_file_module.read_object) as read_object:
+            self.assertTrue(update_commit_graph(self.git_dir, [child]))
+        # Only the new commit is parsed (the other reads are trees, for its changed-path filter)
+        commits = [c.args[0] for c in read_object.call_args_list if c.args[0] not in ("a" * 40, "b" * 40)]
+        self.assertEqual(commits, [child])
+        self.assertEqual(get_commit_graph(self.git_dir).lookup(child).generation, 4)
+
+    def test_layers_are_merged_geometrically(self):
+        write_commit_graph(self.git_dir)
+        with open(get_graph_path(self.git_dir), "rb") as f:
+            base = f.read()
+        tip = self.octopus
+        for i in range(3):
+            tip = create_commit("a" * 40, f"c{i}", [tip, self.side], self.git_dir, timestamp=6000 + i)
+            self.assertTrue(update_commit_graph(self.git_dir, [tip]))
+        # The base file is kept; 3 commits went to a layer of 2 and a layer of 1
+        with open(get_graph_path(self.git_dir), "rb") as f:
+            self.assertEqual(f.read(), base)
+        graph = get_commit_graph(self.git_dir)
+        self.assertEqual([layer.count for layer in graph.layers()], [5, 2, 1])
+        info = graph.lookup(tip)
+        self.assertEqual((info.parents[1], info.generation), (self.side, 6))
+        self.assertEqual(graph.lookup(self.octopus).parents, [self.left, self.right, self.side])
+        self.assertEqual(len(os.listdir(get_layers_dir(self.git_dir))), 3)
+        # A full write folds the layers back into the base file
+        self.assertEqual(write_commit_graph(self.git_dir), 8)
+        self.assertEqual(os.listdir(get_layers_dir(self.git_dir)), [])
+        self.assertEqual(len(get_commit_graph(self.git_dir).layers()), 1)
+
+    def test_invalid_revision(self):
+        sys.stderr = io.StringIO()
+        with self.assertRaises(SystemExit):
+            resolve_revision(f"{self.root}~1", self.git_dir)
+        sys.stderr = sys.__stderr__
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,10 @@ import sys
 import io
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from src.plumbing.commit_tree import commit_tree
+from unittest import mock
+from src.plumbing.commit_tree import commit_tree, create_commit
+from src.plumbing.cat_file import read_object
+from src.core.commit import parse_commit, parse_identity
 
 class TestCommitTree(unittest.TestCase):
     def setUp(self):
@@ -40,5 +43,32 @@ class TestCommitTree(unittest.TestCase):
         obj_path = os.path.join(self.git_dir, "objects", oid[:2], oid[2:])
         self.assertTrue(os.path.exists(obj_path))
 
+    def test_commit_format(self):
+        with open(os.path.join(self.git_dir, "config"), "w") as f:
+            f.write("[user]\n\tname = Config User\n\temail = config@example.com\n")
+        env = {"MYGIT_COMMITTER_NAME": "Env Committer", "MYGIT_COMMITTER_EMAIL": "env@example.com"}
+        with mock.patch.dict(os.environ, env):
+            oid = create_commit(self.tree_sha, "Subject\n\nBody", [self.parent_sha, "c" * 40], self.git_dir, timestamp=1700000000)
+        obj_type, content = read_object(oid, self.git_dir)
+        self.assertEqual(obj_type, "commit")
+        info = parse_commit(content)
+        self.assertEqual(info["tree"], self.tree_sha)
+        self.assertEqual(info["parents"], [self.parent_sha, "c" * 40])
+        self.assertEqual(info["message"], "Subject\n\nBody")
+        self.assertEqual(info["timestamp"], 1700000000)
+        self.assertEqual(parse_identity(info["author"])[:3], ("Config User", "config@example.com", 1700000000))
+        self.assertEqual(parse_identity(info["committer"])[:2], ("Env Committer", "env@example.com"))
+        self.assertRegex(info["author"], r" [+-]\d{4}$")
+        self.assertTrue(content.endswith(b"\n\nSubject\n\nBody\n"))
+
+    def test_parse_legacy_commit(self):
+        content = (f"tree {self.tree_sha}\nparent {self.parent_sha}\nmessage: Old commit\n"
+                   f"timestamp: 1600000000\n  file.txt: {'d' * 40}\n").encode()
+        info = parse_commit(content)
+        self.assertEqual(info["tree"], self.tree_sha)
+        self.assertEqual(info["parent"], self.parent_sha)
+        self.assertEqual(info["message"], "Old commit")
+        self.assertEqual(info["timestamp"], 1600000000)
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+import hashlib
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.plumbing import hash_object as hash_object_module
+from src.plumbing.hash_object import hash_object, hash_file
+
+class TestHashObject(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"), exist_ok=True)
+        self.file_path = os.path.join(self.test_dir, "data.bin")
+        self.data = os.urandom(10000)
+        with open(self.file_path, 'wb') as f:
+            f.write(self.data)
+        self.expected = hashlib.sha1(f"blob {len(self.data)}\0".encode() + self.data).hexdigest()
+
+    def tearDown(self):
+        hash_object_module.CHUNK_SIZE = 1024 * 1024
+        shutil.rmtree(self.test_dir)
+
+    def test_hash_without_write(self):
+        self.assertEqual(hash_file(self.file_path, self.git_dir), self.expected)
+        self.assertEqual(os.listdir(os.path.join(self.git_dir, "objects")), [])
+
+    def test_streamed_write_across_chunks(self):
+        hash_object_module.CHUNK_SIZE = 1000
+        sha1 = hash_file(self.file_path, self.git_dir, write=True)
+        self.assertEqual(sha1, self.expected)
+        obj_path = os.path.join(self.git_dir, "objects", sha1[:2], sha1[2:])
+        with open(obj_path, 'rb') as f:
+            raw = zlib.decompress(f.read())
+        self.assertEqual(raw, f"blob {len(self.data)}\0".encode() + self.data)
+        # No temporary file is left behind
+        self.assertEqual(sorted(os.listdir(os.path.join(self.git_dir, "objects"))), [sha1[:2]])
+
+    def test_hash_object_prints_sha(self):
+        captured = io.StringIO()
+        sys.stdout = captured
+        sha1 = hash_object(self.file_path, self.git_dir, write=False)
+        sys.stdout = sys.__stdout__
+        self.assertEqual(captured.getvalue().strip(), sha1)
+
+    def test_hash_object_rejects_directory(self):
+        sys.stderr = io.StringIO()
+        with self.assertRaises(SystemExit):
+            hash_object(self.test_dir, self.git_dir)
+        sys.stderr = sys.__stderr__
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.index import Index, IndexLockedError, read_index, write_index, make_entry, index_mtime, is_racy
+from src.porcelain import status as status_module
+from src.porcelain.add import add
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        os.makedirs(os.path.join(".mygit", "objects"))
+        self.index_path = os.path.join(".mygit", "index")
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _write_file(self, path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def _status(self):
+        captured = io.StringIO()
+        sys.stdout = captured
+        try:
+            status_module.status(self.index_path)
+        finally:
+            sys.stdout = sys.__stdout__
+        return captured.getvalue()
+
+    def test_binary_roundtrip(self):
+        self._write_file("a.txt", "a")
+        st = os.stat("a.txt")
+        entries = [
+            make_entry("b/c.txt", "100755", "ab" * 20),
+            make_entry("a.txt", "100644", "cd" * 20, st),
+            make_entry("c.txt", "100644", "ef" * 20, stage=3),
+            make_entry("c.txt", "100644", "01" * 20, stage=2),
+        ]
+        write_index(entries, self.index_path)
+        with open(self.index_path, "rb") as f:
+            self.assertEqual(f.read(4), b"DIRC")
+        read = read_index(self.index_path)
+        self.assertEqual([(e.path, e.stage) for e in read], [("a.txt", 0), ("b/c.txt", 0), ("c.txt", 2), ("c.txt", 3)])
+        self.assertEqual(read[0].ino, st.st_ino & 0xFFFFFFFF)
+        self.assertEqual(read[1].mode, "100755")
+
+    def test_legacy_text_index(self):
+        self._write_file(self.index_path, "100644 file1.txt " + "ab" * 20 + "\n")
+        entries = read_index(self.index_path)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual((entries[0].path, entries[0].size), ("file1.txt", 0))
+
+    def test_racy_entries_are_smudged(self):
+        self._write_file("a.txt", "a")
+        entry = make_entry("a.txt", "100644", "ab" * 20, os.stat("a.txt"))
+        future = entry._replace(mtime_s=entry.mtime_s + 3600)
+        write_index([future], self.index_path)
+        self.assertTrue(is_racy(future, index_mtime(self.index_path)))
+        self.assertEqual(read_index(self.index_path)[0].size, 0)
+
+    def test_status_skips_unchanged_files(self):
+        self._write_file("a.txt", "hello")
+        self._write_file("b.txt", "world")
+        sys.stdout = io.StringIO()
+        add("a.txt")
+        add("b.txt")
+        sys.stdout = sys.__stdout__
+        # Make the index strictly newer than the files so they are not racy
+        st = os.stat(self.index_path)
+        os.utime(self.index_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+        with mock.patch.object(status_module, "hash_file", wraps=status_module.hash_file) as hashed:
+            output = self._status()
+            hashed.assert_not_called()
+        self.assertIn("a.txt", output)
+        self._write_file("b.txt", "changed content")
+        with mock.patch.object(status_module, "hash_file", wraps=status_module.hash_file) as hashed:
+            output = self._status()
+            hashed.assert_called_once_with("b.txt")
+        self.assertIn("Modified files (not staged):\n  b.txt", output)
+
+    def test_add_replaces_existing_entry(self):
+        self._write_file("a.txt", "one")
+        sys.stdout = io.StringIO()
+        add("a.txt")
+        self._write_file("a.txt", "two")
+        add("a.txt")
+        sys.stdout = sys.__stdout__
+        self.assertEqual([e.path for e in read_index(self.index_path)], ["a.txt"])
+
+    def test_upsert_and_remove_keep_entries_sorted(self):
+        index = Index(self.index_path)
+        for name in ["b.txt", "a/z.txt", "c.txt", "a.txt", "b.txt"]:
+            index.add(make_entry(name, "100644", "ab" * 20))
+        self.assertEqual(index.paths(), ["a.txt", "a/z.txt", "b.txt", "c.txt"])
+        index.add(make_entry("b.txt", "100644", "cd" * 20))
+        self.assertEqual(index.get("b.txt").sha1, "cd" * 20)
+        self.assertTrue(index.remove("a/z.txt"))
+        self.assertFalse(index.remove("a/z.txt"))
+        self.assertEqual(len(index), 3)
+
+    def test_staging_resolves_conflict(self):
+        index = Index(self.index_path)
+        index.add(make_entry("a.txt", "100644", "ab" * 20, stage=2))
+        index.add(make_entry("a.txt", "100644", "cd" * 20, stage=3))
+        self.assertEqual(index.unmerged_paths(), ["a.txt"])
+        index.add(make_entry("a.txt", "100644", "ef" * 20))
+        self.assertEqual([(e.stage, e.sha1) for e in index], [(0, "ef" * 20)])
+
+    def test_locked_index(self):
+        with Index.locked(self.index_path) as index:
+            index.add(make_entry("a.txt", "100644", "ab" * 20))
+            self.assertTrue(os.path.exists(self.index_path + ".lock"))
+            with self.assertRaises(IndexLockedError):
+                write_index([], self.index_path)
+            # Opportunistic readers still get the current index
+            with Index.locked(self.index_path, optional=True) as other:
+                self.assertEqual(len(other), 0)
+        self.assertFalse(os.path.exists(self.index_path + ".lock"))
+        self.assertEqual([e.path for e in read_index(self.index_path)], ["a.txt"])
+
+    def test_failed_update_leaves_index_untouched(self):
+        write_index([make_entry("a.txt", "100644", "ab" * 20)], self.index_path)
+        with self.assertRaises(RuntimeError):
+            with Index.locked(self.index_path) as index:
+                index.clear()
+                raise RuntimeError("boom")
+        self.assertFalse(os.path.exists(self.index_path + ".lock"))
+        self.assertEqual(len(read_index(self.index_path)), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.plumbing.commit_tree import create_commit
+from src.plumbing.merge_base import merge_bases, merge_base, is_ancestor
+from src.core.commit_graph import write_commit_graph
+
+class TestMergeBase(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+        with open(os.path.join(self.git_dir, "HEAD"), "w") as f:
+            f.write("ref: refs/heads/main\n")
+        self.time = 1000
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _commit(self, name, *parents):
+        self.time += 10
+        return create_commit("a" * 40, name, list(parents), self.git_dir, timestamp=self.time)
+
+    def _set_ref(self, name, sha):
+        with open(os.path.join(self.git_dir, "refs", "heads", name), "w") as f:
+            f.write(sha + "\n")
+
+    def _check_with_and_without_graph(self, one, two, expected):
+        self.assertEqual(merge_bases(one, two, self.git_dir), expected)
+        self._set_ref("one", one)
+        self._set_ref("two", two)
+        write_commit_graph(self.git_dir)
+        self.assertEqual(merge_bases(one, two, self.git_dir), expected)
+
+    def test_fork_picks_nearest_common_ancestor(self):
+        root = self._commit("root")
+        fork = self._commit("fork", root)
+        left = self._commit("left", self._commit("l1", fork))
+        right = self._commit("right", self._commit("r1", fork))
+        self._check_with_and_without_graph(left, right, [fork])
+
+    def test_ancestor_is_its_own_merge_base(self):
+        root = self._commit("root")
+        tip = self._commit("tip", self._commit("mid", root))
+        self._check_with_and_without_graph(root, tip, [root])
+        self.assertTrue(is_ancestor(root, tip, self.git_dir))
+        self.assertFalse(is_ancestor(tip, root, self.git_dir))
+
+    def test_merged_branch(self):
+        # main merged feature once; the base for the next merge is feature's merged tip
+        root = self._commit("root")
+        feature1 = self._commit("f1", root)
+        main1 = self._commit("m1", root)
+        merged = self._commit("merge", main1, feature1)
+        main2 = self._commit("m2", merged)
+        feature2 = self._commit("f2", feature1)
+        self._check_with_and_without_graph(main2, feature2, [feature1])
+
+    def test_criss_cross_has_two_bases(self):
+        root = self._commit("root")
+        a = self._commit("a", root)
+        b = self._commit("b", root)
+        left = self._commit("left", a, b)
+        right = self._commit("right", b, a)
+        self._check_with_and_without_graph(self._commit("l2", left), self._commit("r2", right), [b, a])
+
+    def test_unrelated_histories(self):
+        one = self._commit("one")
+        two = self._commit("two")
+        self._check_with_and_without_graph(one, two, [])
+
+    def test_merge_base_command(self):
+        root = self._commit("root")
+        a = self._commit("a", root)
+        b = self._commit("b", root)
+        left = self._commit("left", a, b)
+        right = self._commit("right", b, a)
+        captured = io.StringIO()
+        sys.stdout = captured
+        merge_base([left, right], git_dir=self.git_dir)
+        merge_base([left, right], show_all=True, git_dir=self.git_dir)
+        sys.stdout = sys.__stdout__
+        self.assertEqual(captured.getvalue().split(), [b, b, a])
+
+if __name__ == "__main__":
+    unittest.main()
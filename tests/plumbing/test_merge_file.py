@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import src.core.merge_file as merge_file_module
+from src.core.merge_file import merge_file, matching_blocks, is_binary
+from src.core.objects import write_object
+from src.core.tree import serialize_tree
+from src.core.index import Index, make_entry
+from src.plumbing.commit_tree import create_commit
+from src.porcelain.merge import merge
+from src.core.tree_merge import merge_trees
+
+BASE = b"one\ntwo\nthree\nfour\nfive\nsix\n"
+
+class TestMergeFile(unittest.TestCase):
+    def test_matching_blocks(self):
+        self.assertEqual(matching_blocks([1, 2, 3, 4], [1, 3, 4, 5]), [(0, 0, 1), (2, 1, 2)])
+        self.assertEqual(matching_blocks([], [1]), [])
+
+    def test_rewrite_and_cost_cap(self):
+        # Lines only one side has are dropped before the diff
+        base = b"".join(b"line %d\n" % i for i in range(3000))
+        rewritten = b"".join(b"new %d\n" % i for i in range(2000)) + base[base.index(b"line 2000\n"):]
+        self.assertEqual(merge_file(base, rewritten, base + b"end\n"), (rewritten + b"end\n", 0))
+        # Past the cost cap the split is not optimal, but the blocks stay valid
+        a, b = [1, 2, 1, 3, 2, 1, 3, 3, 1, 2] * 3, [2, 1, 1, 3, 1, 2, 2, 3, 1] * 3
+        with mock.patch.object(merge_file_module, "MAX_DIFF_COST", 2):
+            blocks = matching_blocks(a, b)
+        self.assertTrue(blocks)
+        for (i, j, size), (next_i, next_j, _) in zip(blocks, blocks[1:] + [(len(a), len(b), 0)]):
+            self.assertEqual(a[i:i + size], b[j:j + size])
+            self.assertLessEqual(i + size, next_i)
+            self.assertLessEqual(j + size, next_j)
+
+    def test_separate_changes_merge_cleanly(self):
+        ours = BASE.replace(b"one", b"ONE")
+        theirs = BASE.replace(b"six", b"SIX") + b"seven\n"
+        result = merge_file(BASE, ours, theirs)
+        self.assertEqual(result.conflicts, 0)
+        self.assertEqual(result.content, b"ONE\ntwo\nthree\nfour\nfive\nSIX\nseven\n")
+
+    def test_same_change_on_both_sides(self):
+        changed = BASE.replace(b"three", b"3")
+        result = merge_file(BASE, changed + b"x\n", changed)
+        self.assertEqual(result, (changed + b"x\n", 0))
+
+    def test_conflict_markers_only_around_hunk(self):
+        ours = BASE.replace(b"three\nfour", b"three\nFOUR").replace(b"one", b"ONE")
+        theirs = BASE.replace(b"three\nfour", b"THREE\nfour!")
+        result = merge_file(BASE, ours, theirs)
+        self.assertEqual(result.conflicts, 1)
+        self.assertEqual(result.content,
+                         b"ONE\ntwo\n<<<<<<< HEAD\nthree\nFOUR\n=======\nTHREE\nfour!\n"
+                         b">>>>>>> MERGE_HEAD\nfive\nsix\n")
+
+    def test_common_lines_kept_out_of_conflict(self):
+        # No base: lines both sides added the same way are not in the markers
+        result = merge_file(b"", b"a\nb\nc", b"a\nx\nc", ours_label="main", theirs_label="topic")
+        self.assertEqual(result.content, b"a\n<<<<<<< main\nb\n=======\nx\n>>>>>>> topic\nc")
+
+    def test_binary_conflict_keeps_ours(self):
+        base, ours, theirs = b"\0\xff\xfe", b"\0\xff\x01", b"\0\x80"
+        self.assertTrue(is_binary(ours))
+        self.assertEqual(merge_file(base, ours, theirs), (ours, 1))
+        # One side unchanged: no conflict
+        self.assertEqual(merge_file(base, base, theirs), (theirs, 0))
+
+class TestMergeContents(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        self.git_dir = ".mygit"
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+        with open(os.path.join(self.git_dir, "HEAD"), "w") as f:
+            f.write("ref: refs/heads/main\n")
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _commit(self, files, parents):
+        entries = [("100644", name, write_object(data, "blob", self.git_dir)) for name, data in files.items()]
+        tree = write_object(serialize_tree(entries), "tree", self.git_dir)
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            return create_commit(tree, "c", parents, self.git_dir), tree
+
+    def _checkout(self, commit, files):
+        with open(os.path.join(self.git_dir, "refs", "heads", "main"), "w") as f:
+            f.write(commit + "\n")
+        with Index.locked(os.path.join(self.git_dir, "index")) as index:
+            for name, data in files.items():
+                with open(name, "wb") as f:
+                    f.write(data)
+                index.add(make_entry(name, "100644", write_object(data, "blob", self.git_dir), os.stat(name)))
+
+    def test_merge_trees_merges_text(self):
+        _, base = self._commit({"f": BASE}, [])
+        _, ours = self._commit({"f": BASE.replace(b"one", b"1")}, [])
+        _, theirs = self._commit({"f": BASE.replace(b"six", b"6")}, [])
+        changes, conflicts = merge_trees(base, ours, theirs, self.git_dir)
+        self.assertEqual(conflicts, {})
+        merged = write_object(b"1\ntwo\nthree\nfour\nfive\n6\n", "blob", self.git_dir)
+        self.assertEqual(changes, {"f": ("100644", merged)})
+
+    def test_merge_command(self):
+        base, _ = self._commit({"f": BASE, "bin": b"\0a"}, [])
+        ours_files = {"f": BASE.replace(b"one", b"1"), "bin": b"\0b"}
+        ours, _ = self._commit(ours_files, [base])
+        theirs, _ = self._commit({"f": BASE.replace(b"six", b"6"), "bin": b"\0c"}, [base])
+        with open(os.path.join(self.git_dir, "refs", "heads", "topic"), "w") as f:
+            f.write(theirs + "\n")
+        self._checkout(ours, ours_files)
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            self.assertFalse(merge("topic", self.git_dir, os.path.join(self.git_dir, "index")))
+        self.assertIn("conflicts in: bin", out.getvalue())
+        with open("f", "rb") as f:
+            self.assertEqual(f.read(), b"1\ntwo\nthree\nfour\nfive\n6\n")
+        with open("bin", "rb") as f:
+            self.assertEqual(f.read(), b"\0b")
+        index = Index.read(os.path.join(self.git_dir, "index"))
+        self.assertEqual(index.unmerged_paths(), ["bin"])
+        self.assertEqual(index.get("f").stage, 0)
+
+    def test_merge_command_keeps_local_changes(self):
+        base, _ = self._commit({"f": BASE}, [])
+        ours, _ = self._commit({"f": BASE.replace(b"one", b"1")}, [base])
+        theirs, _ = self._commit({"f": BASE.replace(b"six", b"6"), "u": b"theirs\n"}, [base])
+        with open(os.path.join(self.git_dir, "refs", "heads", "topic"), "w") as f:
+            f.write(theirs + "\n")
+        self._checkout(ours, {"f": BASE.replace(b"one", b"1")})
+        # An unstaged edit and an untracked file, both in paths the merge writes
+        with open("f", "wb") as f:
+            f.write(b"local edit\n")
+        with open("u", "wb") as f:
+            f.write(b"untracked\n")
+        with mock.patch("sys.stdout", new_callable=io.StringIO), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as err:
+            self.assertFalse(merge("topic", self.git_dir, os.path.join(self.git_dir, "index")))
+        self.assertIn("local changes would be overwritten", err.getvalue())
+        with open("f", "rb") as f:
+            self.assertEqual(f.read(), b"local edit\n")
+        with open("u", "rb") as f:
+            self.assertEqual(f.read(), b"untracked\n")
+        with open(os.path.join(self.git_dir, "refs", "heads", "main")) as f:
+            self.assertEqual(f.read().strip(), ours)
+        self.assertNotIn("u", Index.read(os.path.join(self.git_dir, "index")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.objects import write_object
+from src.core.tree import serialize_tree, flatten_tree, read_tree, TREE_MODE
+from src.core.tree_merge import apply_tree_changes, merge_tree as merge_tree_objects
+from src.core.model import get_blob
+from src.plumbing.commit_tree import create_commit
+from src.plumbing.merge_tree import merge_tree
+
+class TestMergeTree(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _blob(self, content):
+        return write_object(content, "blob", self.git_dir)
+
+    def _tree(self, files):
+        # files: {name: bytes or nested dict}
+        entries = []
+        for name, value in files.items():
+            if isinstance(value, dict):
+                entries.append((TREE_MODE, name, self._tree(value)))
+            else:
+                entries.append(("100644", name, self._blob(value)))
+        return write_object(serialize_tree(entries), "tree", self.git_dir)
+
+    def _commit(self, files, parents=()):
+        with mock.patch("sys.stdout", new_callable=io.StringIO):
+            return create_commit(self._tree(files), "c", list(parents), self.git_dir)
+
+    def _files(self, tree):
+        return {path: get_blob(sha1, self.git_dir).data for path, (_, sha1) in flatten_tree(tree, self.git_dir).items()}
+
+    def test_apply_tree_changes(self):
+        tree = self._tree({"a": b"a", "d": {"x": b"x"}, "keep": {"k": b"k"}})
+        new = apply_tree_changes(tree, {
+            "a": None, "a/b": ("100644", self._blob(b"b")),  # file replaced by a directory
+            "d/x": None, "d": ("100644", self._blob(b"d")),  # and the reverse
+        }, self.git_dir)
+        self.assertEqual(self._files(new), {"a/b": b"b", "d": b"d", "keep/k": b"k"})
+        # Unchanged subtrees are reused
+        self.assertEqual(dict((n, s) for _, n, s in read_tree(new, self.git_dir))["keep"],
+                         dict((n, s) for _, n, s in read_tree(tree, self.git_dir))["keep"])
+        # A directory left empty disappears
+        emptied = apply_tree_changes(tree, {"d/x": None}, self.git_dir)
+        self.assertEqual(set(self._files(emptied)), {"a", "keep/k"})
+        self.assertEqual(apply_tree_changes(tree, {}, self.git_dir), tree)
+
+    def test_clean_merge_matches_expected_tree(self):
+        base = self._tree({"f": b"1\n2\n3\n", "src": {"a": b"a", "b": b"b"}})
+        ours = self._tree({"f": b"one\n2\n3\n", "src": {"a": b"a", "b": b"b"}, "new": b"n"})
+        theirs = self._tree({"f": b"1\n2\nthree\n", "src": {"a": b"A"}})
+        result = merge_tree_objects(base, ours, theirs, self.git_dir)
+        self.assertEqual(result.conflicts, {})
+        expected = self._tree({"f": b"one\n2\nthree\n", "src": {"a": b"A"}, "new": b"n"})
+        self.assertEqual(result.tree, expected)
+
+    def test_file_in_the_way_of_directory_is_moved_aside(self):
+        # Modified in ours, replaced by a directory in theirs
+        base = self._tree({"a": b"a\n"})
+        result = merge_tree_objects(base, self._tree({"a": b"ours\n"}),
+                                    self._tree({"a": {"x": b"x\n"}}), self.git_dir)
+        self.assertEqual(set(result.conflicts), {"a~HEAD"})
+        self.assertEqual(result.conflicts["a~HEAD"][0].path, "a")
+        self.assertEqual(self._files(result.tree), {"a/x": b"x\n", "a~HEAD": b"ours\n"})
+        # And the reverse: the file comes from theirs
+        base = self._tree({"a": {"x": b"x\n"}})
+        result = merge_tree_objects(base, self._tree({"a": {"x": b"ours\n"}}),
+                                    self._tree({"a": b"file\n"}), self.git_dir)
+        self.assertEqual(set(result.conflicts), {"a/x", "a~MERGE_HEAD"})
+        self.assertEqual(self._files(result.tree), {"a/x": b"ours\n", "a~MERGE_HEAD": b"file\n"})
+
+    def test_command_reports_conflicts_without_worktree(self):
+        base = self._commit({"f": b"x\n", "g": b"g\n"})
+        ours = self._commit({"f": b"ours\n", "g": b"g\n"}, [base])
+        theirs = self._commit({"f": b"theirs\n"}, [base])
+        with open(os.path.join(self.git_dir, "refs", "heads", "topic"), "w") as f:
+            f.write(theirs + "\n")
+        before = set(os.listdir(self.test_dir))
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            result = merge_tree(ours, "topic", self.git_dir)
+        self.assertEqual(set(os.listdir(self.test_dir)), before)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], result.tree)
+        sides = [self._blob(content) for content in (b"x\n", b"ours\n", b"theirs\n")]
+        self.assertEqual(lines[1:4], [f"100644 {sha1} {stage}\tf" for stage, sha1 in enumerate(sides, 1)])
+        self.assertEqual(lines[5], "CONFLICT (content): Merge conflict in f")
+        self.assertEqual(self._files(result.tree),
+                         {"f": b"<<<<<<< HEAD\nours\n=======\ntheirs\n>>>>>>> MERGE_HEAD\n"})
+
+if __name__ == "__main__":
+    unittest.main()
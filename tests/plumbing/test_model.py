@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import importlib
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.objects import write_object
+from src.core.tree import serialize_tree, read_tree
+from src.core.object_cache import ObjectCache
+from src.plumbing.commit_tree import create_commit
+from src.core.model import get_object, get_commit, get_tree, get_blob, Commit, Tree, Blob
+
+# src.plumbing re-exports the cat_file function under the module's name
+cat_file_module = importlib.import_module("src.plumbing.cat_file")
+
+class TestModel(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        self.blob = write_object(b"hello\n", "blob", self.git_dir)
+        self.tree = write_object(serialize_tree([("100644", "a.txt", self.blob)]), "tree", self.git_dir)
+        self.root = create_commit(self.tree, "root", [], self.git_dir, timestamp=1000)
+        self.commit = create_commit(self.tree, "second\n\nbody", [self.root], self.git_dir, timestamp=2000)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_typed_objects(self):
+        commit = get_object(self.commit, self.git_dir)
+        self.assertIsInstance(commit, Commit)
+        self.assertEqual((commit.tree, commit.parents, commit.timestamp), (self.tree, [self.root], 2000))
+        self.assertEqual(commit.message, "second\n\nbody")
+        self.assertTrue(commit.author.startswith("Author <author@example.com> "))
+        tree = get_tree(self.tree, self.git_dir)
+        self.assertEqual(list(tree), [("100644", "a.txt", self.blob)])
+        self.assertEqual(tree.get("a.txt"), ("100644", self.blob))
+        self.assertIsNone(tree.get("b.txt"))
+        self.assertEqual(get_blob(self.blob, self.git_dir).data, b"hello\n")
+        self.assertIsNone(get_object("0" * 40, self.git_dir))
+        with self.assertRaises(ValueError):
+            get_commit(self.tree, self.git_dir)
+        # Fields live in slots: no per-object dictionary
+        self.assertFalse(hasattr(commit, "__dict__"))
+
+    def test_parsed_once(self):
+        commit = get_commit(self.commit, self.git_dir)
+        get_tree(self.tree, self.git_dir)
+        with mock.patch.object(cat_file_module, "read_object") as read_object, \
+                mock.patch("src.core.model.parse_commit", wraps=importlib.import_module("src.core.commit").parse_commit) as parse:
+            for _ in range(3):
+                again = get_commit(self.commit, self.git_dir)
+                self.assertEqual(again.parents, [self.root])
+                self.assertEqual(read_tree(again.tree, self.git_dir)[0][1], "a.txt")
+            read_object.assert_not_called()
+        self.assertIs(again, commit)
+        # Parsed on first field access, then never again
+        self.assertEqual(parse.call_count, 1)
+
+    def test_blobs_not_kept(self):
+        self.assertIsNot(get_blob(self.blob, self.git_dir), get_blob(self.blob, self.git_dir))
+
+    def test_cache_charged_size(self):
+        cache = ObjectCache(max_bytes=100)
+        cache.put(self.git_dir, "a", "tree", object(), size=60)
+        cache.put(self.git_dir, "b", "tree", object(), size=60)
+        self.assertIsNone(cache.get(self.git_dir, "a"))
+        self.assertEqual(cache.stats()["size"], 60)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.plumbing.hash_object import hash_object_data
+from src.plumbing.cat_file import read_object, read_object_header
+from src.core.object_cache import ObjectCache, object_cache
+
+class TestObjectCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"), exist_ok=True)
+        object_cache.clear()
+
+    def tearDown(self):
+        object_cache.clear()
+        shutil.rmtree(self.test_dir)
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ObjectCache(max_bytes=10)
+        cache.put(self.git_dir, "a", "blob", b"12345")
+        cache.put(self.git_dir, "b", "blob", b"12345")
+        self.assertIsNotNone(cache.get(self.git_dir, "a"))
+        cache.put(self.git_dir, "c", "blob", b"12345")
+        self.assertIsNone(cache.get(self.git_dir, "b"))
+        self.assertEqual(cache.get(self.git_dir, "a"), ("blob", b"12345"))
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["size"], 10)
+        cache.put(self.git_dir, "d", "blob", b"too large for the cache")
+        self.assertIsNone(cache.get(self.git_dir, "d"))
+
+    def test_read_object_uses_cache(self):
+        sys.stdout = io.StringIO()
+        oid = hash_object_data("cached content", "blob", self.git_dir, write=True)
+        sys.stdout = sys.__stdout__
+        self.assertEqual(read_object(oid, self.git_dir), ("blob", b"cached content"))
+        # Served from memory even once the loose object is gone
+        os.remove(os.path.join(self.git_dir, "objects", oid[:2], oid[2:]))
+        self.assertEqual(read_object(oid, self.git_dir), ("blob", b"cached content"))
+        stats = object_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_read_object_header_is_not_counted(self):
+        sys.stdout = io.StringIO()
+        oid = hash_object_data("header only", "blob", self.git_dir, write=True)
+        sys.stdout = sys.__stdout__
+        self.assertEqual(read_object_header(oid, self.git_dir), ("blob", 11))
+        read_object(oid, self.git_dir)
+        self.assertEqual(read_object_header(oid, self.git_dir), ("blob", 11))
+        stats = object_cache.stats()
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_cache_is_per_repository(self):
+        other_git_dir = os.path.join(self.test_dir, "other", ".mygit")
+        sys.stdout = io.StringIO()
+        oid = hash_object_data("only here", "blob", self.git_dir, write=True)
+        sys.stdout = sys.__stdout__
+        read_object(oid, self.git_dir)
+        self.assertEqual(read_object(oid, other_git_dir), (None, None))
+
+if __name__ == "__main__":
+    unittest.main()
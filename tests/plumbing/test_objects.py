@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core import objects
+from src.core.objects import write_object, write_blob_from_file, batch_writes
+from src.plumbing.cat_file import read_object
+from src.plumbing.hash_object import hash_file
+
+class TestObjectWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"), exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _object_files(self):
+        objects_dir = os.path.join(self.git_dir, "objects")
+        return sorted(os.path.join(d, f) for d in os.listdir(objects_dir)
+                      for f in (os.listdir(os.path.join(objects_dir, d)) if os.path.isdir(os.path.join(objects_dir, d)) else [""]))
+
+    def test_write_object_skips_existing(self):
+        sha1 = write_object(b"same content", "blob", self.git_dir)
+        with mock.patch.object(objects, "_install") as install:
+            self.assertEqual(write_object(b"same content", "blob", self.git_dir), sha1)
+            install.assert_not_called()
+        self.assertEqual(read_object(sha1, self.git_dir), ("blob", b"same content"))
+
+    def test_no_temporary_files_left(self):
+        sha1 = write_object(b"data", "blob", self.git_dir)
+        self.assertEqual(self._object_files(), [os.path.join(sha1[:2], sha1[2:])])
+
+    def test_blob_changed_during_write_is_rejected(self):
+        path = os.path.join(self.test_dir, "file.txt")
+        with open(path, "w") as f:
+            f.write("first version")
+        sha1 = hash_file(path, self.git_dir)
+        with open(path, "w") as f:
+            f.write("second version")
+        with self.assertRaises(OSError):
+            write_blob_from_file(path, sha1, 13, self.git_dir)
+        self.assertEqual(self._object_files(), [])
+
+    def test_batch_defers_syncs_to_flush(self):
+        with mock.patch.object(objects, "_fsync_dir") as fsync_dir:
+            with batch_writes():
+                for i in range(5):
+                    write_object(f"object {i}".encode(), "blob", self.git_dir)
+                with batch_writes():
+                    write_object(b"nested", "blob", self.git_dir)
+                fsync_dir.assert_not_called()
+            touched = {os.path.dirname(os.path.join(self.git_dir, "objects", p)) for p in self._object_files()}
+            self.assertEqual(fsync_dir.call_count, len(touched))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.plumbing.hash_object import hash_object_data
+from src.plumbing.cat_file import read_object, read_object_header, object_exists
+from src.porcelain.repack import repack, list_loose_objects
+from src.core.pack import (get_packs, delta_base_cache, decode_entry_header, decode_ofs_delta_offset,
+                           OBJ_OFS_DELTA)
+from src.core.delta import create_delta, apply_delta
+from src.core.object_cache import object_cache
+
+class TestPack(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"), exist_ok=True)
+        sys.stdout = io.StringIO()
+        self.blobs = {}
+        for i in range(300):
+            content = f"file number {i}\n".encode()
+            self.blobs[hash_object_data(content, "blob", self.git_dir, write=True)] = content
+        self.tree_sha = hash_object_data("100644 file1.txt deadbeef", "tree", self.git_dir, write=True)
+        sys.stdout = sys.__stdout__
+
+    def tearDown(self):
+        sys.stdout = sys.__stdout__
+        shutil.rmtree(self.test_dir)
+
+    def _repack(self):
+        sys.stdout = io.StringIO()
+        name = repack(self.git_dir)
+        sys.stdout = sys.__stdout__
+        return name
+
+    def test_repack_removes_loose_objects(self):
+        name = self._repack()
+        self.assertIsNotNone(name)
+        self.assertEqual(list_loose_objects(self.git_dir), [])
+        pack_dir = os.path.join(self.git_dir, "objects", "pack")
+        self.assertTrue(os.path.exists(os.path.join(pack_dir, name + ".pack")))
+        self.assertTrue(os.path.exists(os.path.join(pack_dir, name + ".idx")))
+
+    def test_read_packed_objects(self):
+        self._repack()
+        for oid, content in self.blobs.items():
+            self.assertEqual(read_object(oid, self.git_dir), ("blob", content))
+        obj_type, _ = read_object(self.tree_sha, self.git_dir)
+        self.assertEqual(obj_type, "tree")
+
+    def test_missing_object_not_found(self):
+        self._repack()
+        self.assertFalse(object_exists("f" * 40, self.git_dir))
+        self.assertEqual(read_object("0" * 40, self.git_dir), (None, None))
+
+    def test_repack_consolidates_packs(self):
+        self._repack()
+        sys.stdout = io.StringIO()
+        extra = hash_object_data("one more", "blob", self.git_dir, write=True)
+        sys.stdout = sys.__stdout__
+        self._repack()
+        self.assertEqual(len(get_packs(self.git_dir)), 1)
+        self.assertEqual(read_object(extra, self.git_dir), ("blob", b"one more"))
+        self.assertTrue(object_exists(self.tree_sha, self.git_dir))
+
+    def test_delta_roundtrip(self):
+        base = b"".join(f"line {i}\n".encode() for i in range(2000))
+        target = base.replace(b"line 1000\n", b"changed line\n") + b"tail\n"
+        delta = create_delta(base, target)
+        self.assertLess(len(delta), len(target) // 10)
+        self.assertEqual(apply_delta(base, delta), target)
+        self.assertEqual(apply_delta(b"", create_delta(b"", b"abc")), b"abc")
+
+    def test_repack_stores_revisions_as_deltas(self):
+        revisions = {}
+        sys.stdout = io.StringIO()
+        lines = [f"setting_{i} = {i}\n" for i in range(3000)]
+        for rev in range(8):
+            lines[rev * 100] = f"setting_{rev * 100} = changed in {rev}\n"
+            content = "".join(lines).encode()
+            revisions[hash_object_data(content, "blob", self.git_dir, write=True)] = content
+            hash_object_data(f"100644 config.ini {list(revisions)[-1]}", "tree", self.git_dir, write=True)
+        sys.stdout = sys.__stdout__
+        name = self._repack()
+        pack_size = os.path.getsize(os.path.join(self.git_dir, "objects", "pack", name + ".pack"))
+        self.assertLess(pack_size, sum(len(c) for c in revisions.values()) // 4)
+        delta_base_cache.clear()
+        object_cache.clear()
+        for oid, content in revisions.items():
+            self.assertEqual(read_object_header(oid, self.git_dir), ("blob", len(content)))
+        for oid, content in revisions.items():
+            self.assertEqual(read_object(oid, self.git_dir), ("blob", content))
+
+    def test_delta_depth_is_capped(self):
+        sys.stdout = io.StringIO()
+        revisions = {}
+        lines = [f"line {i} {'x' * 60}\n".encode() for i in range(64)]
+        # Each revision shortens one more line: its best base is the one before
+        for rev in range(6):
+            lines[rev] = f"changed {rev}\n".encode()
+            content = b"".join(lines)
+            revisions[hash_object_data(content, "blob", self.git_dir, write=True)] = content
+        repack(self.git_dir, depth=2)
+        sys.stdout = sys.__stdout__
+        for oid, content in revisions.items():
+            self.assertEqual(read_object(oid, self.git_dir), ("blob", content))
+        # Walk the delta chain of every entry in the pack
+        pack, = get_packs(self.git_dir)
+        depths = []
+        for oid in revisions:
+            offset = pack.index.find(bytes.fromhex(oid))
+            depth = 0
+            type_code, _, pos = decode_entry_header(pack._map, offset)
+            while type_code == OBJ_OFS_DELTA:
+                distance, _ = decode_ofs_delta_offset(pack._map, pos)
+                offset -= distance
+                depth += 1
+                type_code, _, pos = decode_entry_header(pack._map, offset)
+            depths.append(depth)
+        self.assertEqual(max(depths), 2)
+
+if __name__ == "__main__":
+    unittest.main()
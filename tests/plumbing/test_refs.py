@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.refs import (PackedRefs, packed_refs, read_ref, dwim_ref, list_refs, pack_refs,
+                           ref_transaction, update_ref, RefLockedError, RefMismatchError,
+                           PACKED_REFS_FILE, NULL_OID)
+from src.porcelain.show_ref import show_ref
+from src.plumbing.update_ref import update_ref_stdin
+
+class TestRefs(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "tags"))
+        with open(os.path.join(self.git_dir, "HEAD"), "w") as f:
+            f.write("ref: refs/heads/main\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _write_ref(self, name, sha):
+        path = os.path.join(self.git_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(sha + "\n")
+
+    def test_packed_lookup(self):
+        refs = {f"refs/tags/v{i}": f"{i:040x}" for i in range(1000)}
+        packed = PackedRefs(b"# pack-refs with: sorted \n" +
+                            "".join(f"{sha} {name}\n" for name, sha in sorted(refs.items())).encode())
+        for name, sha in refs.items():
+            self.assertEqual(packed.get(name), sha)
+        self.assertIsNone(packed.get("refs/tags/v1000"))
+        self.assertIsNone(packed.get("refs/heads/a"))
+        self.assertEqual(dict(packed), refs)
+
+    def test_unsorted_file_with_peeled_lines(self):
+        packed = PackedRefs(f"{'b' * 40} refs/tags/z\n^{'c' * 40}\n{'a' * 40} refs/heads/a\n".encode())
+        self.assertEqual(list(packed), [("refs/heads/a", "a" * 40), ("refs/tags/z", "b" * 40)])
+        self.assertEqual(packed.get("refs/tags/z"), "b" * 40)
+
+    def test_pack_refs_and_loose_override(self):
+        self._write_ref("refs/heads/main", "1" * 40)
+        self._write_ref("refs/heads/feature/x", "2" * 40)
+        self._write_ref("refs/tags/v1", "3" * 40)
+        self.assertEqual(pack_refs(self.git_dir), 1)
+        # Only the tag was packed by default
+        self.assertFalse(os.path.exists(os.path.join(self.git_dir, "refs", "tags", "v1")))
+        self.assertEqual(pack_refs(self.git_dir, all_refs=True), 3)
+        self.assertFalse(os.path.exists(os.path.join(self.git_dir, "refs", "heads", "feature")))
+        self.assertEqual(read_ref("HEAD", self.git_dir), "1" * 40)
+        self.assertEqual(dwim_ref("feature/x", self.git_dir), ("refs/heads/feature/x", "2" * 40))
+        self.assertEqual(dwim_ref("v1", self.git_dir), ("refs/tags/v1", "3" * 40))
+        # A loose ref written after packing wins
+        self._write_ref("refs/heads/main", "4" * 40)
+        self.assertEqual(read_ref("refs/heads/main", self.git_dir), "4" * 40)
+        with mock.patch("sys.stdout", new_callable=io.StringIO) as out:
+            show_ref(self.git_dir)
+        self.assertEqual(out.getvalue().splitlines(), [
+            f"{'2' * 40} refs/heads/feature/x", f"{'4' * 40} refs/heads/main", f"{'3' * 40} refs/tags/v1"])
+
+    def test_snapshot_reused_until_file_changes(self):
+        self._write_ref("refs/tags/v1", "1" * 40)
+        pack_refs(self.git_dir)
+        snapshot = packed_refs(self.git_dir)
+        self.assertIs(packed_refs(self.git_dir), snapshot)
+        self._write_ref("refs/tags/v2", "2" * 40)
+        pack_refs(self.git_dir)
+        self.assertEqual(packed_refs(self.git_dir).get("refs/tags/v2"), "2" * 40)
+
+    def test_locked_packed_refs(self):
+        open(os.path.join(self.git_dir, PACKED_REFS_FILE + ".lock"), "w").close()
+        self._write_ref("refs/tags/v1", "1" * 40)
+        with self.assertRaises(RefLockedError):
+            pack_refs(self.git_dir)
+        self.assertEqual(list_refs(self.git_dir), [("refs/tags/v1", "1" * 40)])
+
+    def _lock_files(self):
+        return [name for root, _, names in os.walk(self.git_dir) for name in names if name.endswith(".lock")]
+
+    def test_transaction_is_all_or_nothing(self):
+        self._write_ref("refs/heads/main", "1" * 40)
+        with self.assertRaises(RefMismatchError):
+            with ref_transaction(self.git_dir) as transaction:
+                transaction.create("refs/tags/v1", "2" * 40)
+                transaction.update("HEAD", "3" * 40, "9" * 40)
+        self.assertIsNone(read_ref("refs/tags/v1", self.git_dir))
+        self.assertEqual(read_ref("refs/heads/main", self.git_dir), "1" * 40)
+        self.assertEqual(self._lock_files(), [])
+        # HEAD is followed to its branch
+        update_ref("HEAD", "3" * 40, "1" * 40, self.git_dir)
+        self.assertEqual(read_ref("refs/heads/main", self.git_dir), "3" * 40)
+        with open(os.path.join(self.git_dir, "HEAD")) as f:
+            self.assertEqual(f.read(), "ref: refs/heads/main\n")
+        with self.assertRaises(RefMismatchError):
+            update_ref("refs/heads/main", "4" * 40, NULL_OID, self.git_dir)
+
+    def test_locked_ref_aborts(self):
+        self._write_ref("refs/heads/main", "1" * 40)
+        open(os.path.join(self.git_dir, "refs", "heads", "main.lock"), "w").close()
+        with self.assertRaises(RefLockedError):
+            with ref_transaction(self.git_dir) as transaction:
+                transaction.create("refs/heads/a", "2" * 40)
+                transaction.update("refs/heads/main", "3" * 40)
+        self.assertIsNone(read_ref("refs/heads/a", self.git_dir))
+        self.assertEqual(self._lock_files(), ["main.lock"])
+
+    def test_delete_packed_ref(self):
+        self._write_ref("refs/tags/v1", "1" * 40)
+        self._write_ref("refs/tags/v2", "2" * 40)
+        pack_refs(self.git_dir)
+        self._write_ref("refs/tags/v1", "3" * 40)
+        with ref_transaction(self.git_dir) as transaction:
+            transaction.delete("refs/tags/v1", "3" * 40)
+        self.assertEqual(list_refs(self.git_dir), [("refs/tags/v2", "2" * 40)])
+        with self.assertRaises(ValueError):
+            update_ref("refs/heads/../../config", "1" * 40, git_dir=self.git_dir)
+
+    def test_update_ref_stdin(self):
+        self._write_ref("refs/heads/main", "1" * 40)
+        lines = [f"create refs/tags/t{i} {'1' * 40}\n" for i in range(50)]
+        lines += ["\n", f"update refs/heads/main {'2' * 40} {'1' * 40}\n", "verify refs/heads/none\n"]
+        self.assertEqual(update_ref_stdin(self.git_dir, io.StringIO("".join(lines))), 52)
+        self.assertEqual(len(list_refs(self.git_dir, "refs/tags/")), 50)
+        self.assertEqual(read_ref("HEAD", self.git_dir), "2" * 40)
+        # One failing command: nothing is applied
+        batch = f"delete refs/tags/t0\nupdate refs/heads/main {'3' * 40} {'1' * 40}\n"
+        with mock.patch("sys.stderr", new_callable=io.StringIO) as err:
+            with self.assertRaises(SystemExit):
+                update_ref_stdin(self.git_dir, io.StringIO(batch))
+        self.assertIn("expected " + "1" * 40, err.getvalue())
+        self.assertEqual(read_ref("refs/tags/t0", self.git_dir), "1" * 40)
+
+if __name__ == "__main__":
+    unittest.main()
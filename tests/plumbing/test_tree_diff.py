@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+import importlib
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.core.objects import write_object
+from src.core.tree import serialize_tree, TREE_MODE
+from src.core.tree_diff import diff_trees, diff_trees3, DiffEntry
+from src.plumbing.diff_tree import diff_tree
+from src.plumbing.commit_tree import create_commit
+
+tree_diff_module = importlib.import_module("src.core.tree_diff")
+
+class TestTreeDiff(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _blob(self, content):
+        return write_object(content, "blob", self.git_dir)
+
+    def _tree(self, files):
+        # files: {name: bytes or nested dict}
+        entries = []
+        for name, value in files.items():
+            if isinstance(value, dict):
+                entries.append((TREE_MODE, name, self._tree(value)))
+            else:
+                entries.append(("100644", name, self._blob(value)))
+        return write_object(serialize_tree(entries), "tree", self.git_dir)
+
+    def test_two_way(self):
+        big = {f"f{i}.txt": str(i).encode() for i in range(50)}
+        old = self._tree({"a.txt": b"a", "big": big, "lib": {"x.py": b"1"}, "gone.txt": b"g", "swap": b"file"})
+        new = self._tree({"a.txt": b"a", "big": big, "lib": {"x.py": b"2", "y.py": b"y"}, "swap": {"in.txt": b"i"}})
+        with mock.patch.object(tree_diff_module, "read_tree", wraps=tree_diff_module.read_tree) as read_tree:
+            changes = list(diff_trees(old, new, self.git_dir))
+        self.assertEqual([(c.status, c.path) for c in changes],
+                         [("D", "gone.txt"), ("M", "lib/x.py"), ("A", "lib/y.py"), ("D", "swap"), ("A", "swap/in.txt")])
+        self.assertEqual(changes[0], DiffEntry("D", "gone.txt", "100644", self._blob(b"g"), None, None))
+        # The unchanged subtree is never read
+        self.assertNotIn(self._tree(big), [c.args[0] for c in read_tree.call_args_list])
+        top = list(diff_trees(old, new, self.git_dir, recursive=False))
+        self.assertEqual([(c.status, c.path, c.new_mode) for c in top],
+                         [("D", "gone.txt", None), ("M", "lib", TREE_MODE), ("D", "swap", None), ("A", "swap", TREE_MODE)])
+        self.assertEqual(list(diff_trees(old, old, self.git_dir)), [])
+        self.assertEqual([c.path for c in diff_trees(None, self._tree({"d": {"e": b"e"}}), self.git_dir)], ["d/e"])
+
+    def test_three_way(self):
+        base = self._tree({"same.txt": b"s", "lib": {"x.py": b"1", "y.py": b"1"}, "ours.txt": b"o"})
+        ours = self._tree({"same.txt": b"s", "lib": {"x.py": b"2", "y.py": b"1"}, "ours.txt": b"o2"})
+        theirs = self._tree({"same.txt": b"s", "lib": {"x.py": b"3", "y.py": b"1"}, "ours.txt": b"o", "new.txt": b"n"})
+        entries = {e.path: e for e in diff_trees3(base, ours, theirs, self.git_dir)}
+        self.assertEqual(sorted(entries), ["lib/x.py", "new.txt", "ours.txt"])
+        self.assertEqual(entries["new.txt"].base, None)
+        self.assertEqual(entries["ours.txt"].base, entries["ours.txt"].theirs)
+        self.assertEqual(entries["lib/x.py"].ours, ("100644", self._blob(b"2")))
+        self.assertEqual(list(diff_trees3(base, ours, ours, self.git_dir)), [])
+
+    def test_diff_tree_command(self):
+        root = create_commit(self._tree({"a.txt": b"a"}), "root", [], self.git_dir, timestamp=1)
+        child = create_commit(self._tree({"a.txt": b"b"}), "child", [root], self.git_dir, timestamp=2)
+        sys.stdout = io.StringIO()
+        try:
+            diff_tree([child], self.git_dir)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = sys.__stdout__
+        self.assertEqual(output, f":100644 100644 {self._blob(b'a')} {self._blob(b'b')} M\ta.txt\n")
+
+if __name__ == "__main__":
+    unittest.main()
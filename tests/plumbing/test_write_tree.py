@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.plumbing.write_tree import write_tree
+from src.plumbing.hash_object import hash_object_data
+from src.porcelain.add import add
+from src.porcelain.ls_tree import ls_tree
+from src.core import tree as tree_module
+from src.core.tree import read_tree, flatten_tree
+from src.core.index import Index
+
+class TestWriteTree(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        os.makedirs(os.path.join(".mygit", "objects"))
+        for path in ["a.txt", "lib/b.txt", "lib/deep/c.txt", "src/d.txt", "lib.txt"]:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(path)
+        add(["."])
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_nested_trees(self):
+        root = write_tree()
+        entries = read_tree(root, ".mygit")
+        # Subtrees sort as if their name ended with '/'
+        self.assertEqual([name for _, name, _ in entries], ["a.txt", "lib.txt", "lib", "src"])
+        self.assertEqual(entries[2][0], "40000")
+        self.assertEqual(sorted(flatten_tree(root, ".mygit")),
+                         ["a.txt", "lib.txt", "lib/b.txt", "lib/deep/c.txt", "src/d.txt"])
+
+    def test_unchanged_subtrees_are_reused(self):
+        first = dict((name, sha) for _, name, sha in read_tree(write_tree(), ".mygit"))
+        self.assertEqual(Index.read(".mygit/index").cached_tree("lib/deep")[0], 1)
+        with open("src/d.txt", "w") as f:
+            f.write("changed")
+        add(["src/d.txt"])
+        with mock.patch.object(tree_module, "write_object", wraps=tree_module.write_object) as written:
+            second = dict((name, sha) for _, name, sha in read_tree(write_tree(), ".mygit"))
+        # Only src/ and the root are rebuilt
+        self.assertEqual(written.call_count, 2)
+        self.assertEqual(first["lib"], second["lib"])
+        self.assertNotEqual(first["src"], second["src"])
+
+    def test_legacy_flat_tree(self):
+        sha = hash_object_data("100644 dir/file.txt " + "ab" * 20, "tree", ".mygit", write=True)
+        self.assertEqual(flatten_tree(sha, ".mygit"), {"dir/file.txt": ("100644", "ab" * 20)})
+
+    def test_ls_tree_recursive(self):
+        root = write_tree()
+        captured = io.StringIO()
+        sys.stdout = captured
+        ls_tree(root, ".mygit")
+        ls_tree(root, ".mygit", recursive=True)
+        sys.stdout = sys.__stdout__
+        lines = captured.getvalue().splitlines()
+        self.assertTrue(lines[2].startswith("040000 ") and lines[2].endswith(" lib"))
+        self.assertEqual([line.split()[2] for line in lines[4:]],
+                         ["a.txt", "lib.txt", "lib/b.txt", "lib/deep/c.txt", "src/d.txt"])
+
+if __name__ == "__main__":
+    unittest.main()
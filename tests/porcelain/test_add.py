@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.porcelain import add as add_module
+from src.porcelain.add import add
+from src.core.index import read_index
+from src.core.objects import object_exists
+
+class TestAdd(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        os.makedirs(os.path.join(".mygit", "objects"))
+        os.makedirs(os.path.join("src", "sub"))
+        os.makedirs(".hidden")
+        self.files = ["a.txt", os.path.join("src", "b.txt"), os.path.join("src", "sub", "c.txt")]
+        for path in self.files + [os.path.join(".hidden", "x.txt")]:
+            with open(path, "w") as f:
+                f.write(f"content of {path}")
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def test_add_directories_recursively(self):
+        staged = add(["."])
+        self.assertEqual(sorted(staged), sorted(self.files))
+        entries = read_index(".mygit/index")
+        self.assertEqual([e.path for e in entries], sorted(self.files))
+        for e in entries:
+            self.assertTrue(object_exists(e.sha1, ".mygit"))
+
+    def test_unchanged_files_are_not_rehashed(self):
+        add(["."])
+        # Make the index strictly newer than the files so they are not racy
+        st = os.stat(".mygit/index")
+        os.utime(".mygit/index", ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+        with open("a.txt", "w") as f:
+            f.write("changed")
+        with mock.patch.object(add_module, "hash_files", wraps=add_module.hash_files) as hashed:
+            staged = add(["."])
+        self.assertEqual(hashed.call_args[0][0], ["a.txt"])
+        self.assertEqual(staged, ["a.txt"])
+
+    def test_parallel_hashing(self):
+        os.makedirs("many")
+        for i in range(20):
+            with open(os.path.join("many", f"f{i}.txt"), "w") as f:
+                f.write(str(i) * (i + 1))
+        with mock.patch.object(add_module, "PARALLEL_MIN_FILES", 4):
+            staged = add(["many"], jobs=2)
+        self.assertEqual(len(staged), 20)
+        serial = {e.path: e.sha1 for e in read_index(".mygit/index")}
+        os.remove(".mygit/index")
+        add(["many"], jobs=1)
+        self.assertEqual({e.path: e.sha1 for e in read_index(".mygit/index")}, serial)
+
+    def test_add_missing_path(self):
+        sys.stderr = io.StringIO()
+        with self.assertRaises(SystemExit):
+            add(["a.txt", "missing.txt"])
+        sys.stderr = sys.__stderr__
+        self.assertFalse(os.path.exists(".mygit/index"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+import importlib
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.porcelain.add import add
+from src.porcelain.commit import commit
+from src.porcelain.checkout import checkout
+from src.porcelain.reset import reset
+from src.core.index import Index
+from src.core.objects import write_object
+from src.core.refs import pack_refs, read_ref
+from src.core.model import get_commit
+
+worktree_module = importlib.import_module("src.core.worktree")
+
+class TestCheckout(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        os.makedirs(os.path.join(".mygit", "objects"))
+        os.makedirs(os.path.join(".mygit", "refs", "heads"))
+        with open(os.path.join(".mygit", "HEAD"), "w") as f:
+            f.write("ref: refs/heads/main\n")
+        sys.stdout = io.StringIO()
+        os.makedirs("lib")
+        self._write({"a.txt": "a", "b.txt": "b", "lib/x.py": "x", "run.sh": "#!/bin/sh\n"})
+        add(["."])
+        commit("base")
+        checkout("main", create_branch="feature")
+        self._write({"a.txt": "a2", "new/deep/n.txt": "n"})
+        os.chmod("run.sh", 0o755)
+        os.remove("b.txt")
+        with Index.locked(".mygit/index") as index:
+            index.remove("b.txt")
+        add(["a.txt", "new", "run.sh"])
+        commit("feature")
+
+    def tearDown(self):
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.test_dir)
+
+    def _write(self, files):
+        for path, content in files.items():
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def _read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_switch_only_touches_changed_files(self):
+        with mock.patch.object(worktree_module, "write_file", wraps=worktree_module.write_file) as write_file:
+            checkout("main")
+        self.assertEqual(sorted(c.args[0] for c in write_file.call_args_list), ["a.txt", "b.txt"])
+        self.assertEqual(self._read("a.txt"), "a")
+        self.assertFalse(os.path.exists("new"))
+        self.assertFalse(os.stat("run.sh").st_mode & 0o100)
+        index = Index.read(".mygit/index")
+        self.assertEqual([e.path for e in index], ["a.txt", "b.txt", "lib/x.py", "run.sh"])
+        # Fresh stat data (the size may be smudged: the file is as new as the index)
+        self.assertEqual(index.get("b.txt").ino, os.stat("b.txt").st_ino)
+        checkout("feature")
+        self.assertEqual(self._read("new/deep/n.txt"), "n")
+        self.assertTrue(os.stat("run.sh").st_mode & 0o100)
+        self.assertFalse(os.path.exists("b.txt"))
+
+    def test_refuses_to_clobber_local_changes(self):
+        self._write({"a.txt": "local"})
+        sys.stderr = io.StringIO()
+        with self.assertRaises(SystemExit):
+            checkout("main")
+        self.assertIn("a.txt", sys.stderr.getvalue())
+        self.assertEqual(self._read("a.txt"), "local")
+        self.assertEqual(self._read(os.path.join(".mygit", "HEAD")), "ref: refs/heads/feature\n")
+        # A change to a file that is the same on both branches is carried over
+        self._write({"a.txt": "a2", "lib/x.py": "local x"})
+        checkout("main")
+        self.assertEqual(self._read("lib/x.py"), "local x")
+
+    def test_reset_hard_discards_local_changes(self):
+        self._write({"lib/x.py": "local x"})
+        os.remove("a.txt")
+        with mock.patch.object(worktree_module, "write_file", wraps=worktree_module.write_file) as write_file:
+            reset("main", mode="hard")
+        self.assertEqual(sorted(c.args[0] for c in write_file.call_args_list), ["a.txt", "b.txt", "lib/x.py"])
+        self.assertEqual(self._read("lib/x.py"), "x")
+        self.assertFalse(os.path.exists("new"))
+
+    def test_parallel_write(self):
+        items = [(f"p/{i // 10}/f{i}.txt", "100644", self._blob(f"file {i}")) for i in range(40)]
+        progress = []
+        with mock.patch.object(worktree_module, "PARALLEL_CHECKOUT_MIN_FILES", 1):
+            written = worktree_module.write_files(items, ".mygit", jobs=2,
+                                                  progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(sorted(written), sorted(path for path, _, _ in items))
+        self.assertEqual(self._read("p/3/f39.txt"), "file 39")
+        self.assertEqual(progress[-1], (40, 40))
+
+    def test_write_errors_are_deterministic(self):
+        items = [(f"q/f{i}.txt", "100644", self._blob(str(i))) for i in range(6)]
+        items[4] = ("q/f4.txt", "100644", "0" * 40)
+        items[1] = ("q/f1.txt", "100644", "1" * 40)
+        with mock.patch.object(worktree_module, "PARALLEL_CHECKOUT_MIN_FILES", 1), \
+                mock.patch.object(worktree_module, "MAX_CHUNK_FILES", 1):
+            with self.assertRaises(OSError) as raised:
+                worktree_module.write_files(items, ".mygit", jobs=3)
+        self.assertIn("'q/f1.txt'", str(raised.exception))
+        self.assertIn("and 1 more", str(raised.exception))
+        # The other files were still written
+        self.assertEqual(self._read("q/f5.txt"), "5")
+
+    def test_commit_on_packed_branch(self):
+        head = read_ref("HEAD", ".mygit")
+        pack_refs(".mygit", all_refs=True)
+        self.assertFalse(os.path.exists(".mygit/refs/heads/feature"))
+        self._write({"a.txt": "a3"})
+        add(["a.txt"])
+        commit("after pack")
+        new_head = read_ref("HEAD", ".mygit")
+        self.assertNotEqual(new_head, head)
+        self.assertEqual(get_commit(new_head, ".mygit").parents, [head])
+
+    def _blob(self, content):
+        return write_object(content.encode(), "blob", ".mygit")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+import sys
+import io
+import importlib
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.plumbing.commit_tree import create_commit
+from src.porcelain.log import log
+from src.core.revision import walk_revisions, parse_date
+from src.core.objects import write_object
+from src.core.tree import serialize_tree, TREE_MODE
+from src.core.commit_graph import write_commit_graph
+from typer.testing import CliRunner
+from mygit.cli import app
+
+revision_module = importlib.import_module("src.core.revision")
+tree_module = importlib.import_module("src.core.tree")
+
+class TestLog(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.git_dir = os.path.join(self.test_dir, ".mygit")
+        os.makedirs(os.path.join(self.git_dir, "objects"))
+        os.makedirs(os.path.join(self.git_dir, "refs", "heads"))
+        with open(os.path.join(self.git_dir, "HEAD"), "w") as f:
+            f.write("ref: refs/heads/main\n")
+        # root <- m1 <- m2 <------ merge (m2, f2)
+        #     \- f1 <- f2 (by another author) /
+        self.root = self._commit("root", [], 1000)
+        self.m1 = self._commit("m1", [self.root], 2000)
+        self.f1 = self._commit("f1", [self.root], 2500, author="Other")
+        self.m2 = self._commit("m2", [self.m1], 3000)
+        self.f2 = self._commit("f2", [self.f1], 3500, author="Other")
+        self.merge = self._commit("Merge f", [self.m2, self.f2], 4000)
+        with open(os.path.join(self.git_dir, "refs", "heads", "main"), "w") as f:
+            f.write(self.merge + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _commit(self, message, parents, timestamp, author="Me"):
+        with mock.patch.dict(os.environ, {"MYGIT_AUTHOR_NAME": author}):
+            return create_commit("a" * 40, message, parents, self.git_dir, timestamp=timestamp)
+
+    def _log(self, **kwargs):
+        captured = io.StringIO()
+        sys.stdout = captured
+        try:
+            log(self.git_dir, oneline=True, **kwargs)
+        finally:
+            sys.stdout = sys.__stdout__
+        return [line.split(" ", 1)[1] for line in captured.getvalue().splitlines()]
+
+    def test_all_parents_in_date_order(self):
+        self.assertEqual(self._log(), ["Merge f", "f2", "m2", "f1", "m1", "root"])
+
+    def test_limits_and_filters(self):
+        self.assertEqual(self._log(max_count=2), ["Merge f", "f2"])
+        self.assertEqual(self._log(first_parent=True), ["Merge f", "m2", "m1", "root"])
+        self.assertEqual(self._log(since="2500", until="3500"), ["f2", "m2", "f1"])
+        self.assertEqual(self._log(author="^Other"), ["f2", "f1"])
+        self.assertEqual(self._log(revisions=[self.f2]), ["f2", "f1", "root"])
+
+    def test_walk_is_lazy(self):
+        with mock.patch.object(revision_module, "lookup_commit", wraps=revision_module.lookup_commit) as lookup:
+            walker = walk_revisions([self.merge], self.git_dir)
+            self.assertEqual(next(walker)[0], self.merge)
+            # Parents are only looked up when the walk goes on
+            self.assertEqual(lookup.call_count, 1)
+            self.assertEqual(next(walker)[0], self.f2)
+            self.assertEqual(lookup.call_count, 3)
+
+    def test_default_format(self):
+        captured = io.StringIO()
+        sys.stdout = captured
+        log(self.git_dir, max_count=1)
+        sys.stdout = sys.__stdout__
+        lines = captured.getvalue().splitlines()
+        self.assertEqual(lines[0], f"commit {self.merge}")
+        self.assertEqual(lines[1], f"Merge: {self.m2[:7]} {self.f2[:7]}")
+        self.assertTrue(lines[2].startswith("Author: Me <"))
+        self.assertTrue(lines[3].startswith("Date:   "))
+        self.assertEqual(lines[5], "    Merge f")
+
+    def _tree(self, doc, code):
+        lib = write_object(serialize_tree([("100644", "x.py", write_object(code, "blob", self.git_dir))]), "tree", self.git_dir)
+        entries = [("100644", "README", write_object(doc, "blob", self.git_dir)), (TREE_MODE, "lib", lib)]
+        return write_object(serialize_tree(entries), "tree", self.git_dir)
+
+    def test_path_limited(self):
+        c1 = create_commit(self._tree(b"d1", b"c1"), "c1", [], self.git_dir, timestamp=1000)
+        c2 = create_commit(self._tree(b"d1", b"c2"), "c2", [c1], self.git_dir, timestamp=2000)
+        c3 = create_commit(self._tree(b"d2", b"c2"), "c3", [c2], self.git_dir, timestamp=3000)
+        side = create_commit(self._tree(b"d1", b"c3"), "side", [c2], self.git_dir, timestamp=3500)
+        merge = create_commit(self._tree(b"d2", b"c3"), "merge", [c3, side], self.git_dir, timestamp=4000)
+        self.assertEqual(self._log(revisions=[merge], paths=["lib/x.py"]), ["side", "c2", "c1"])
+        self.assertEqual(self._log(revisions=[merge], paths=["./lib/"]), ["side", "c2", "c1"])
+        self.assertEqual(self._log(revisions=[merge], paths=["README", "nope"]), ["c3", "c1"])
+
+        write_commit_graph(self.git_dir, [merge])
+        with mock.patch.object(revision_module, "find_tree_entry", wraps=tree_module.find_tree_entry) as find:
+            self.assertEqual(self._log(revisions=[merge], paths=["README"]), ["c3", "c1"])
+        # c2, side and the merge are ruled out by their filters: only the trees
+        # of c3, its parent and the root commit are searched
+        self.assertEqual(find.call_count, 3)
+
+        # From the command line, only the arguments after '--' are paths
+        with open(os.path.join(self.git_dir, "refs", "heads", "main"), "w") as f:
+            f.write(merge + "\n")
+        old_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        try:
+            runner = CliRunner()
+            result = runner.invoke(app, ["log", "--oneline", "--", "README"])
+            self.assertEqual([line.split(" ", 1)[1] for line in result.output.splitlines()], ["c3", "c1"])
+            result = runner.invoke(app, ["log", side, "--oneline", "--", "lib"])
+            self.assertEqual([line.split(" ", 1)[1] for line in result.output.splitlines()], ["side", "c2", "c1"])
+        finally:
+            os.chdir(old_cwd)
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date("1700000000"), 1700000000)
+        self.assertEqual(parse_date("1970-01-02"), 86400)
+        self.assertEqual(parse_date("1970-01-01 01:00"), 3600)
+        self.assertEqual(parse_date("2 weeks ago", now=10 ** 7), 10 ** 7 - 14 * 86400)
+        with self.assertRaises(ValueError):
+            parse_date("yesterday-ish")
+
+if __name__ == "__main__":
+    unittest.main()